@@ -0,0 +1,52 @@
+"""
+Gunicorn hook that warms caches after a deploy or restart.
+
+Set WARM_CACHES=0 to disable it, WARM_CACHES_BUDGET to change the
+time budget (seconds) of the warm-up.
+"""
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _enabled():
+    return os.environ.get('WARM_CACHES', '1') != '0'
+
+
+def _base_url(server):
+    """``http://host:port`` of the first TCP listener, or None (unix sockets only)"""
+    for listener in server.LISTENERS:
+        address = listener.getsockname()
+        if not isinstance(address, tuple):
+            continue
+        host, port = address[:2]
+        # A wildcard bind is reachable on loopback
+        host = {'0.0.0.0': '127.0.0.1', '::': '::1'}.get(host, host)
+        if ':' in host:
+            host = f'[{host}]'
+        return f'http://{host}:{port}'
+    return None
+
+
+def when_ready(server):
+    """
+    Request every public page from the listening server, in the
+    background. This fills the shared cache; a worker loads its snapshot
+    and templates only if it answers one of the requests, so with many
+    workers some may still start cold.
+    """
+    if not _enabled():
+        return
+    base_url = _base_url(server)
+    if base_url is None:
+        server.log.warning('Cache warm-up skipped: no TCP listener to send requests to')
+        return
+    subprocess.Popen(
+        [
+            sys.executable, 'manage.py', 'warm_caches', '--url', base_url,
+            '--budget', os.environ.get('WARM_CACHES_BUDGET', '120'),
+        ],
+        cwd=BASE_DIR,
+    )
@@ -37,6 +37,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'website',
 ]
 
@@ -49,26 +50,68 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'website.middleware.SlugRedirectMiddleware',
 ]
 
+# How often (seconds) each worker reloads the old -> new slug map
+SLUG_REDIRECT_REFRESH = 60
+
 ROOT_URLCONF = 'sanas_project.urls'
 
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'website' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'website.context_processors.fragment_cache',
+            ],
+            # Compile each template once per process, in every environment
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
 ]
 
+# Lifetime of {% cache %} fragments (header, footer, product cards).
+# Fragments are invalidated by model signals, so this can be long.
+TEMPLATE_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Home page: items rendered per category; the rest are loaded on scroll
+# in pages of CATEGORY_PAGE_SIZE, cached per catalog version
+HOME_ITEMS_PER_CATEGORY = 8
+CATEGORY_PAGE_SIZE = 12
+CATEGORY_PAGE_TIMEOUT = 60 * 60
+
+# Maximum products (and categories) returned by /suggest/
+SUGGEST_LIMIT = 8
+
+# Change rows read per /api/changes/ call (see website/changes.py)
+CHANGES_PAGE_SIZE = 500
+
+# Cache-Control for public pages (see website.decorators.public_cache):
+# browsers keep them for max-age, shared caches / CDNs for s-maxage
+PUBLIC_CACHE_MAX_AGE = 60
+PUBLIC_CACHE_S_MAXAGE = 600
+
+# Reverse proxy / CDN purging by surrogate key (see website/purge.py).
+# Leave CACHE_PURGE_URL empty to disable; "manage.py purge_server" runs a
+# local stand-in that accepts the same requests.
+SURROGATE_KEY_HEADER = 'Surrogate-Key'
+CACHE_PURGE_URL = None
+CACHE_PURGE_HEADERS = {}
+CACHE_PURGE_BATCH_SIZE = 256
+CACHE_PURGE_DELAY = 1.0
+CACHE_PURGE_RETRIES = 5
+
 WSGI_APPLICATION = 'sanas_project.wsgi.application'
 
 
@@ -83,6 +126,37 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# Two tiers: a small LRU inside each worker in front of a cache shared by
+# all workers on the host. For several hosts point 'shared' at memcached
+# (django.core.cache.backends.memcached.PyMemcacheCache).
+CACHES = {
+    'default': {
+        'BACKEND': 'website.cache_backends.TieredCache',
+        'LOCATION': 'sanas',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': 5000,
+            # Upper bound on how stale a worker's local copy may be
+            'L1_TIMEOUT': 60,
+            # Always read from L2: version counters, and the status of an
+            # upload batch, written by one worker and polled through any other
+            'L1_EXCLUDE_PREFIXES': ['version:', 'upload-batch:'],
+        },
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+        'OPTIONS': {
+            # One entry per product card, so the default of 300 is too small
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -122,12 +196,44 @@ STATICFILES_DIRS = [
     BASE_DIR / 'website' / 'static',
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
+# Django 5.1 ignores STATICFILES_STORAGE; WhiteNoise writes the gzip and
+# Brotli variants of every file during collectstatic.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Built by "manage.py build_assets" into website/static/dist/
+ASSET_BUNDLES = {
+    'css/site.min.css': ['css/style.css'],
+    'js/site.min.js': ['js/script.js'],
+}
+# Rules inlined as critical CSS: selectors starting with one of these
+CRITICAL_CSS_SELECTORS = [
+    '*', ':root', 'html', 'body', '.container', '.header', '.logo', '.nav',
+    '.mobile-menu-toggle', '.hero', '.btn', '.section-title',
+]
+PLACEHOLDER_SIZES = [(400, 300), (600, 450)]
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Chunked gallery uploads from the panel (see website/uploads.py).
+# Unfinished uploads are kept in UPLOAD_TEMP_DIR for UPLOAD_EXPIRY seconds
+# so they can be resumed.
+UPLOAD_TEMP_DIR = BASE_DIR / '.uploads'
+UPLOAD_CHUNK_SIZE = 2 * 1024 * 1024
+UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+UPLOAD_EXPIRY = 60 * 60 * 24
+# Longest side of stored gallery images
+UPLOAD_MAX_DIMENSION = 2400
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
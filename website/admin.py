@@ -1,7 +1,43 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 from django import forms
-from .models import Category, Item, ItemImage
+from . import fulltext
+from .models import Category, CrawlURL, Item, ItemImage, SlugRedirect
+
+
+class InputFilter(admin.SimpleListFilter):
+    """List filter with a text box instead of one link per value"""
+    template = 'admin/input_filter.html'
+
+    def lookups(self, request, model_admin):
+        # Never rendered, but the filter is hidden without a lookup
+        return ((None, None),)
+
+    def choices(self, changelist):
+        # Only the "all" choice, for the reset link and the other parameters
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = [
+            (key, value)
+            for key, values in changelist.get_filters_params().items()
+            if key != self.parameter_name
+            for value in values
+        ]
+        yield all_choice
+
+
+class ItemInputFilter(InputFilter):
+    """Filter images by item id or by words of the item's title"""
+    title = 'товару'
+    parameter_name = 'item'
+
+    def queryset(self, request, queryset):
+        value = (self.value() or '').strip()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(item_id=value)
+        return fulltext.filter_items(queryset, value, field='item_id')
 
 
 class ItemImageInline(admin.TabularInline):
@@ -31,6 +67,9 @@ class CategoryAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     prepopulated_fields = {'slug': ('name',)}
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(item_count=Count('items'))
+
     fieldsets = (
         ('📁 Категория', {
             'fields': ('name', 'slug', 'description'),
@@ -39,12 +78,12 @@ class CategoryAdmin(admin.ModelAdmin):
     )
 
     def item_count(self, obj):
-        count = obj.items.count()
         return format_html(
             '<span style="background-color: #417690; color: white; padding: 3px 10px; border-radius: 3px;">{}</span>',
-            count
+            obj.item_count
         )
     item_count.short_description = "Количество товаров"
+    item_count.admin_order_field = 'item_count'
 
 
 class ItemAdminForm(forms.ModelForm):
@@ -83,9 +122,13 @@ class ItemAdmin(admin.ModelAdmin):
         'created_at'
     )
     list_filter = ('status', 'featured', 'category')
+    # Searched through the full-text index, see get_search_results
     search_fields = ('title', 'description')
+    search_help_text = 'Поиск по началу слов в названии и описании'
     prepopulated_fields = {'slug': ('title',)}
     list_editable = ('status', 'featured')
+    autocomplete_fields = ('category',)
+    show_full_result_count = False
     readonly_fields = ('created_at', 'updated_at', 'main_image_preview')
     inlines = [ItemImageInline]
     save_on_top = True  # Save buttons at top too
@@ -135,15 +178,26 @@ class ItemAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.select_related('category')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Also serves the item autocomplete of ItemImageAdmin
+        if not search_term.strip():
+            return queryset, False
+        return fulltext.filter_items(queryset, search_term), False
+
 
 @admin.register(ItemImage)
 class ItemImageAdmin(admin.ModelAdmin):
     """Admin interface for ItemImage model"""
+    # No list_editable order: galleries are reordered by drag-and-drop in the
+    # panel, which writes one row per move
     list_display = ('item', 'caption', 'order', 'image_preview', 'uploaded_at')
-    list_filter = ('uploaded_at', 'item')
-    search_fields = ('item__title', 'caption')
-    list_editable = ('order',)
+    list_select_related = ('item',)
+    list_filter = ('uploaded_at', ItemInputFilter)
+    search_fields = ('item__title',)
+    search_help_text = 'Поиск по названию товара'
+    autocomplete_fields = ('item',)
     readonly_fields = ('uploaded_at', 'large_image_preview')
+    show_full_result_count = False
 
     fieldsets = (
         ('Основная информация', {
@@ -176,6 +230,30 @@ class ItemImageAdmin(admin.ModelAdmin):
         return "Нет изображения"
     large_image_preview.short_description = "Изображение"
 
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return fulltext.filter_items(queryset, search_term, field='item_id'), False
+
+
+@admin.register(SlugRedirect)
+class SlugRedirectAdmin(admin.ModelAdmin):
+    """Admin interface for SlugRedirect model"""
+    list_display = ('old_slug', 'new_slug', 'kind', 'created_at')
+    list_filter = ('kind',)
+    search_fields = ('old_slug', 'new_slug')
+    readonly_fields = ('created_at',)
+
+
+@admin.register(CrawlURL)
+class CrawlURLAdmin(admin.ModelAdmin):
+    """Admin interface for the scrapers' crawl frontier"""
+    list_display = ('url', 'crawl', 'status', 'depth', 'priority', 'http_status', 'last_fetched')
+    list_filter = ('crawl', 'status')
+    search_fields = ('url',)
+    readonly_fields = ('url_hash', 'content_hash', 'discovered_at', 'last_fetched')
+    show_full_result_count = False
+
 
 # Customize admin site
 admin.site.site_header = "SANAS - Управление сайтом"
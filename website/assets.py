@@ -0,0 +1,114 @@
+"""
+Helpers for the ``build_assets`` command: CSS/JS minification, critical
+CSS extraction and placeholder image generation.
+"""
+import re
+from io import BytesIO
+from PIL import Image, ImageDraw, ImageFont
+
+
+PLACEHOLDER_BACKGROUND = '#2c5f8d'
+PLACEHOLDER_FOREGROUND = '#ffffff'
+
+_CSS_COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACE_RE = re.compile(r'\s+')
+_CSS_PUNCT_RE = re.compile(r'\s*([{};,>])\s*')
+
+
+def minify_css(css):
+    """Strip comments and redundant whitespace from a stylesheet"""
+    css = _CSS_COMMENT_RE.sub('', css)
+    css = _CSS_SPACE_RE.sub(' ', css)
+    css = _CSS_PUNCT_RE.sub(r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def minify_js(js):
+    """
+    Conservatively minify a script: drop comment lines, block comments
+    and indentation. Line breaks are kept so automatic semicolon insertion
+    behaves exactly as in the source.
+    """
+    js = re.sub(r'^\s*/\*.*?\*/\s*$', '', js, flags=re.S | re.M)
+    lines = []
+    for line in js.splitlines():
+        line = line.strip()
+        if not line or line.startswith('//'):
+            continue
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+def split_css_blocks(css):
+    """
+    Split minified CSS into top-level ``(prelude, body)`` pairs, e.g.
+    ``('.nav a', 'color:#fff')`` or ``('@media (max-width:768px)', '...')``.
+    """
+    blocks = []
+    depth = 0
+    start = 0
+    prelude = ''
+    for pos, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude = css[start:pos].strip()
+                start = pos + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append((prelude, css[start:pos]))
+                start = pos + 1
+    return blocks
+
+
+def _is_critical(selector_list, critical_selectors):
+    for selector in selector_list.split(','):
+        selector = selector.strip()
+        if any(selector.startswith(prefix) for prefix in critical_selectors):
+            return True
+    return False
+
+
+def extract_critical_css(css, critical_selectors):
+    """
+    Keep only the rules needed to paint above-the-fold content: rules
+    whose selectors start with one of ``critical_selectors`` (including
+    those inside ``@media`` blocks). ``@keyframes`` and other at-rules
+    are left to the full stylesheet.
+    """
+    output = []
+    for prelude, body in split_css_blocks(minify_css(css)):
+        if prelude.startswith('@media'):
+            inner = extract_critical_css(body, critical_selectors)
+            if inner:
+                output.append(f'{prelude}{{{inner}}}')
+        elif not prelude.startswith('@') and _is_critical(prelude, critical_selectors):
+            output.append(f'{prelude}{{{body}}}')
+    return ''.join(output)
+
+
+def make_placeholder(width, height, text='SANAS'):
+    """Render a flat brand-coloured placeholder image as PNG bytes"""
+    image = Image.new('RGB', (width, height), PLACEHOLDER_BACKGROUND)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=max(12, height // 8))
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    position = ((width - (right - left)) / 2 - left, (height - (bottom - top)) / 2 - top)
+    draw.text(position, text, fill=PLACEHOLDER_FOREGROUND, font=font)
+
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
+
+
+def placeholder_svg(width, height, text='SANAS'):
+    """Inline SVG equivalent of ``make_placeholder`` for unbuilt assets"""
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}"><rect width="100%" height="100%" fill="{PLACEHOLDER_BACKGROUND}"/>'
+        f'<text x="50%" y="50%" fill="{PLACEHOLDER_FOREGROUND}" font-family="sans-serif" '
+        f'font-size="{max(12, height // 8)}" text-anchor="middle" dominant-baseline="middle">{text}</text></svg>'
+    )
@@ -0,0 +1,107 @@
+"""
+Set-based bulk actions for the panel item list.
+
+Every action is a single UPDATE or DELETE over a queryset, so acting on
+all items matching a filter never loads them into Python. Queryset
+writes send no model signals; instead each action bumps the catalog
+version once and queues one batch of surrogate-key purges, both after
+the transaction commits.
+"""
+from decimal import Decimal
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Round
+from django.utils import timezone
+from . import changes
+from .catalog import bump_catalog_version
+from .models import Item, ItemImage, RelatedItem
+from .purge import CATALOG_KEY, category_key, item_key, purge
+
+
+# action -> label shown in the panel
+ACTIONS = {
+    'publish': 'Опубликовать',
+    'archive': 'В архив',
+    'feature': 'Показывать на главной',
+    'unfeature': 'Убрать с главной',
+    'move': 'Перенести в категорию',
+    'price': 'Изменить цену на %',
+    'delete': 'Удалить',
+}
+
+
+def purge_keys(queryset, extra=()):
+    """Surrogate keys of the selected items and their categories"""
+    if not settings.CACHE_PURGE_URL:
+        return set()
+    keys = {CATALOG_KEY, *extra}
+    for item_id, category_id in queryset.values_list('id', 'category_id').iterator():
+        keys.add(item_key(item_id))
+        if category_id:
+            keys.add(category_key(category_id))
+    return keys
+
+
+def catalog_changed(keys):
+    """Invalidate caches once for the whole action"""
+    transaction.on_commit(bump_catalog_version)
+    purge(keys)
+
+
+def update_items(queryset, extra_keys=(), **values):
+    """One UPDATE over ``queryset``; returns the number of rows changed"""
+    # Cached product cards are keyed on updated_at
+    values['updated_at'] = timezone.now()
+    with transaction.atomic():
+        keys = purge_keys(queryset, extra_keys)
+        # Before the update, which may take rows out of the queryset
+        changes.record_queryset(queryset)
+        count = queryset.order_by().update(**values)
+        catalog_changed(keys)
+    return count
+
+
+def delete_items(queryset):
+    """
+    Delete ``queryset`` and the rows that reference it with one DELETE per
+    table. ``QuerySet.delete()`` would load every item to send signals.
+    """
+    selected = queryset.order_by().values('pk')
+    with transaction.atomic():
+        keys = purge_keys(queryset)
+        changes.record_queryset(ItemImage.objects.filter(item__in=selected))
+        changes.record_queryset(queryset)
+        for related in (
+            RelatedItem.objects.filter(Q(item__in=selected) | Q(related__in=selected)),
+            ItemImage.objects.filter(item__in=selected),
+        ):
+            related._raw_delete(related.db)
+        count = Item.objects.filter(pk__in=selected)._raw_delete(queryset.db)
+        catalog_changed(keys)
+    return count
+
+
+def change_price(queryset, percent):
+    """Multiply prices by ``1 + percent / 100``, rounded to kopecks"""
+    factor = (Decimal(100) + Decimal(percent)) / 100
+    return update_items(queryset.filter(price__isnull=False), price=Round(F('price') * factor, 2))
+
+
+def run_action(action, queryset, category=None, percent=None):
+    """Apply a bulk action from ``ACTIONS``; returns the number of items affected"""
+    if action == 'publish':
+        return update_items(queryset, status='published')
+    if action == 'archive':
+        return update_items(queryset, status='archived')
+    if action == 'feature':
+        return update_items(queryset, featured=True)
+    if action == 'unfeature':
+        return update_items(queryset, featured=False)
+    if action == 'move':
+        return update_items(queryset, extra_keys=[category_key(category.pk)], category=category)
+    if action == 'price':
+        return change_price(queryset, percent)
+    if action == 'delete':
+        return delete_items(queryset)
+    raise ValueError(f'Unknown bulk action: {action}')
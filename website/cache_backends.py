@@ -0,0 +1,262 @@
+"""
+Two-level cache backend: a bounded per-process LRU (L1) in front of a
+cache shared by all workers (L2, any configured Django cache).
+
+Reads are served from L1 when possible and fall back to L2; writes go
+to L2 and replace the local L1 copy. Other workers' L1 copies are not
+invalidated, so L1 entries live at most ``L1_TIMEOUT`` seconds. Data
+that must be fresh everywhere is addressed through version counters
+(``website.catalog``): the counters themselves bypass L1 (see
+``L1_EXCLUDE_PREFIXES``) and a bump moves every reader to new keys.
+
+Example::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'website.cache_backends.TieredCache',
+            'LOCATION': 'sanas',
+            'OPTIONS': {'L2': 'shared', 'L1_MAX_ENTRIES': 5000, 'L1_TIMEOUT': 60},
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / '.cache',
+        },
+    }
+"""
+import os
+import pickle
+import threading
+import time
+from collections import Counter, OrderedDict
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+_MISSING = object()
+
+# Shared by every thread of the process, keyed by LOCATION (like LocMemCache)
+_tiers = {}
+_tiers_lock = threading.Lock()
+
+
+class LocalTier:
+    """Thread-safe LRU of pickled values with per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.stats['l1_misses'] += 1
+                return _MISSING
+            self.entries.move_to_end(key)
+            self.stats['l1_hits'] += 1
+        return pickle.loads(entry[0])
+
+    def set(self, key, value, ttl):
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.entries[key] = (pickled, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['l1_evictions'] += 1
+
+    def delete(self, key):
+        with self.lock:
+            return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.l2_alias = options.get('L2', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 60)
+        self.exclude_prefixes = tuple(options.get('L1_EXCLUDE_PREFIXES', ('version:',)))
+        # Stampede protection for get_or_set
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self.lock_wait = options.get('LOCK_WAIT', 10)
+        self.lock_poll = options.get('LOCK_POLL', 0.05)
+
+        with _tiers_lock:
+            self.l1 = _tiers.setdefault(location, LocalTier(options.get('L1_MAX_ENTRIES', 5000)))
+
+    @property
+    def l2(self):
+        return caches[self.l2_alias]
+
+    def _l1_key(self, key, version):
+        if key.startswith(self.exclude_prefixes):
+            return None
+        return self.make_and_validate_key(key, version=version)
+
+    def _l1_ttl(self, timeout):
+        if timeout is DEFAULT_TIMEOUT or timeout is None:
+            return self.l1_timeout
+        return min(timeout, self.l1_timeout)
+
+    def get(self, key, default=None, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            value = self.l1.get(l1_key)
+            if value is not _MISSING:
+                return value
+
+        value = self.l2.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self.l1.count('l2_misses')
+            return default
+        self.l1.count('l2_hits')
+        if l1_key is not None:
+            self.l1.set(l1_key, value, self.l1_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.l2.set(key, value, timeout, version=version)
+        self._store_local(key, value, timeout, version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout, version=version)
+        if added:
+            self._store_local(key, value, timeout, version)
+        else:
+            self._drop_local(key, version)
+        return added
+
+    def _store_local(self, key, value, timeout, version):
+        l1_key = self._l1_key(key, version)
+        if l1_key is None:
+            return
+        if timeout is not None and timeout is not DEFAULT_TIMEOUT and timeout <= 0:
+            self.l1.delete(l1_key)
+        else:
+            self.l1.set(l1_key, value, self._l1_ttl(timeout))
+
+    def _drop_local(self, key, version):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None:
+            self.l1.delete(l1_key)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._drop_local(key, version)
+        return self.l2.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._drop_local(key, version)
+        return self.l2.delete(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._drop_local(key, version)
+        return self.l2.incr(key, delta, version=version)
+
+    def has_key(self, key, version=None):
+        l1_key = self._l1_key(key, version)
+        if l1_key is not None and self.l1.get(l1_key) is not _MISSING:
+            return True
+        return self.l2.has_key(key, version=version)
+
+    def clear(self):
+        self.l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def _lock_path(self, lock_key, version):
+        """Lock file next to the L2 entries, or None if L2 is not file-based"""
+        l2 = self.l2
+        if not isinstance(l2, FileBasedCache):
+            return None
+        return os.path.splitext(l2._key_to_file(lock_key, version))[0] + '.lock'
+
+    def _acquire(self, lock_key, version):
+        """
+        Take the lock atomically. ``FileBasedCache.add`` is a check then a
+        write, so two workers could both get it: there the lock is a file
+        created with O_EXCL. Other backends' ``add`` is atomic.
+        """
+        path = self._lock_path(lock_key, version)
+        if path is None:
+            return self.l2.add(lock_key, 1, self.lock_timeout, version=version)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            pass
+        try:
+            if time.time() - os.path.getmtime(path) > self.lock_timeout:
+                # Left behind by a holder that died
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        return False
+
+    def _release(self, lock_key, version):
+        path = self._lock_path(lock_key, version)
+        if path is None:
+            self.l2.delete(lock_key, version=version)
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Like ``BaseCache.get_or_set``, but only one caller across all
+        workers computes a missing value: the others wait for it (up to
+        ``LOCK_WAIT`` seconds) instead of stampeding the database.
+        """
+        value = self.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        if not callable(default):
+            return super().get_or_set(key, default, timeout, version)
+
+        lock_key = f'lock:{key}'
+        deadline = time.monotonic() + self.lock_wait
+        while True:
+            if self._acquire(lock_key, version):
+                try:
+                    value = default()
+                    self.set(key, value, timeout, version=version)
+                    return value
+                finally:
+                    self._release(lock_key, version)
+
+            self.l1.count('lock_waits')
+            time.sleep(self.lock_poll)
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                return value
+            if time.monotonic() >= deadline:
+                # The lock holder is too slow or died; compute it ourselves
+                self.l1.count('lock_timeouts')
+                value = default()
+                self.set(key, value, timeout, version=version)
+                return value
+
+    def stats(self):
+        """Hit/miss counters of this process, per tier"""
+        with self.l1.lock:
+            stats = dict(self.l1.stats)
+            stats['l1_entries'] = len(self.l1.entries)
+        return stats
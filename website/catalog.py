@@ -0,0 +1,77 @@
+"""
+Version counters and pagination cursors.
+
+Any write to a Category, Item or ItemImage bumps the catalog version, and
+category writes also bump the category version (see ``signals.py``).
+Cached pages and fragments include a version in their key, so a bump
+makes every old entry unreachable without deleting it, in every worker.
+"""
+import binascii
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from django.core.cache import cache
+
+
+# The "version:" prefix keeps counters out of the per-process cache tier
+CATALOG_VERSION_KEY = 'version:catalog'
+CATEGORY_VERSION_KEY = 'version:categories'
+
+
+def _initial_version():
+    # Seeded from the clock so a counter lost from the cache never
+    # repeats a version that old entries may still be stored under
+    return time.time_ns() // 1000
+
+
+def get_version(key):
+    """Return the current value of a version counter"""
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Move a version counter forward"""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout=None)
+        return cache.incr(key)
+
+
+def catalog_version():
+    """Return the current catalog version"""
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """Invalidate every versioned catalog cache entry"""
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+def category_version():
+    """Return the version of the category list (navigation, footer)"""
+    return get_version(CATEGORY_VERSION_KEY)
+
+
+def bump_category_version():
+    """Invalidate cached fragments that list categories"""
+    return bump_version(CATEGORY_VERSION_KEY)
+
+
+def encode_cursor(item):
+    """Opaque cursor pointing just after ``item`` in (order, id) order"""
+    raw = f'{item.order}:{item.pk}'.encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of ``encode_cursor``; raises ValueError on a malformed cursor"""
+    try:
+        raw = urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        order, pk = raw.split(':')
+        return int(order), int(pk)
+    except (TypeError, UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from e
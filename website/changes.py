@@ -0,0 +1,149 @@
+"""
+Change log behind the ``/api/changes/`` delta feed.
+
+Every write to a category, item or gallery image appends a ``Change``
+row: model signals cover ordinary saves and deletes, and code that
+writes with querysets or bulk operations calls ``record`` itself (the
+same places that bump the catalog version). Rows carry no data; the
+feed reads each changed object's current state, and an object that is
+gone, or no longer public, is sent as a delete.
+
+``compact_changes`` keeps only the newest row per object. Any cursor
+stays valid after compaction: everything changed after it still has a
+row after it.
+"""
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Max, Q
+from django.urls import reverse
+from .models import Category, Change, Item, ItemImage
+
+
+KINDS = {
+    Category: 'category',
+    Item: 'item',
+    ItemImage: 'image',
+}
+
+RECORD_BATCH_SIZE = 1000
+
+
+def record(model, ids):
+    """Log changes to the ``model`` rows with primary keys ``ids``"""
+    kind = KINDS[model]
+    Change.objects.bulk_create(
+        (Change(kind=kind, object_id=pk) for pk in ids),
+        batch_size=RECORD_BATCH_SIZE,
+    )
+
+
+def record_queryset(queryset):
+    """Log changes to every row of ``queryset``, reading only primary keys"""
+    record(queryset.model, queryset.order_by().values_list('pk', flat=True).iterator())
+
+
+def compact():
+    """Delete every row that has a newer row for the same object; returns the count"""
+    latest = Change.objects.values('kind', 'object_id').annotate(last=Max('seq')).values('last')
+    deleted, _ = Change.objects.exclude(seq__in=latest).delete()
+    return deleted
+
+
+def _media(name, width, height):
+    if not name:
+        return None
+    return {'url': default_storage.url(name), 'width': width, 'height': height}
+
+
+def _image_data(row):
+    image_id, item_id, name, width, height, caption, order = row
+    return {
+        'id': image_id,
+        'item_id': item_id,
+        'image': _media(name, width, height),
+        'caption': caption,
+        'order': order,
+    }
+
+
+def changes_since(since, limit=None):
+    """
+    Deltas for changes after ``since``, at most ``limit`` change rows per
+    call. ``next`` is the cursor for the following call and ``more`` says
+    whether there is anything after it. Apply upserts categories, items,
+    images first, then deletes; deleting an item deletes its images.
+    """
+    limit = limit or settings.CHANGES_PAGE_SIZE
+    rows = list(
+        Change.objects.filter(seq__gt=since)
+        .order_by('seq')
+        .values_list('seq', 'kind', 'object_id')[:limit + 1]
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+
+    changed = {kind: set() for kind in KINDS.values()}
+    for _, kind, object_id in rows:
+        changed[kind].add(object_id)
+
+    categories = list(
+        Category.objects.filter(id__in=changed['category'])
+        .order_by('id')
+        .values('id', 'name', 'slug', 'description')
+    )
+
+    items = []
+    for row in (
+        Item.objects.filter(id__in=changed['item'], status='published')
+        .order_by('id')
+        .values_list(
+            'id', 'slug', 'title', 'category_id', 'short_description', 'description', 'price',
+            'main_image', 'main_image_width', 'main_image_height', 'featured', 'order', 'updated_at',
+        )
+    ):
+        (item_id, slug, title, category_id, short_description, description, price,
+         main_image, width, height, featured, order, updated_at) = row
+        items.append({
+            'id': item_id,
+            'url': reverse('product_detail', args=[slug]),
+            'slug': slug,
+            'title': title,
+            'category_id': category_id,
+            'short_description': short_description,
+            'description': description,
+            'price': price,
+            'main_image': _media(main_image, width, height),
+            'featured': featured,
+            'order': order,
+            'updated_at': updated_at,
+        })
+    published = {item['id'] for item in items}
+
+    # A (re)published item brings its whole gallery along
+    images = [
+        _image_data(row)
+        for row in ItemImage.objects.filter(
+            Q(id__in=changed['image']) | Q(item_id__in=published),
+            item__status='published',
+        )
+        .order_by('id')
+        .values_list('id', 'item_id', 'image', 'width', 'height', 'caption', 'order')
+    ]
+
+    return {
+        'since': since,
+        'next': rows[-1][0] if rows else since,
+        'more': more,
+        'categories': {
+            'upsert': categories,
+            'delete': sorted(changed['category'] - {category['id'] for category in categories}),
+        },
+        'items': {
+            'upsert': items,
+            'delete': sorted(changed['item'] - published),
+        },
+        'images': {
+            'upsert': images,
+            'delete': sorted(changed['image'] - {image['id'] for image in images}),
+        },
+    }
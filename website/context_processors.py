@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from .catalog import category_version
+
+
+def fragment_cache(request):
+    """Expose the {% cache %} fragment timeout and category version to templates"""
+    return {
+        'fragment_timeout': settings.TEMPLATE_FRAGMENT_TIMEOUT,
+        # Only read from the cache by templates that use it
+        'category_version': SimpleLazyObject(category_version),
+    }
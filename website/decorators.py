@@ -0,0 +1,38 @@
+import logging
+from functools import wraps
+from django.conf import settings
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+logger = logging.getLogger(__name__)
+
+
+def public_cache(view_func):
+    """
+    Mark a public page as cacheable by shared caches and CDNs.
+
+    Only applies to successful responses that did not touch the session or
+    set cookies and have no Cache-Control of their own; anything else is
+    left private so per-visitor content is never stored by a proxy.
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+
+        if response.status_code != 200 or response.has_header('Cache-Control'):
+            return response
+
+        session = getattr(request, 'session', None)
+        if response.cookies or (session is not None and session.accessed):
+            logger.warning('Public view %s used the session or set cookies; not caching', request.path)
+            return response
+
+        patch_cache_control(
+            response,
+            public=True,
+            max_age=settings.PUBLIC_CACHE_MAX_AGE,
+            s_maxage=settings.PUBLIC_CACHE_S_MAXAGE,
+        )
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    return wrapper
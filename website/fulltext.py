@@ -0,0 +1,112 @@
+"""
+Indexed item search for the admin and the panel.
+
+On SQLite, titles and descriptions are kept in an FTS5 table maintained by
+triggers, so bulk updates, raw deletes and importers keep it current
+without going through Django. Queries match every word as a prefix
+("компр поршн" finds «Компрессор поршневой»), and the result is applied
+to a queryset as an ``id IN (...)`` filter on the index.
+
+Other databases fall back to ``title__icontains``; add a trigram or
+full-text index there to keep that fast.
+"""
+from contextlib import contextmanager
+from django.db import connections
+from django.db.models.expressions import RawSQL
+from .search import normalize
+
+
+TABLE = 'website_item_fts'
+
+# Contentless: the index stores only tokens. ё is folded to е before
+# indexing because unicode61 does not treat it as a diacritic.
+_INDEXED = "replace(replace({row}.title, 'ё', 'е'), 'Ё', 'Е'), replace(replace({row}.description, 'ё', 'е'), 'Ё', 'Е')"
+
+SCHEMA = [
+    f'''CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+        title, description, content='', tokenize='unicode61 remove_diacritics 2'
+    )''',
+    f'''CREATE TRIGGER IF NOT EXISTS {TABLE}_insert AFTER INSERT ON website_item BEGIN
+        INSERT INTO {TABLE}(rowid, title, description) VALUES (new.id, {_INDEXED.format(row='new')});
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {TABLE}_delete AFTER DELETE ON website_item BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, title, description) VALUES ('delete', old.id, {_INDEXED.format(row='old')});
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS {TABLE}_update AFTER UPDATE OF title, description ON website_item BEGIN
+        INSERT INTO {TABLE}({TABLE}, rowid, title, description) VALUES ('delete', old.id, {_INDEXED.format(row='old')});
+        INSERT INTO {TABLE}(rowid, title, description) VALUES (new.id, {_INDEXED.format(row='new')});
+    END''',
+]
+
+TRIGGERS = (f'{TABLE}_insert', f'{TABLE}_delete', f'{TABLE}_update')
+
+
+def available(using='default'):
+    return connections[using].vendor == 'sqlite'
+
+
+def install(using='default'):
+    """
+    Create the index and its triggers if missing and refill the index
+    when any trigger was missing. Runs after every migrate: SQLite table
+    rebuilds in later migrations drop the triggers on website_item.
+    """
+    if not available(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+            TRIGGERS,
+        )
+        complete = len(cursor.fetchall()) == len(TRIGGERS)
+        for statement in SCHEMA:
+            cursor.execute(statement)
+        if not complete:
+            cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('delete-all')")
+            cursor.execute(
+                f'INSERT INTO {TABLE}(rowid, title, description) '
+                f'SELECT id, {_INDEXED.format(row="website_item")} FROM website_item'
+            )
+    return not complete
+
+
+@contextmanager
+def deferred_indexing(after_id, using='default'):
+    """
+    Index the items inserted inside the block (ids above ``after_id``)
+    with one INSERT ... SELECT when it ends instead of the insert trigger
+    firing per row, which dominates bulk loads. Use inside a transaction:
+    the trigger is dropped for the block and comes back with a rollback.
+    """
+    if not available(using):
+        yield
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DROP TRIGGER IF EXISTS {TABLE}_insert')
+    yield
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {TABLE}(rowid, title, description) '
+            f'SELECT id, {_INDEXED.format(row="website_item")} FROM website_item WHERE id > %s',
+            [after_id],
+        )
+        cursor.execute(SCHEMA[1])
+
+
+def match_query(query):
+    """FTS5 query matching every word of ``query`` as a prefix, or ''"""
+    return ' '.join(f'"{word}"*' for word in normalize(query).split())
+
+
+def filter_items(queryset, query, field='id'):
+    """Restrict ``queryset`` to rows whose item (``field``) matches ``query``"""
+    if not available(queryset.db):
+        lookup = 'title__icontains' if field == 'id' else f'{field.removesuffix("_id")}__title__icontains'
+        return queryset.filter(**{lookup: query})
+
+    fts_query = match_query(query)
+    if not fts_query:
+        return queryset.none()
+    return queryset.filter(**{
+        f'{field}__in': RawSQL(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [fts_query]),
+    })
@@ -0,0 +1,59 @@
+"""
+Image metadata stored next to uploaded images: pixel dimensions (for
+``width``/``height`` attributes) and a tiny blurred JPEG preview inlined
+as a data URI (LQIP) while the real image loads.
+
+``image_meta`` only needs Pillow, so it can run in worker processes of
+the ``backfill_images`` command.
+"""
+import base64
+from io import BytesIO
+from PIL import Image, ImageFilter
+
+
+LQIP_SIZE = 16
+LQIP_QUALITY = 50
+
+
+def image_meta(fileobj):
+    """Return ``(width, height, lqip_data_uri)`` for an image file or path"""
+    with Image.open(fileobj) as image:
+        width, height = image.size
+        # Lets the JPEG decoder downscale while decoding
+        image.draft('RGB', (LQIP_SIZE * 4, LQIP_SIZE * 4))
+        preview = image.convert('RGB')
+
+    preview.thumbnail((LQIP_SIZE, LQIP_SIZE))
+    preview = preview.filter(ImageFilter.GaussianBlur(1))
+    buffer = BytesIO()
+    preview.save(buffer, format='JPEG', quality=LQIP_QUALITY, optimize=True)
+    lqip = 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode()
+    return width, height, lqip
+
+
+def field_image_meta(field_file):
+    """
+    ``image_meta`` for an ImageField value, whether freshly assigned (not
+    yet stored) or already in storage. Returns None if it can't be read.
+    """
+    committed = field_file._committed
+    try:
+        field_file.open('rb')
+        try:
+            return image_meta(field_file)
+        finally:
+            if committed:
+                field_file.close()
+            else:
+                # Rewind so the storage saves the whole upload
+                field_file.seek(0)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+def path_image_meta(path):
+    """Process pool friendly ``image_meta``; returns ``(path, meta or None)``"""
+    try:
+        return path, image_meta(path)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return path, None
@@ -0,0 +1,113 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+from website import changes
+from website.bulk import catalog_changed
+from website.images import path_image_meta
+from website.models import Item, ItemImage
+from website.purge import CATALOG_KEY, category_key, item_key
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+# (label, model, image field, (width, height, lqip) fields)
+TARGETS = [
+    ('items', Item, 'main_image', ('main_image_width', 'main_image_height', 'main_image_lqip')),
+    ('gallery', ItemImage, 'image', ('width', 'height', 'lqip')),
+]
+
+
+class Command(BaseCommand):
+    help = 'Store dimensions and LQIP previews for existing images, in parallel'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Processes decoding images',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Images written per transaction',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute every image, not only those without dimensions',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            default_storage.path('')
+        except NotImplementedError:
+            raise CommandError('backfill_images needs a storage with local paths (FileSystemStorage)')
+
+        self.stdout.write(self.style.SUCCESS('Backfilling image metadata...'))
+
+        updated = 0
+        missing = 0
+        keys = {CATALOG_KEY}
+        # Forked workers must not share the parent's database connections
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=max(1, options['workers'])) as pool:
+            for label, model, field, meta_fields in TARGETS:
+                rows = model.objects.exclude(**{field: ''}).order_by('pk')
+                if not options['all']:
+                    rows = rows.filter(**{f'{meta_fields[0]}__isnull': True})
+                # Main images show on category cards, gallery images on the product page
+                rows = list(rows.values_list('pk', field, 'category_id' if model is Item else 'item_id'))
+                self.stdout.write(f'\n[{label}] {len(rows)} images')
+
+                for start in range(0, len(rows), options['batch_size']):
+                    chunk = rows[start:start + options['batch_size']]
+                    paths = [default_storage.path(name) for _, name, _ in chunk]
+                    objs = []
+                    results = pool.map(path_image_meta, paths, chunksize=8)
+                    for (pk, _, owner_id), (path, meta) in zip(chunk, results):
+                        if meta is None:
+                            missing += 1
+                            self.stdout.write(self.style.WARNING(f'  [!] Cannot read {path}'))
+                            continue
+                        if model is Item:
+                            keys.add(item_key(pk))
+                            if owner_id:
+                                keys.add(category_key(owner_id))
+                        else:
+                            keys.add(item_key(owner_id))
+                        obj = model(pk=pk)
+                        for name, value in zip(meta_fields, meta):
+                            setattr(obj, name, value)
+                        objs.append(obj)
+
+                    self.write(model, objs, meta_fields)
+                    updated += len(objs)
+                    self.stdout.write(f'[+] {label}: {start + len(chunk)}/{len(rows)}')
+
+        if updated:
+            # bulk_update sends no signals
+            catalog_changed(keys)
+
+        self.stdout.write(self.style.SUCCESS(f'\n[SUCCESS] {updated} images updated!'))
+        if missing:
+            self.stdout.write(self.style.WARNING(f'{missing} images could not be read'))
+
+    def write(self, model, objs, meta_fields):
+        fields = list(meta_fields)
+        if model is Item:
+            # Cached product cards are keyed on updated_at
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields.append('updated_at')
+        with transaction.atomic():
+            model.objects.bulk_update(objs, fields)
+            changes.record(model, [obj.pk for obj in objs])
@@ -0,0 +1,419 @@
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from bs4 import BeautifulSoup, SoupStrainer
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template import Engine
+from django.test import RequestFactory
+from django.utils.text import slugify
+from website.catalog import bump_catalog_version
+from website.models import Category, Item
+from website.scraping.sites import SITES
+from website.search import PrefixIndex
+from website.snapshot import CatalogSnapshot
+from website import slugs, views
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+SAMPLE_WORDS = [
+    'Компрессор', 'винтовой', 'ДЭН', 'СТАНДАРТ', 'ОПТИМ', 'ВОЛЬТ', 'ШАХТЕР',
+    'безмасляный', 'осушитель', 'рефрижераторный', 'ресивер', 'фильтр',
+    'магистральный', 'азотная', 'станция', 'дизельный', 'КВ', 'ШМБ',
+    'блок-контейнерная', 'кВт', '7,5', '15', '37', '90', '(12 бар)', '№3',
+]
+
+
+def sample_titles(count, seed=42):
+    """Generate realistic product titles for benchmarks"""
+    rnd = random.Random(seed)
+    return [' '.join(rnd.choices(SAMPLE_WORDS, k=rnd.randint(3, 8))) for _ in range(count)]
+
+
+def legacy_view_transliterate(text):
+    """The original ``views.transliterate`` (index lookup + string concat)"""
+    cyrillic = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+    latin = ['a','b','v','g','d','e','yo','zh','z','i','y','k','l','m','n','o','p','r','s','t','u','f','h','ts','ch','sh','sch','','y','','e','yu','ya']
+
+    text = text.lower()
+    result = ''
+    for char in text:
+        if char in cyrillic:
+            result += latin[cyrillic.index(char)]
+        elif char.isalnum():
+            result += char
+        else:
+            result += '-'
+
+    return re.sub(r'-+', '-', result).strip('-')
+
+
+LEGACY_CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
+    'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
+    'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
+    'Ф': 'F', 'Х': 'H', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
+    'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya',
+}
+
+
+def legacy_command_slug(text):
+    """The original ``slugify(transliterate(...))`` used by the import commands"""
+    result = []
+    for char in text:
+        if char in LEGACY_CYRILLIC_TO_LATIN:
+            result.append(LEGACY_CYRILLIC_TO_LATIN[char])
+        else:
+            result.append(char)
+    return slugify(''.join(result))
+
+
+FIXTURES_DIR = Path(__file__).resolve().parents[2] / 'scraping' / 'fixtures'
+
+
+def legacy_chkz_listing(soup):
+    """The original ``scrape_all_products.scrape_chkz`` lookups: ``[(category, [title, ...])]``"""
+    sections = soup.find_all('div', class_='catalog-section') or soup.find_all('section', class_='products')
+    if not sections:
+        sections = soup.find_all('div', class_='product-category')
+    result = []
+    for section in sections:
+        heading = section.find(['h2', 'h3', 'h4'])
+        titles = []
+        for card in section.find_all(['div', 'a'], class_=['product-item', 'product-card', 'catalog-item']):
+            name = card.find(['h3', 'h4', 'h5', 'span', 'a'], class_=['product-title', 'product-name', 'title'])
+            name = name or card.find(['h3', 'h4', 'h5'])
+            desc = card.find(['p', 'div'], class_=['description', 'product-description', 'excerpt'])
+            if name:
+                titles.append((name.get_text(strip=True), desc.get_text(strip=True) if desc else ''))
+        result.append((heading.get_text(strip=True) if heading else None, titles))
+    return result
+
+
+def legacy_ts2006_listing(soup):
+    """The original ``scrape_all_products.scrape_ts2006`` lookups"""
+    titles = []
+    for section in soup.find_all(['div', 'article', 'section'], class_=['product', 'item', 'card']):
+        heading = section.find(['h1', 'h2', 'h3', 'h4'])
+        if heading:
+            parts = [p.get_text(strip=True) for p in section.find_all('p') if len(p.get_text(strip=True)) > 20]
+            titles.append((heading.get_text(strip=True), ' '.join(parts[:3])))
+    return [(None, titles)]
+
+
+def legacy_images(soup):
+    """The original ``scrape_chkz_images.scrape_product_page`` lookups"""
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
+        if src and 'picture.loading' not in src:
+            images.append(src)
+    for picture in soup.find_all('picture'):
+        for source in picture.find_all('source'):
+            srcset = source.get('srcset')
+            if srcset:
+                images.append(srcset.split(',')[0].strip().split(' ')[0])
+    return images
+
+
+def create_catalog(size, categories=25):
+    """Bulk-create a published catalog of ``size`` items for benchmarks"""
+    titles = sample_titles(size)
+    cats = Category.objects.bulk_create(
+        Category(name=f'Категория {n}', slug=f'benchmark-category-{n}', description='Описание категории')
+        for n in range(categories)
+    )
+    items = [
+        Item(
+            title=title,
+            slug=slug,
+            category=cats[n % categories],
+            description='Описание товара. ' * 20,
+            short_description='Краткое описание товара',
+            price=100000 + n,
+            status='published',
+            order=n,
+        )
+        for n, (title, slug) in enumerate(zip(titles, slugs.unique_slugs(Item, titles)))
+    ]
+    # bulk_create skips Item.save()
+    for item in items:
+        item.render_description()
+    Item.objects.bulk_create(items, batch_size=1000)
+    # bulk_create sends no signals
+    bump_catalog_version()
+    return cats
+
+
+class Rollback(Exception):
+    """Raised to discard rows created by a benchmark"""
+
+
+class Command(BaseCommand):
+    help = 'Run performance benchmarks against the current implementation'
+
+    suites = ('slugs', 'templates', 'snapshot', 'search', 'parsers')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'suite',
+            nargs='*',
+            help=f'Benchmarks to run (default: all). Available: {", ".join(self.suites)}',
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=5000,
+            help='Number of titles/items to generate',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Repeat each measurement and keep the best time',
+        )
+
+    def handle(self, *args, **options):
+        suites = options['suite'] or self.suites
+        for suite in suites:
+            if suite not in self.suites:
+                raise CommandError(f'Unknown benchmark: {suite}')
+
+        self.size = options['size']
+        self.repeat = options['repeat']
+
+        for suite in suites:
+            self.stdout.write(self.style.SUCCESS(f'\n[{suite}] size={self.size}'))
+            getattr(self, f'bench_{suite}')()
+
+    def measure(self, label, func, baseline=None):
+        """Time ``func`` (best of ``repeat``) and print it, optionally against a baseline"""
+        best = None
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        line = f'  {label:<40} {best * 1000:10.2f} ms'
+        if baseline:
+            line += f'   x{baseline / best:.1f} faster'
+        self.stdout.write(line)
+        return best
+
+    def run_with_rollback(self, func):
+        """Run ``func`` inside a transaction that is always rolled back"""
+        try:
+            with transaction.atomic():
+                func()
+                raise Rollback
+        except Rollback:
+            pass
+
+    def bench_slugs(self):
+        titles = sample_titles(self.size)
+
+        self.stdout.write('  Transliteration + slugify:')
+        view_time = self.measure('views.transliterate (legacy)', lambda: [legacy_view_transliterate(t) for t in titles])
+        cmd_time = self.measure('slugify(transliterate()) (legacy)', lambda: [legacy_command_slug(t) for t in titles])
+
+        def engine_cold():
+            slugs.slugify_title.cache_clear()
+            slugs.slugify_many(titles)
+
+        self.measure('slugs.slugify_many (cold cache)', engine_cold, baseline=min(view_time, cmd_time))
+        self.measure('slugs.slugify_many (warm cache)', lambda: slugs.slugify_many(titles), baseline=min(view_time, cmd_time))
+
+        # Uniqueness against the database: half of the new titles collide
+        # with rows that already exist.
+        count = min(self.size, 1000)
+        existing = titles[:count]
+        incoming = titles[count // 2:count // 2 + count]
+
+        def setup():
+            category = Category.objects.create(name='Benchmark', slug='benchmark-slugs')
+            Item.objects.bulk_create(
+                Item(title=title, slug=slug, category=category, description='')
+                for title, slug in zip(existing, slugs.unique_slugs(Item, existing))
+            )
+
+        def legacy_unique():
+            taken = set()
+            for title in incoming:
+                slug = legacy_view_transliterate(title)
+                base_slug = slug
+                counter = 1
+                while Item.objects.filter(slug=slug).exists() or slug in taken:
+                    slug = f'{base_slug}-{counter}'
+                    counter += 1
+                taken.add(slug)
+
+        self.stdout.write(f'  Unique slugs for {len(incoming)} titles against {count} rows:')
+
+        def run():
+            setup()
+            legacy = self.measure('exists() loop per title (legacy)', legacy_unique)
+            self.measure('slugs.unique_slugs (batched)', lambda: slugs.unique_slugs(Item, incoming), baseline=legacy)
+
+        self.run_with_rollback(run)
+
+    def bench_templates(self):
+        names = ['index.html', 'product_detail.html']
+
+        cached_engine = Engine.get_default()
+
+        def uncached_load():
+            engine = Engine(
+                dirs=cached_engine.dirs,
+                libraries=cached_engine.libraries,
+                loaders=[
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ],
+            )
+            for name in names:
+                engine.get_template(name)
+
+        self.stdout.write('  Loading + compiling templates:')
+        uncached = self.measure('filesystem loader (no cache)', uncached_load)
+        for name in names:
+            cached_engine.get_template(name)
+        self.measure('cached loader', lambda: [cached_engine.get_template(name) for name in names], baseline=uncached)
+
+        factory = RequestFactory()
+
+        def render_index():
+            response = views.index(factory.get('/'))
+            assert response.status_code == 200
+
+        def render_cold():
+            cache.clear()
+            render_index()
+
+        def run():
+            create_catalog(self.size)
+            self.stdout.write(f'  Rendering index.html with {self.size} items:')
+            cold = self.measure('cold (fragments rendered)', render_cold)
+            render_index()
+            self.measure('warm (fragments from cache)', render_index, baseline=cold)
+
+        self.run_with_rollback(run)
+        cache.clear()
+
+    def bench_snapshot(self):
+        def allocated(func):
+            """Return ``(result, bytes still allocated by it)``"""
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            result = func()
+            after = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return result, after - before
+
+        def run():
+            create_catalog(self.size)
+            published = Item.objects.filter(status='published')
+
+            self.stdout.write(f'  Building a snapshot of {self.size} items:')
+            self.measure('CatalogSnapshot.build', lambda: CatalogSnapshot.build(0))
+
+            snapshot, snapshot_bytes = allocated(lambda: CatalogSnapshot.build(0))
+            instances, instance_bytes = allocated(lambda: list(published.select_related('category')))
+            self.stdout.write('  Memory:')
+            for label, size in (('snapshot', snapshot_bytes), ('model instances (for comparison)', instance_bytes)):
+                self.stdout.write(
+                    f'  {label:<40} {size / 2 ** 20:10.2f} MB   {size / self.size:.0f} B/item'
+                )
+
+            sample = [item.slug for item in instances[::max(1, len(instances) // 1000)]]
+            self.stdout.write(f'  Looking up {len(sample)} product pages:')
+            queries = self.measure(
+                'published.get(slug=...) per page',
+                lambda: [published.select_related('category').get(slug=slug) for slug in sample],
+            )
+            self.measure(
+                'snapshot.items_by_slug + related',
+                lambda: [snapshot.related(snapshot.items_by_slug[slug]) for slug in sample],
+                baseline=queries,
+            )
+
+        self.run_with_rollback(run)
+        cache.clear()
+
+    def bench_search(self):
+        def run():
+            create_catalog(self.size)
+            snapshot = CatalogSnapshot.build(0)
+
+            self.stdout.write(f'  Prefix index over {self.size} items:')
+            self.measure('PrefixIndex.from_snapshot', lambda: PrefixIndex.from_snapshot(snapshot))
+            index = PrefixIndex.from_snapshot(snapshot)
+            self.stdout.write(f'  {"keys":<40} {len(index.keys):10d}')
+
+            queries = ['к', 'ком', 'компрессор винт', 'den', 'дэн стандарт', 'осушитель', 'нет такого']
+            self.stdout.write(f'  {len(queries)} queries x 100:')
+            self.measure('index.search', lambda: [index.search(query, 8) for query in queries for _ in range(100)])
+
+        self.run_with_rollback(run)
+        cache.clear()
+
+    def bench_parsers(self):
+        chkz, ts2006 = SITES['chkz'], SITES['ts2006']
+        # fixture, legacy extraction, strainer limited to the subtrees it reads, extractor
+        cases = [
+            (
+                'chkz_catalog.html', legacy_chkz_listing,
+                SoupStrainer(['div', 'section'], class_=['catalog-section', 'products', 'product-category']),
+                chkz.listing,
+            ),
+            (
+                'ts2006_index.html', legacy_ts2006_listing,
+                SoupStrainer(['div', 'article', 'section'], class_=['product', 'item', 'card']),
+                ts2006.listing,
+            ),
+            (
+                'chkz_product.html', legacy_images,
+                SoupStrainer(['img', 'picture']),
+                chkz.images,
+            ),
+        ]
+        rounds = max(1, self.size // 250)
+
+        for name, legacy, strainer, extract in cases:
+            content = (FIXTURES_DIR / name).read_bytes()
+            self.stdout.write(f'  {name} ({len(content) // 1024} KB) x {rounds}:')
+
+            legacy_time = self.measure(
+                'BeautifulSoup html.parser (legacy)',
+                lambda: [legacy(BeautifulSoup(content, 'html.parser')) for _ in range(rounds)],
+            )
+            self.measure(
+                'BeautifulSoup lxml + SoupStrainer',
+                lambda: [legacy(BeautifulSoup(content, 'lxml', parse_only=strainer)) for _ in range(rounds)],
+                baseline=legacy_time,
+            )
+            self.measure(
+                'lxml + compiled XPath rules',
+                lambda: [extract(content) for _ in range(rounds)],
+                baseline=legacy_time,
+            )
+
+            found, expected = extract(content), legacy(BeautifulSoup(content, 'html.parser'))
+            if name.endswith('product.html'):
+                found, expected = len(found), len(expected)
+            else:
+                found = sum(len(cards) for _, cards in found)
+                expected = sum(len(cards) for _, cards in expected)
+            self.stdout.write(f'  {"found (extractor / legacy)":<40} {found:>10} / {expected}')
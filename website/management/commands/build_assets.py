@@ -0,0 +1,83 @@
+import gzip
+import json
+import sys
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from website.assets import extract_critical_css, make_placeholder, minify_css, minify_js
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+STATIC_SOURCE = Path(settings.BASE_DIR) / 'website' / 'static'
+DIST_DIR = 'dist'
+
+
+class Command(BaseCommand):
+    help = 'Minify and bundle CSS/JS, extract critical CSS and generate placeholders (run before collectstatic)'
+
+    def handle(self, *args, **options):
+        dist = STATIC_SOURCE / DIST_DIR
+        (dist / 'placeholders').mkdir(parents=True, exist_ok=True)
+
+        self.stdout.write(self.style.SUCCESS('Building static assets...'))
+
+        manifest = {'bundles': {}, 'critical': None, 'placeholders': {}}
+
+        for bundle, sources in settings.ASSET_BUNDLES.items():
+            contents = []
+            for source in sources:
+                path = STATIC_SOURCE / source
+                if not path.exists():
+                    raise CommandError(f'Missing asset source: {source}')
+                contents.append(path.read_text(encoding='utf-8'))
+
+            if bundle.endswith('.css'):
+                output = '\n'.join(minify_css(content) for content in contents)
+            elif bundle.endswith('.js'):
+                output = ';\n'.join(minify_js(content) for content in contents)
+            else:
+                raise CommandError(f'Unsupported bundle type: {bundle}')
+
+            target = f'{DIST_DIR}/{bundle}'
+            (STATIC_SOURCE / target).parent.mkdir(parents=True, exist_ok=True)
+            (STATIC_SOURCE / target).write_text(output, encoding='utf-8')
+            for source in sources:
+                manifest['bundles'][source] = target
+
+            self.report(target, sum(len(content.encode()) for content in contents), output.encode())
+
+            if bundle.endswith('.css'):
+                critical = extract_critical_css('\n'.join(contents), settings.CRITICAL_CSS_SELECTORS)
+                critical_target = f'{DIST_DIR}/critical.css'
+                (STATIC_SOURCE / critical_target).write_text(critical, encoding='utf-8')
+                manifest['critical'] = critical_target
+                self.stdout.write(f'[+] {critical_target}: {len(critical.encode())} B inlined')
+
+        for width, height in settings.PLACEHOLDER_SIZES:
+            size = f'{width}x{height}'
+            target = f'{DIST_DIR}/placeholders/{size}.png'
+            (STATIC_SOURCE / target).write_bytes(make_placeholder(width, height))
+            manifest['placeholders'][size] = target
+            self.stdout.write(f'[+] {target}')
+
+        (dist / 'manifest.json').write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+
+        self.stdout.write(self.style.SUCCESS('\n[SUCCESS] Assets built!'))
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('Brotli is not installed: WhiteNoise will only emit gzip variants'))
+        self.stdout.write('Run "python manage.py collectstatic" to publish them with compressed variants.')
+
+    def report(self, target, source_size, output):
+        """Print raw, minified and compressed sizes of a bundle"""
+        line = f'[+] {target}: {source_size} B -> {len(output)} B, gzip {len(gzip.compress(output, 9))} B'
+        if brotli is not None:
+            line += f', brotli {len(brotli.compress(output))} B'
+        self.stdout.write(line)
@@ -0,0 +1,237 @@
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.urls import reverse
+from website.catalog import encode_cursor
+from website.snapshot import CatalogSnapshot
+from website.static_site import fingerprint, hash_tree, init_worker, remove_file, render_page
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+MANIFEST_NAME = '.manifest.json'
+
+
+def site_version():
+    """
+    Hash of everything that affects every page: templates, static sources
+    and the page-size settings. Any change re-renders the whole site.
+    """
+    base = Path(settings.BASE_DIR) / 'website'
+    return fingerprint(
+        hash_tree(base / 'templates', base / 'templatetags', base / 'static'),
+        settings.HOME_ITEMS_PER_CATEGORY,
+        settings.CATEGORY_PAGE_SIZE,
+    )
+
+
+def media_fields(media):
+    if not media:
+        return None
+    return (media.name, media.width, media.height)
+
+
+def category_fields(category):
+    return (category.id, category.slug, category.name, category.description)
+
+
+def item_fields(item):
+    """
+    Field values a card or a product page renders. Records are hashed
+    through these tuples: their own repr includes a memory address.
+    """
+    return (
+        item.id, item.slug, item.title, item.category_id, item.description_html, item.excerpt,
+        item.short_description, item.price, media_fields(item.main_image), item.updated_at,
+    )
+
+
+def image_fields(image):
+    return (image.id, media_fields(image.image), image.caption)
+
+
+def plan_pages():
+    """
+    Return ``{url: fingerprint}`` for every public page, computed from a
+    fresh catalog snapshot. A page's fingerprint covers the rows it
+    renders: its item and images, related items, the categories in the
+    navigation and the site version.
+    """
+    per_category = settings.HOME_ITEMS_PER_CATEGORY
+    page_size = settings.CATEGORY_PAGE_SIZE
+
+    snapshot = CatalogSnapshot.build(version=None)
+    categories = sorted(snapshot.categories, key=lambda category: category.id)
+    common = fingerprint(site_version(), [category_fields(category) for category in categories])
+
+    def rows(page):
+        return [item_fields(item) for item in page]
+
+    pages = {}
+    pages[reverse('index')] = fingerprint(common, [
+        (category.id, rows(snapshot.category_items(category.id)[:per_category + 1]))
+        for category in categories
+        if snapshot.category_items(category.id)
+    ])
+    pages[reverse('sitemap')] = fingerprint(common, rows(sorted(snapshot.items_by_id.values(), key=lambda item: item.id)))
+
+    for item in snapshot.items_by_slug.values():
+        pages[reverse('product_detail', args=[item.slug])] = fingerprint(
+            common, item_fields(item), [image_fields(image) for image in item.images], rows(snapshot.related(item)),
+        )
+
+    # Pages of cards script.js loads on scroll, following the cursor chain
+    for category in categories:
+        category_items = snapshot.category_items(category.id)
+        start = per_category
+        while start < len(category_items):
+            cursor = encode_cursor(category_items[start - 1])
+            page = category_items[start:start + page_size + 1]
+            pages[reverse('category_items', args=[category.slug, cursor])] = fingerprint(common, rows(page))
+            start += page_size
+
+    return pages
+
+
+def sync_tree(source, target):
+    """Copy new or changed files from ``source`` into ``target``; returns the count"""
+    source = Path(source)
+    copied = 0
+    for path in source.rglob('*'):
+        if not path.is_file():
+            continue
+        destination = Path(target) / path.relative_to(source)
+        stat = path.stat()
+        if destination.exists():
+            existing = destination.stat()
+            if existing.st_size == stat.st_size and existing.st_mtime >= stat.st_mtime:
+                continue
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(path, destination)
+        copied += 1
+    return copied
+
+
+class Command(BaseCommand):
+    help = 'Render the public catalog to static files, re-rendering only pages whose content changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            default=str(Path(settings.BASE_DIR) / 'static_site'),
+            help='Directory to write the site to',
+        )
+        parser.add_argument(
+            '--base-url',
+            default=f'https://{settings.ALLOWED_HOSTS[0]}',
+            help='Public URL of the site, used for absolute links in the sitemap',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Rendering processes',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-render every page, ignoring the manifest',
+        )
+        parser.add_argument(
+            '--skip-files',
+            action='store_true',
+            help='Do not copy collected static files and media into the output',
+        )
+
+    def handle(self, *args, **options):
+        output = Path(options['output'])
+        base_url = urlsplit(options['base_url'])
+        if not base_url.netloc:
+            raise CommandError(f'Invalid --base-url: {options["base_url"]}')
+
+        output.mkdir(parents=True, exist_ok=True)
+        manifest_path = output / MANIFEST_NAME
+        manifest = {}
+        if manifest_path.exists() and not options['force']:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        if manifest.get('base_url') != options['base_url']:
+            manifest = {}
+        built = manifest.get('pages', {})
+
+        self.stdout.write(self.style.SUCCESS('Building static site...'))
+        start = time.perf_counter()
+
+        pages = plan_pages()
+        dirty = [
+            url for url, page_hash in pages.items()
+            if url not in built
+            or built[url]['hash'] != page_hash
+            or not (output / built[url]['path']).exists()
+        ]
+        self.stdout.write(f'Pages: {len(pages)}, to render: {len(dirty)}')
+
+        errors = 0
+        if dirty:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            workers = max(1, min(options['workers'], len(dirty)))
+            chunksize = max(1, len(dirty) // (workers * 4))
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker,
+                initargs=(str(output), base_url.netloc, base_url.scheme == 'https'),
+            ) as pool:
+                for url, relative, status in pool.map(render_page, dirty, chunksize=chunksize):
+                    if relative is None:
+                        errors += 1
+                        built.pop(url, None)
+                        self.stdout.write(self.style.ERROR(f'[!] {url}: HTTP {status}'))
+                        continue
+                    built[url] = {'hash': pages[url], 'path': relative}
+
+        removed = 0
+        for url in [url for url in built if url not in pages]:
+            remove_file(output, built.pop(url)['path'])
+            removed += 1
+            self.stdout.write(f'[-] {url}')
+
+        if not options['skip_files']:
+            self.sync_files(output)
+
+        manifest = {'base_url': options['base_url'], 'pages': built}
+        manifest_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'\n[SUCCESS] Rendered {len(dirty) - errors}, removed {removed}, '
+            f'unchanged {len(pages) - len(dirty)} pages in {elapsed:.1f}s'
+        ))
+        if errors:
+            self.stdout.write(self.style.WARNING(f'{errors} pages failed and will be retried on the next run'))
+        self.stdout.write(f'Output: {output}')
+
+    def sync_files(self, output):
+        """Copy collected static files and uploaded media next to the pages"""
+        static_root = Path(settings.STATIC_ROOT)
+        if static_root.exists():
+            copied = sync_tree(static_root, output / settings.STATIC_URL.strip('/'))
+            self.stdout.write(f'[+] Static files: {copied} copied')
+        else:
+            self.stdout.write(self.style.WARNING(
+                '[!] STATIC_ROOT is missing: run "python manage.py collectstatic" first'
+            ))
+
+        media_root = Path(settings.MEDIA_ROOT)
+        if media_root.exists():
+            copied = sync_tree(media_root, output / settings.MEDIA_URL.strip('/'))
+            self.stdout.write(f'[+] Media files: {copied} copied')
@@ -0,0 +1,24 @@
+import sys
+import time
+from django.core.management.base import BaseCommand
+from website.changes import compact
+from website.models import Change
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Drop change-log rows superseded by a newer change to the same object'
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        self.stdout.write(self.style.SUCCESS('Compacting the change log...'))
+
+        before = Change.objects.count()
+        deleted = compact()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'[+] {before} rows before, {before - deleted} after')
+        self.stdout.write(self.style.SUCCESS(f'\n[SUCCESS] {deleted} rows removed in {elapsed:.1f}s'))
@@ -0,0 +1,140 @@
+import sys
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from website.bulk import catalog_changed
+from website.models import Item, RelatedItem
+from website.purge import item_key
+from website.related import MIN_SCORE, affected_rows, document_terms, nearest_neighbours, tfidf_matrix
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Compute related products from title/description similarity (TF-IDF)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=6,
+            help='Related items stored per product',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=256,
+            help='Products compared against the catalog per matrix product',
+        )
+        parser.add_argument(
+            '--max-features',
+            type=int,
+            default=4096,
+            help='Vocabulary size',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every product instead of only those affected by changes',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        top = options['top']
+        batch_size = options['batch_size']
+
+        self.stdout.write(self.style.SUCCESS('Computing related products...'))
+
+        # Taken before reading: an item saved during the run is redone next time
+        now = timezone.now()
+        rows = list(
+            Item.objects.filter(status='published')
+            .order_by('id')
+            .values_list('id', 'title', 'description', 'updated_at', 'related_computed_at')
+        )
+        ids = [row[0] for row in rows]
+        position = {item_id: row for row, item_id in enumerate(ids)}
+
+        matrix = tfidf_matrix(
+            [document_terms(title, description) for _, title, description, _, _ in rows],
+            options['max_features'],
+        )
+        self.stdout.write(f'[+] {len(ids)} products, {matrix.shape[1]} terms')
+
+        existing = {}
+        for item_id, related_id, score in RelatedItem.objects.values_list('item_id', 'related_id', 'score'):
+            existing.setdefault(item_id, []).append((related_id, score))
+
+        stale = set(existing) - set(position)
+        dirty = self.dirty_rows(options['full'], rows, position, existing, matrix, top, batch_size)
+        self.stdout.write(f'[+] {len(dirty)} products to recompute')
+
+        written = 0
+        dirty = sorted(dirty)
+        for chunk_start in range(0, len(dirty), batch_size):
+            chunk = dirty[chunk_start:chunk_start + batch_size]
+            links = [
+                RelatedItem(
+                    item_id=ids[row],
+                    related_id=ids[other],
+                    rank=rank,
+                    score=score,
+                    computed_at=now,
+                )
+                for row, neighbours in nearest_neighbours(matrix, chunk, top, batch_size)
+                for rank, (other, score) in enumerate(neighbours)
+            ]
+            chunk_ids = [ids[row] for row in chunk]
+            with transaction.atomic():
+                RelatedItem.objects.filter(item_id__in=chunk_ids).delete()
+                RelatedItem.objects.bulk_create(links)
+                # Also marks items with no neighbours, so they aren't redone every run
+                Item.objects.filter(id__in=chunk_ids).update(related_computed_at=now)
+            written += len(links)
+            self.stdout.write(f'[+] {chunk_start + len(chunk)}/{len(dirty)}')
+
+        if stale:
+            # Products that were unpublished or deleted
+            RelatedItem.objects.filter(item_id__in=stale).delete()
+
+        if dirty or stale:
+            # bulk_create sends no signals; related items show on product pages only
+            catalog_changed({item_key(ids[row]) for row in dirty} | {item_key(item_id) for item_id in stale})
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'\n[SUCCESS] {len(dirty)} products recomputed, {written} links written in {elapsed:.1f}s'
+        ))
+
+    def dirty_rows(self, full, rows, position, existing, matrix, top, batch_size):
+        """Rows whose neighbour lists must be recomputed"""
+        if full:
+            return set(range(len(rows)))
+
+        changed = {
+            row for row, (_, _, _, updated_at, computed_at) in enumerate(rows)
+            if computed_at is None or updated_at > computed_at
+        }
+        if len(changed) == len(rows):
+            return changed
+        changed_ids = {rows[row][0] for row in changed}
+
+        dirty = set(changed)
+        thresholds = np.full(len(rows), MIN_SCORE, dtype=np.float32)
+        for item_id, neighbours in existing.items():
+            row = position.get(item_id)
+            if row is None:
+                continue
+            # A list that points at a changed or removed product is stale
+            if any(related_id in changed_ids or related_id not in position for related_id, _ in neighbours):
+                dirty.add(row)
+            elif len(neighbours) >= top:
+                thresholds[row] = min(score for _, score in neighbours)
+
+        if changed:
+            dirty |= affected_rows(matrix, changed, thresholds, batch_size)
+        return dirty
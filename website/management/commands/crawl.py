@@ -0,0 +1,142 @@
+import sys
+from datetime import timedelta
+from functools import partial
+from django.core.management.base import BaseCommand
+from website.models import CrawlURL
+from website.scraping.frontier import Frontier
+from website.scraping.pipeline import Pipeline
+from website.scraping.sites import SITES
+from website.scraping.store import save_products
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+# Frontier name suffix of dry runs, deleted when they end
+DRY_RUN_SUFFIX = ':dry-run'
+
+
+class Command(BaseCommand):
+    help = 'Crawl a supplier site from its persistent frontier; resumes where the last run stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'site',
+            choices=sorted(SITES),
+            help='Site to crawl',
+        )
+        parser.add_argument(
+            '--max-pages',
+            type=int,
+            default=500,
+            help='Pages to fetch in this run',
+        )
+        parser.add_argument(
+            '--max-depth',
+            type=int,
+            default=4,
+            help='Links followed from the seed pages',
+        )
+        parser.add_argument(
+            '--delay',
+            type=float,
+            default=1.0,
+            help='Seconds between requests to the same host',
+        )
+        parser.add_argument(
+            '--recrawl-after',
+            type=float,
+            default=None,
+            help='Fetch again pages fetched more than this many days ago',
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Forget the frontier of this site and start from the seeds',
+        )
+        parser.add_argument(
+            '--fetchers',
+            type=int,
+            default=4,
+            help='Download threads',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Parser processes (default: one per CPU)',
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=32,
+            help='Pages each stage may hold before the previous one waits',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Pages written to the database per transaction',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Crawl from the seeds into a throwaway frontier, without saving products',
+        )
+
+    def handle(self, *args, **options):
+        site = SITES[options['site']]
+        dry_run = options['dry_run']
+        # A dry run must not mark pages done (or store their hashes) in the
+        # real frontier: the next real crawl would skip them
+        crawl = f'{site.name}{DRY_RUN_SUFFIX}' if dry_run else site.name
+
+        if options['reset'] or dry_run:
+            deleted, _ = CrawlURL.objects.filter(crawl=crawl).delete()
+            if deleted and not dry_run:
+                self.stdout.write(self.style.WARNING(f'Frontier cleared: {deleted} URLs'))
+
+        recrawl_after = options['recrawl_after']
+        # The pipeline checkpoints together with each batch of writes
+        frontier = Frontier(
+            crawl, max_depth=options['max_depth'], delay=options['delay'], checkpoint_every=None,
+        ).open(
+            recrawl_after=timedelta(days=recrawl_after) if recrawl_after is not None else None,
+        )
+        frontier.add(site.seeds, depth=0, priority=site.priority)
+
+        counts = frontier.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Crawling {site.name}: {counts["pending"]} pending, {counts["done"]} done'
+        ))
+
+        pipeline = Pipeline(
+            site, frontier,
+            save=None if dry_run else partial(save_products, source=f'crawl:{site.name}'),
+            fetchers=options['fetchers'],
+            workers=options['workers'],
+            queue_size=options['queue_size'],
+            batch_size=options['batch_size'],
+            max_pages=options['max_pages'],
+            log=self.stdout.write,
+        )
+        try:
+            pipeline.run()
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('\nInterrupted' if dry_run else '\nInterrupted, progress saved'))
+
+        counts = frontier.stats()
+        if dry_run:
+            CrawlURL.objects.filter(crawl=crawl).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'\n[SUCCESS] Fetched {pipeline.counts["pages"]} pages, {pipeline.counts["products"]} products, '
+            f'{pipeline.counts["unchanged"]} unchanged'
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            f'Frontier: {counts["pending"]} pending, {counts["done"]} done, '
+            f'{counts["failed"]} failed, {counts["skipped"]} skipped'
+        ))
+        self.stdout.write('\nPipeline:')
+        for line in pipeline.report():
+            self.stdout.write(line)
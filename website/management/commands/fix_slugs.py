@@ -1,71 +1,170 @@
+import json
+import re
 import sys
+from pathlib import Path
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.utils.text import slugify
-from website.models import Category, Item
+from django.db import transaction
+from django.utils import timezone
+from website import changes
+from website.bulk import catalog_changed, purge_keys
+from website.middleware import clear_redirect_map
+from website.models import Category, Item, SlugRedirect
+from website.purge import CATALOG_KEY, category_key
+from website.slugs import slugify_title
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-# Transliteration map for Cyrillic to Latin
-CYRILLIC_TO_LATIN = {
-    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
-    'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
-    'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
-    'Ф': 'F', 'Х': 'H', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
-    'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya',
-}
-
-
-def transliterate(text):
-    """Transliterate Cyrillic to Latin characters"""
-    result = []
-    for char in text:
-        if char in CYRILLIC_TO_LATIN:
-            result.append(CYRILLIC_TO_LATIN[char])
-        else:
-            result.append(char)
-    return ''.join(result)
+# (redirect kind, model, field the slug is built from)
+TARGETS = [
+    ('category', Category, 'name'),
+    ('item', Item, 'title'),
+]
+
+
+def plan_slugs(model, title_field):
+    """
+    Compute the new slug for every row of ``model`` in memory.
+
+    Rows whose slug already is ``<base>`` or ``<base>-<n>`` keep it. Every
+    other row gets the first free candidate, where "free" excludes all
+    slugs currently in the table. Because a new slug never equals any
+    existing one, chunks can be written in any order without tripping the
+    unique constraint, and a rerun plans the same result.
+
+    Returns a list of ``(pk, old_slug, new_slug)`` sorted by pk.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    fallback = model._meta.model_name
+    rows = list(model.objects.order_by('pk').values_list('pk', title_field, 'slug'))
+
+    reserved = {slug for _, _, slug in rows}
+    changes = []
+    for pk, title, slug in rows:
+        base = slugify_title(title, max_length) or fallback
+        if re.fullmatch(r'%s(-[0-9]+)?' % re.escape(base), slug):
+            continue
+
+        candidate = base
+        counter = 1
+        while candidate in reserved:
+            suffix = f'-{counter}'
+            candidate = f'{base[:max_length - len(suffix)].rstrip("-")}{suffix}'
+            counter += 1
+        reserved.add(candidate)
+        changes.append((pk, slug, candidate))
+    return changes
 
 
 class Command(BaseCommand):
     help = 'Fix slugs to use Latin characters instead of Cyrillic'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show planned changes without writing them',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Rows written per transaction',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=str(Path(settings.BASE_DIR) / '.fix_slugs_checkpoint.json'),
+            help='File used to record progress between runs',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore an existing checkpoint and start from the beginning',
+        )
+
     def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        checkpoint_path = Path(options['checkpoint'])
+
+        checkpoint = {}
+        if checkpoint_path.exists() and not options['restart']:
+            checkpoint = json.loads(checkpoint_path.read_text(encoding='utf-8'))
+            self.stdout.write(self.style.WARNING(f'Resuming from checkpoint: {checkpoint}'))
+
         self.stdout.write(self.style.SUCCESS('Fixing slugs...'))
 
-        # Fix category slugs
-        categories = Category.objects.all()
-        for category in categories:
-            old_slug = category.slug
-            transliterated = transliterate(category.name)
-            new_slug = slugify(transliterated)
-
-            if old_slug != new_slug:
-                category.slug = new_slug
-                category.save()
-                self.stdout.write(f'[+] Updated category: {category.name}')
-                self.stdout.write(f'    Old slug: {old_slug} -> New slug: {new_slug}')
-
-        # Fix item slugs
-        items = Item.objects.all()
-        for item in items:
-            old_slug = item.slug
-            transliterated = transliterate(item.title)
-            new_slug = slugify(transliterated)
-
-            if old_slug != new_slug:
-                item.slug = new_slug
-                item.save()
-                self.stdout.write(f'[+] Updated item: {item.title}')
-                self.stdout.write(f'    Old slug: {old_slug} -> New slug: {new_slug}')
+        totals = {}
+        for kind, model, title_field in TARGETS:
+            last_pk = checkpoint.get(kind, 0)
+            changes = [change for change in plan_slugs(model, title_field) if change[0] > last_pk]
+            totals[kind] = len(changes)
+
+            self.stdout.write(f'\n[{kind}] {len(changes)} slugs to update')
+
+            for start in range(0, len(changes), batch_size):
+                chunk = changes[start:start + batch_size]
+
+                for pk, old_slug, new_slug in chunk:
+                    self.stdout.write(f'    {old_slug} -> {new_slug}')
+
+                if dry_run:
+                    continue
+
+                self.write_chunk(kind, model, chunk)
+
+                checkpoint[kind] = chunk[-1][0]
+                checkpoint_path.write_text(json.dumps(checkpoint), encoding='utf-8')
+                self.stdout.write(f'[+] Saved {start + len(chunk)}/{len(changes)}')
+
+        if not dry_run:
+            checkpoint_path.unlink(missing_ok=True)
+            clear_redirect_map()
 
         self.stdout.write(self.style.SUCCESS('\n[SUCCESS] Slugs fixed!'))
-        self.stdout.write(self.style.SUCCESS(f'Categories updated: {categories.count()}'))
-        self.stdout.write(self.style.SUCCESS(f'Items updated: {items.count()}'))
+        self.stdout.write(self.style.SUCCESS(f'Categories updated: {totals["category"]}'))
+        self.stdout.write(self.style.SUCCESS(f'Items updated: {totals["item"]}'))
+
+    def write_chunk(self, kind, model, chunk):
+        """Update one chunk of slugs and record their redirects atomically"""
+        fields = ['slug']
+        objs = [model(pk=pk, slug=new_slug) for pk, _, new_slug in chunk]
+
+        # Slug changes must look like content changes to anything keyed on
+        # updated_at (e.g. cached product cards).
+        if any(field.name == 'updated_at' for field in model._meta.fields):
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields.append('updated_at')
+
+        # Pages linking to the rows: product pages, category cards, the
+        # home page and the sitemap
+        if model is Item:
+            keys = purge_keys(Item.objects.filter(pk__in=[obj.pk for obj in objs]), [CATALOG_KEY])
+        else:
+            keys = {CATALOG_KEY, *(category_key(obj.pk) for obj in objs)}
+
+        with transaction.atomic():
+            model.objects.bulk_update(objs, fields)
+            changes.record(model, [obj.pk for obj in objs])
+            # bulk_update sends no signals; per chunk, so an interrupted
+            # run has invalidated what it wrote
+            catalog_changed(keys)
+
+            # A new slug that used to be redirected elsewhere is live again
+            SlugRedirect.objects.filter(
+                kind=kind, old_slug__in=[new_slug for _, _, new_slug in chunk]
+            ).delete()
+            SlugRedirect.objects.bulk_create(
+                [
+                    SlugRedirect(kind=kind, old_slug=old_slug, new_slug=new_slug)
+                    for _, old_slug, new_slug in chunk
+                ],
+                update_conflicts=True,
+                unique_fields=['kind', 'old_slug'],
+                update_fields=['new_slug'],
+            )
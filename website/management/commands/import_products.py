@@ -5,39 +5,14 @@ from bs4 import BeautifulSoup
 from django.core.management.base import BaseCommand
 from django.core.files import File
 from django.core.files.temp import NamedTemporaryFile
-from django.utils.text import slugify
 from website.models import Category, Item, ItemImage
+from website.sync import sync_catalog
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-# Transliteration map for Cyrillic to Latin
-CYRILLIC_TO_LATIN = {
-    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
-    'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
-    'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
-    'Ф': 'F', 'Х': 'H', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
-    'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya',
-}
-
-
-def transliterate(text):
-    """Transliterate Cyrillic to Latin characters"""
-    result = []
-    for char in text:
-        if char in CYRILLIC_TO_LATIN:
-            result.append(CYRILLIC_TO_LATIN[char])
-        else:
-            result.append(char)
-    return ''.join(result)
-
 
 class Command(BaseCommand):
     help = 'Import products from chkz.kz website'
@@ -48,6 +23,16 @@ class Command(BaseCommand):
             action='store_true',
             help='Run without saving to database',
         )
+        parser.add_argument(
+            '--archive-missing',
+            action='store_true',
+            help='Archive previously imported products that are no longer in the list',
+        )
+        parser.add_argument(
+            '--take-over',
+            action='store_true',
+            help='Update products another import owns instead of reporting them as conflicts',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
@@ -169,43 +154,32 @@ class Command(BaseCommand):
             ],
         }
 
-        # Import products
-        for category_name, products in products_data.items():
-            if not dry_run:
-                category, created = Category.objects.get_or_create(
-                    name=category_name,
-                    defaults={
-                        'slug': slugify(transliterate(category_name)),
-                        'description': f'Категория {category_name}'
-                    }
-                )
-                if created:
-                    self.stdout.write(self.style.SUCCESS(f'[+] Created category: {category_name}'))
-            else:
-                self.stdout.write(f'[DRY RUN] Would create category: {category_name}')
-
-            for idx, product in enumerate(products, 1):
-                product_name = product['name']
-
-                if not dry_run:
-                    item, created = Item.objects.get_or_create(
-                        title=product_name,
-                        defaults={
-                            'slug': slugify(transliterate(product_name)),
-                            'category': category,
-                            'description': product['description'],
-                            'short_description': product['short_desc'],
-                            'status': 'published',
-                            'order': idx,
-                        }
-                    )
+        # Import products: only new and changed rows are written
+        records = [
+            {
+                'title': product['name'],
+                'category': category_name,
+                'description': product['description'],
+                'short_description': product['short_desc'],
+            }
+            for category_name, products in products_data.items()
+            for product in products
+        ]
+        result = sync_catalog(
+            records, 'import_products', archive_missing=options['archive_missing'],
+            take_over=options['take_over'], dry_run=dry_run,
+        )
 
-                    if created:
-                        self.stdout.write(f'  [+] Created product: {product_name}')
-                    else:
-                        self.stdout.write(f'  [-] Product already exists: {product_name}')
-                else:
-                    self.stdout.write(f'[DRY RUN] Would create product: {product_name}')
+        for line in result.lines():
+            self.stdout.write(line)
+        prefix = '[DRY RUN] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(f'\n{prefix}{result.summary()}'))
+        if result.archived:
+            self.stdout.write(self.style.SUCCESS(f'Archived missing products: {result.archived}'))
+        elif result.missing and not dry_run:
+            self.stdout.write(self.style.WARNING('Missing products are kept; use --archive-missing to archive them'))
+        if result.conflicts:
+            self.stdout.write(self.style.WARNING('Products owned by another import are kept; use --take-over to update them'))
 
         self.stdout.write(self.style.SUCCESS('\n[SUCCESS] Product import completed!'))
 
@@ -0,0 +1,64 @@
+import sys
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Run a local stand-in for the CDN purge endpoint (set CACHE_PURGE_URL to it)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='Interface to bind')
+        parser.add_argument('--port', type=int, default=8090, help='Port to listen on')
+        parser.add_argument(
+            '--fail-every',
+            type=int,
+            default=0,
+            help='Answer every Nth request with HTTP 503 to exercise retries',
+        )
+
+    def handle(self, *args, **options):
+        command = self
+        header = settings.SURROGATE_KEY_HEADER
+        fail_every = options['fail_every']
+        stats = Counter()
+
+        class PurgeHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                stats['requests'] += 1
+                if fail_every and stats['requests'] % fail_every == 0:
+                    self.send_response(503)
+                    self.end_headers()
+                    command.stdout.write(command.style.WARNING('[!] Simulated failure (503)'))
+                    return
+
+                keys = self.headers.get(header, '').split()
+                stats['keys'] += len(keys)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(b'{"status": "ok"}')
+                command.stdout.write(f'[+] Purged {len(keys)} keys: {" ".join(keys)}')
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options['host'], options['port']), PurgeHandler)
+        url = f'http://{options["host"]}:{options["port"]}/purge'
+        self.stdout.write(self.style.SUCCESS(f'Purge server listening on {url}'))
+        self.stdout.write(f'Set CACHE_PURGE_URL = "{url}" to send purges here. Ctrl+C to stop.')
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(self.style.SUCCESS(
+                f'\n[SUCCESS] {stats["requests"]} requests, {stats["keys"]} keys purged'
+            ))
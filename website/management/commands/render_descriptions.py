@@ -0,0 +1,72 @@
+import sys
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from website import changes
+from website.bulk import catalog_changed
+from website.models import Item
+from website.purge import CATALOG_KEY, category_key, item_key
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Render description_html and excerpt for existing items in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Items rendered and written per transaction',
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Re-render every item, not only those without description_html',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        items = Item.objects.order_by('pk').only('pk', 'category_id', 'description')
+        if not options['all']:
+            items = items.filter(description_html='').exclude(description='')
+
+        total = items.count()
+        self.stdout.write(self.style.SUCCESS(f'Rendering descriptions for {total} items...'))
+
+        done = 0
+        last_pk = 0
+        keys = {CATALOG_KEY}
+        while True:
+            # Keyset pagination: rows already written no longer match the
+            # filter, so offsets would skip items
+            chunk = list(items.filter(pk__gt=last_pk)[:batch_size])
+            if not chunk:
+                break
+
+            now = timezone.now()
+            for item in chunk:
+                item.render_description()
+                # Cached product cards are keyed on updated_at
+                item.updated_at = now
+                keys.add(item_key(item.pk))
+                if item.category_id:
+                    keys.add(category_key(item.category_id))
+
+            with transaction.atomic():
+                Item.objects.bulk_update(chunk, ['description_html', 'excerpt', 'updated_at'])
+                # Partners' change feeds show the new description
+                changes.record(Item, [item.pk for item in chunk])
+
+            last_pk = chunk[-1].pk
+            done += len(chunk)
+            self.stdout.write(f'[+] Rendered {done}/{total}')
+
+        if done:
+            # bulk_update sends no signals
+            catalog_changed(keys)
+
+        self.stdout.write(self.style.SUCCESS(f'\n[SUCCESS] {done} descriptions rendered!'))
@@ -4,39 +4,14 @@ import time
 import requests
 from bs4 import BeautifulSoup
 from django.core.management.base import BaseCommand
-from django.utils.text import slugify
 from website.models import Category, Item
+from website.sync import sync_catalog
 
 # Fix encoding for Windows console
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
 
-# Transliteration map for Cyrillic to Latin
-CYRILLIC_TO_LATIN = {
-    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
-    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
-    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
-    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
-    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
-    'А': 'A', 'Б': 'B', 'В': 'V', 'Г': 'G', 'Д': 'D', 'Е': 'E', 'Ё': 'Yo',
-    'Ж': 'Zh', 'З': 'Z', 'И': 'I', 'Й': 'Y', 'К': 'K', 'Л': 'L', 'М': 'M',
-    'Н': 'N', 'О': 'O', 'П': 'P', 'Р': 'R', 'С': 'S', 'Т': 'T', 'У': 'U',
-    'Ф': 'F', 'Х': 'H', 'Ц': 'Ts', 'Ч': 'Ch', 'Ш': 'Sh', 'Щ': 'Sch',
-    'Ъ': '', 'Ы': 'Y', 'Ь': '', 'Э': 'E', 'Ю': 'Yu', 'Я': 'Ya',
-}
-
-
-def transliterate(text):
-    """Transliterate Cyrillic to Latin characters"""
-    result = []
-    for char in text:
-        if char in CYRILLIC_TO_LATIN:
-            result.append(CYRILLIC_TO_LATIN[char])
-        else:
-            result.append(char)
-    return ''.join(result)
-
 
 class Command(BaseCommand):
     help = 'Import simplified product catalog from chkz.kz'
@@ -47,11 +22,27 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing products before import',
         )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show what would change without saving to database',
+        )
+        parser.add_argument(
+            '--archive-missing',
+            action='store_true',
+            help='Archive previously imported products that are no longer in the catalog',
+        )
+        parser.add_argument(
+            '--take-over',
+            action='store_true',
+            help='Update products another import owns instead of reporting them as conflicts',
+        )
 
     def handle(self, *args, **options):
         clear_existing = options['clear']
+        dry_run = options['dry_run']
 
-        if clear_existing:
+        if clear_existing and not dry_run:
             self.stdout.write(self.style.WARNING('Clearing existing products...'))
             Item.objects.all().delete()
             Category.objects.all().delete()
@@ -168,48 +159,35 @@ class Command(BaseCommand):
             },
         }
 
-        total_products = 0
-        total_categories = 0
-
-        for category_name, cat_data in categories_data.items():
-            self.stdout.write(f'\n[+] Category: {category_name}')
-
-            category, created = Category.objects.get_or_create(
-                name=category_name,
-                defaults={
-                    'slug': slugify(transliterate(category_name)),
-                    'description': cat_data['description']
-                }
-            )
-
-            if created:
-                total_categories += 1
-                self.stdout.write(self.style.SUCCESS(f'    Created category'))
-            else:
-                self.stdout.write(f'    Category exists')
-
-            for idx, product in enumerate(cat_data['products'], 1):
-                item, created = Item.objects.get_or_create(
-                    title=product['name'],
-                    defaults={
-                        'slug': slugify(transliterate(product['name'])),
-                        'category': category,
-                        'description': product['description'],
-                        'short_description': product['short'],
-                        'status': 'published',
-                        'order': idx,
-                    }
-                )
-
-                if created:
-                    total_products += 1
-                    self.stdout.write(f'    [+] {product["name"]}')
-                else:
-                    self.stdout.write(f'    [-] {product["name"]} (exists)')
+        records = [
+            {
+                'title': product['name'],
+                'category': category_name,
+                'description': product['description'],
+                'short_description': product['short'],
+            }
+            for category_name, cat_data in categories_data.items()
+            for product in cat_data['products']
+        ]
+        descriptions = {name: cat_data['description'] for name, cat_data in categories_data.items()}
+        result = sync_catalog(
+            records, 'scrape_chkz', category_descriptions=descriptions,
+            archive_missing=options['archive_missing'], take_over=options['take_over'], dry_run=dry_run,
+        )
 
-        self.stdout.write(self.style.SUCCESS(f'\n\n[SUCCESS] Import completed!'))
-        self.stdout.write(self.style.SUCCESS(f'Categories created: {total_categories}'))
-        self.stdout.write(self.style.SUCCESS(f'Products created: {total_products}'))
+        for line in result.lines():
+            self.stdout.write(line)
+
+        prefix = '[DRY RUN] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(f'\n\n[SUCCESS] {prefix}Import completed!'))
+        self.stdout.write(self.style.SUCCESS(f'Categories created: {len(result.categories_new)}'))
+        self.stdout.write(self.style.SUCCESS(f'Products: {result.summary()}'))
+        if result.archived:
+            self.stdout.write(self.style.SUCCESS(f'Archived missing products: {result.archived}'))
+        elif result.missing and not dry_run:
+            self.stdout.write(self.style.WARNING('Missing products are kept; use --archive-missing to archive them'))
+        if result.conflicts:
+            self.stdout.write(self.style.WARNING('Products owned by another import are kept; use --take-over to update them'))
         self.stdout.write(self.style.SUCCESS(f'\nTotal in database:'))
         self.stdout.write(self.style.SUCCESS(f'  Categories: {Category.objects.count()}'))
         self.stdout.write(self.style.SUCCESS(f'  Products: {Item.objects.count()}'))
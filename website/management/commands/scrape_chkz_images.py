@@ -2,11 +2,12 @@ import sys
 import os
 import requests
 from io import BytesIO
-from bs4 import BeautifulSoup
 from django.core.management.base import BaseCommand
 from django.core.files import File
 from django.core.files.images import ImageFile
 from website.models import Item, Category
+from website.scraping.extractors import response_encoding
+from website.scraping.sites import CHKZ_PRODUCT_URLS, SITES
 import time
 
 # Fix encoding for Windows console
@@ -79,25 +80,7 @@ class Command(BaseCommand):
             response = requests.get(url, headers=headers, timeout=10)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Look for images in common patterns
-            images = []
-
-            # Find all img tags
-            for img in soup.find_all('img'):
-                src = img.get('src') or img.get('data-src') or img.get('data-lazy-src')
-                if src and 'picture.loading' not in src:
-                    images.append(src)
-
-            # Find images in picture tags
-            for picture in soup.find_all('picture'):
-                for source in picture.find_all('source'):
-                    srcset = source.get('srcset')
-                    if srcset:
-                        images.append(srcset.split(',')[0].strip().split(' ')[0])
-
-            return images
+            return SITES['chkz'].images(response.content, response_encoding(response))
 
         except Exception as e:
             self.stdout.write(f'  [!] Failed to scrape {url}: {str(e)}')
@@ -108,16 +91,8 @@ class Command(BaseCommand):
 
         self.stdout.write(self.style.SUCCESS('Starting image scraping from chkz.kz...'))
 
-        # Map of product names to their catalog URLs on chkz.kz
-        product_urls = {
-            'ДЭН "СТАНДАРТ"': '/catalog/vintovye_kompressornye_ustanovki_tipa_den_standart_/',
-            'ДЭН "ОПТИМ"': '/catalog/vintovye_kompressornye_ustanovki_s_chastotnym_regulirovaniem_den_optim/',
-            'ДЭН "ВОЛЬТ"': '/catalog/vintovye_kompressornye_ustanovki_s_vysokovoltnym_dvigatelem_den_volt/',
-            'ДЭН "ШАХТЕР"': '/catalog/den_shm_shakhter/',
-            'КВ (дизельные)': '/catalog/dizelnye_vintovye_kompressornye_ustanovki_tipa_kv/',
-        }
-
-        for product_name, catalog_url in product_urls.items():
+        # Known product pages; `crawl chkz` discovers the rest of the catalog
+        for product_name, catalog_url in CHKZ_PRODUCT_URLS.items():
             try:
                 item = Item.objects.get(title=product_name, status='published')
 
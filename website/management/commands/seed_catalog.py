@@ -0,0 +1,393 @@
+import random
+import sys
+import time
+from decimal import Decimal
+from io import BytesIO
+from PIL import Image, ImageDraw
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, models, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+from website import changes, fulltext
+from website.bulk import catalog_changed, delete_items
+from website.catalog import bump_category_version
+from website.images import image_meta
+from website.markup import make_excerpt, render_description
+from website.models import Category, Change, Item, ItemImage
+from website.ordering import ORDER_STEP, next_order
+from website.purge import CATALOG_KEY
+from website.slugs import slugify_title, unique_slugs
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+# Item.source of generated items, so they can be told apart and cleared
+SEED_SOURCE = 'seed_catalog'
+# Prefixes of generated category slugs and names, so they are not
+# mistaken for the real categories they are modelled on
+SEED_SLUG_PREFIX = 'seed'
+SEED_NAME_PREFIX = '[Тест] '
+IMAGE_DIR = 'items/seed'
+
+# (category, product type, short descriptions)
+PRODUCT_TYPES = [
+    ('Винтовые компрессоры', 'Винтовой компрессор', ['Электроприводная винтовая установка', 'Для постоянной нагрузки']),
+    ('Компрессоры с частотным регулированием', 'Компрессор с ЧРП', ['Экономия электроэнергии до 30%', 'Плавный пуск']),
+    ('Дизельные компрессоры', 'Дизельный компрессор', ['Автономная работа на объекте', 'Передвижное шасси']),
+    ('Безмасляные компрессоры', 'Безмасляный компрессор', ['Класс чистоты воздуха 0', 'Для медицины и пищевых производств']),
+    ('Поршневые компрессоры', 'Поршневой компрессор', ['Для мастерских и гаражей', 'Простое обслуживание']),
+    ('Осушители воздуха', 'Рефрижераторный осушитель', ['Точка росы +3 °C', 'Защита пневмосети от конденсата']),
+    ('Адсорбционные осушители', 'Адсорбционный осушитель', ['Точка росы до −70 °C', 'Холодная регенерация']),
+    ('Фильтры сжатого воздуха', 'Магистральный фильтр', ['Степень очистки 0,01 мкм', 'Индикатор загрязнения']),
+    ('Воздухосборники', 'Ресивер', ['Вертикальное исполнение', 'Оцинкованный бак']),
+    ('Азотные станции', 'Азотная станция', ['Чистота азота до 99,999%', 'Мембранная технология']),
+    ('Блок-контейнерные станции', 'Блочно-модульная станция', ['Поставка «под ключ»', 'Утеплённый контейнер']),
+    ('Дизель-генераторы', 'Дизель-генераторная установка', ['Резервное электроснабжение', 'Автозапуск']),
+    ('Запасные части', 'Ремкомплект', ['Оригинальные комплектующие', 'Подбор по серийному номеру']),
+]
+SERIES = ['ДЭН', 'ДЭН-ШМ', 'ДЭН-ШМБ', 'КВ', 'КС', 'ВК', 'АСО', 'РВ', 'ОВ', 'ДГУ', 'БКК', 'СТАНДАРТ', 'ОПТИМ', 'ВОЛЬТ']
+POWERS = [2.2, 4, 5.5, 7.5, 11, 15, 18.5, 22, 30, 37, 45, 55, 75, 90, 110, 132, 160, 200, 250, 315]
+PRESSURES = [7, 8, 10, 13, 15]
+
+SENTENCES = [
+    'Установка собрана на единой раме и поставляется полностью готовой к подключению.',
+    'Винтовой блок с асимметричным профилем роторов обеспечивает высокий КПД во всём диапазоне нагрузок.',
+    'Микропроцессорный контроллер следит за давлением, температурой и наработкой, сообщая о необходимости обслуживания.',
+    'Шумоизолирующий кожух позволяет размещать оборудование рядом с рабочими местами.',
+    'Встроенный концевой охладитель снижает температуру сжатого воздуха перед подачей в сеть.',
+    'Все узлы доступны для обслуживания через съёмные панели без демонтажа оборудования.',
+    'Оборудование адаптировано к климатическим условиям Казахстана и работает при температуре от −40 до +45 °C.',
+    'Плавный пуск двигателя исключает перегрузки электросети и продлевает ресурс подшипников.',
+    'Система рекуперации тепла позволяет использовать до 90% потребляемой мощности для отопления помещений.',
+    'Поставка включает пусконаладочные работы, обучение персонала и гарантийное сопровождение.',
+    'Сервисный интервал составляет 4000 моточасов при работе на рекомендованном масле.',
+    'Конструкция рассчитана на круглосуточную работу в тяжёлых промышленных условиях.',
+    'Автоматический дренаж удаляет конденсат без потерь сжатого воздуха.',
+    'Возможна интеграция в систему диспетчеризации предприятия по протоколу Modbus.',
+]
+FEATURES = [
+    'Прямой привод без потерь мощности',
+    'Электродвигатель класса энергоэффективности IE3',
+    'Защита от перегрева и обратного вращения',
+    'Антивибрационные опоры',
+    'Встроенный осушитель воздуха',
+    'Удалённый мониторинг',
+    'Гарантия 2 года',
+    'Сертификат соответствия ЕАЭС',
+    'Комплект фильтров на первое ТО',
+    'Пылезащитное исполнение IP55',
+]
+STATUSES = ['published', 'draft', 'archived']
+# Cumulative: 85% published, 10% drafts, 5% archived
+STATUS_WEIGHTS = [85, 95, 100]
+# (width, height) of generated images
+IMAGE_SIZES = [(1200, 900), (1000, 1000), (1600, 1200), (900, 1200)]
+
+
+def description_pools(rnd, size=200):
+    """
+    Description building blocks and their rendered HTML. Blocks are
+    separated by blank lines, which ``render_description`` renders one
+    by one, so a description's HTML is the rendered blocks joined by
+    newlines and each block is rendered once instead of once per item.
+    """
+    intros = []
+    for _ in range(size):
+        sentences = rnd.sample(SENTENCES, len(SENTENCES))
+        # Long enough that the excerpt never reaches the second block
+        length = 0
+        for count, sentence in enumerate(sentences, 1):
+            length += len(sentence) + 1
+            if length > 300:
+                break
+        intros.append(' '.join(sentences[:count]))
+    features = [
+        '\n'.join(f'- {feature}' for feature in rnd.sample(FEATURES, rnd.randint(3, 6)))
+        for _ in range(size)
+    ]
+    return [
+        [(text, render_description(text), make_excerpt(text)) for text in intros],
+        [(text, render_description(text)) for text in features],
+    ]
+
+
+def spec_block(product_type, power, pressure):
+    text = '\n'.join([
+        f'Тип: {product_type.lower()}',
+        f'Мощность двигателя: {power:g} кВт',
+        f'Рабочее давление: {pressure} бар',
+        f'Производительность: {power * 0.16:.1f} м³/мин',
+        f'Напряжение: {"6000" if power > 200 else "380"} В',
+    ])
+    return text, render_description(text)
+
+
+def image_pool(count, with_files):
+    """
+    ``[(name, width, height, lqip), ...]`` shared by every generated
+    image row. With ``with_files`` the JPEGs are written to storage (once)
+    and measured; otherwise the rows point at files that don't exist.
+    """
+    pool = []
+    for n in range(count):
+        width, height = IMAGE_SIZES[n % len(IMAGE_SIZES)]
+        name = f'{IMAGE_DIR}/seed-{n:03d}.jpg'
+        if not with_files:
+            pool.append((name, width, height, ''))
+            continue
+        if not default_storage.exists(name):
+            image = Image.new('RGB', (width, height), (40 + n * 37 % 180, 70 + n * 53 % 150, 110 + n * 29 % 130))
+            draw = ImageDraw.Draw(image)
+            for step in range(0, max(width, height), 80):
+                draw.line([(step, 0), (0, step)], fill=(230, 230, 230), width=6)
+            buffer = BytesIO()
+            image.save(buffer, format='JPEG', quality=80)
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+        with default_storage.open(name, 'rb') as f:
+            pool.append((name, *image_meta(f)))
+    return pool
+
+
+def insert_rows(model, rows):
+    """
+    Insert ``rows`` (dicts of field name -> value) with one prepared
+    INSERT run for every row: ``bulk_create()`` spends most of its time
+    building model instances and compiling the statement, value by value.
+    """
+    if not rows:
+        return
+    connection = connections[router.db_for_write(model)]
+    fields = [model._meta.get_field(name) for name in rows[0]]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    # Only these need converting; everything else goes to the driver as is
+    prepared = [
+        n for n, field in enumerate(fields)
+        if isinstance(field, (models.DateTimeField, models.DecimalField))
+    ]
+    # Generated rows share a few timestamps and round prices: convert each once
+    converted = {}
+    params = []
+    for row in rows:
+        values = list(row.values())
+        for n in prepared:
+            key = (n, values[n])
+            if key not in converted:
+                converted[key] = fields[n].get_db_prep_save(values[n], connection)
+            values[n] = converted[key]
+        params.append(values)
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def record_new(model, after_id, now):
+    """Log the ``model`` rows with ids above ``after_id`` with one INSERT ... SELECT"""
+    connection = connections[router.db_for_write(Change)]
+    quote = connection.ops.quote_name
+    field = Change._meta.get_field
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {} ({}, {}, {}) SELECT %s, {}, %s FROM {} WHERE {} > %s ORDER BY {}'.format(
+                quote(Change._meta.db_table), quote(field('kind').column), quote(field('object_id').column),
+                quote(field('changed_at').column), quote(model._meta.pk.column), quote(model._meta.db_table),
+                quote(model._meta.pk.column), quote(model._meta.pk.column),
+            ),
+            [changes.KINDS[model], field('changed_at').get_db_prep_save(now, connection), after_id],
+        )
+
+
+class Command(BaseCommand):
+    help = 'Generate a large synthetic catalog (categories, items, images) for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=10000,
+            help='Number of items to generate',
+        )
+        parser.add_argument(
+            '--categories',
+            type=int,
+            default=len(PRODUCT_TYPES),
+            help='Number of categories to spread the items over',
+        )
+        parser.add_argument(
+            '--images',
+            type=int,
+            default=3,
+            help='Gallery images per item: a random number from 0 up to this',
+        )
+        parser.add_argument(
+            '--image-files',
+            action='store_true',
+            help='Write a small pool of placeholder JPEGs that every image row points at',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed; the same seed on the same catalog gives the same rows',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Items written per transaction',
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Delete previously generated items and categories first',
+        )
+
+    def handle(self, *args, **options):
+        count = options['items']
+        batch_size = options['batch_size']
+        if count < 0 or options['categories'] < 1 or batch_size < 1:
+            raise CommandError('--items must be >= 0, --categories and --batch-size >= 1')
+
+        started = time.perf_counter()
+        if options['clear']:
+            self.clear()
+        if not count:
+            # Nothing to generate: don't create empty categories either
+            return
+
+        # Appending to an earlier run continues its numbering
+        offset = Item.objects.filter(source=SEED_SOURCE).count()
+        rnd = random.Random(f'{options["seed"]}:{offset}')
+
+        self.stdout.write(self.style.SUCCESS(f'Generating {count} items...'))
+        categories = self.categories(options['categories'])
+        orders = {category.pk: next_order(category.items.all()) - ORDER_STEP for category, _ in categories}
+        intros, features = description_pools(rnd)
+        specs = {}
+        images = image_pool(12, options['image_files'])
+        max_images = options['images']
+
+        now = timezone.now()
+        created_items = created_images = 0
+        for start in range(0, count, batch_size):
+            items, gallery = [], []
+            for n in range(offset + start, offset + min(start + batch_size, count)):
+                category, (_, product_type, shorts) = categories[n % len(categories)]
+                power, pressure = rnd.choice(POWERS), rnd.choice(PRESSURES)
+                title = f'{product_type} {rnd.choice(SERIES)}-{power:g} ({pressure} бар), арт. {100000 + n}'
+
+                intro, intro_html, excerpt = rnd.choice(intros)
+                feature, feature_html = rnd.choice(features)
+                key = (product_type, power, pressure)
+                if key not in specs:
+                    specs[key] = spec_block(*key)
+                spec, spec_html = specs[key]
+
+                orders[category.pk] += ORDER_STEP
+                status = rnd.choices(STATUSES, cum_weights=STATUS_WEIGHTS)[0]
+                item_images = rnd.sample(images, rnd.randint(0, min(max_images, len(images))))
+                main = item_images[0] if item_images else ('', None, None, '')
+                items.append({
+                    'title': title,
+                    'slug': slugify_title(title),
+                    'category': category.pk,
+                    'description': f'{intro}\n\n{spec}\n\n{feature}',
+                    'description_html': f'{intro_html}\n{spec_html}\n{feature_html}',
+                    'excerpt': excerpt,
+                    'short_description': f'{rnd.choice(shorts)}. {power:g} кВт, {pressure} бар',
+                    # One in ten on request
+                    'price': None if rnd.random() < 0.1 else Decimal(round(10 ** rnd.uniform(5, 7.7), -3)),
+                    'main_image': main[0],
+                    'main_image_width': main[1],
+                    'main_image_height': main[2],
+                    'main_image_lqip': main[3],
+                    'status': status,
+                    'featured': status == 'published' and rnd.random() < 0.02,
+                    'order': orders[category.pk],
+                    'source': SEED_SOURCE,
+                    'source_hash': '',
+                    'created_at': now,
+                    'updated_at': now,
+                })
+                gallery.append(item_images)
+
+            with transaction.atomic():
+                self.ensure_unique_slugs(items)
+                last_id = Item.objects.aggregate(last=Max('id'))['last'] or 0
+                with fulltext.deferred_indexing(last_id, using=router.db_for_write(Item)):
+                    insert_rows(Item, items)
+                ids = dict(Item.objects.filter(id__gt=last_id, source=SEED_SOURCE).values_list('slug', 'id'))
+                rows = [
+                    {
+                        'item': ids[item['slug']], 'image': name, 'width': width, 'height': height, 'lqip': lqip,
+                        'caption': f'{item["title"]} — фото {position}', 'order': position * ORDER_STEP,
+                        'uploaded_at': now,
+                    }
+                    for item, item_images in zip(items, gallery)
+                    for position, (name, width, height, lqip) in enumerate(item_images, 1)
+                ]
+                last_image_id = ItemImage.objects.aggregate(last=Max('id'))['last'] or 0
+                insert_rows(ItemImage, rows)
+                record_new(Item, last_id, now)
+                record_new(ItemImage, last_image_id, now)
+
+            created_items += len(items)
+            created_images += len(rows)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  [+] {created_items} items, {created_images} images ({created_items / elapsed:.0f} items/s)')
+
+        catalog_changed({CATALOG_KEY})
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'\n[SUCCESS] Created {created_items} items and {created_images} images in {elapsed:.1f}s'
+        ))
+        self.stdout.write(self.style.SUCCESS(f'Total products: {Item.objects.count()}'))
+
+    def categories(self, count):
+        """``[(Category, product type), ...]``, creating the missing ones"""
+        names = []
+        for n in range(count):
+            product_type = PRODUCT_TYPES[n % len(PRODUCT_TYPES)]
+            round_ = n // len(PRODUCT_TYPES)
+            name = f'{SEED_NAME_PREFIX}{product_type[0]}'
+            names.append((f'{name} {round_ + 1}' if round_ else name, product_type))
+
+        existing = {
+            category.name: category
+            for category in Category.objects.filter(slug__startswith=f'{SEED_SLUG_PREFIX}-', name__in=[name for name, _ in names])
+        }
+        new = [Category(name=name, description=f'Категория {name}') for name, _ in names if name not in existing]
+        if new:
+            slugs = unique_slugs(Category, [f'{SEED_SLUG_PREFIX} {category.name.removeprefix(SEED_NAME_PREFIX)}' for category in new])
+            for category, slug in zip(new, slugs):
+                category.slug = slug
+            with transaction.atomic():
+                Category.objects.bulk_create(new)
+                changes.record(Category, [category.pk for category in new])
+                # bulk_create sends no signals; the footer lists categories
+                transaction.on_commit(bump_category_version)
+            existing.update((category.name, category) for category in new)
+        return [(existing[name], product_type) for name, product_type in names]
+
+    def ensure_unique_slugs(self, items):
+        """Article numbers keep generated slugs unique; only real items can clash"""
+        taken = set(Item.objects.filter(slug__in=[item['slug'] for item in items]).values_list('slug', flat=True))
+        clashing = [item for item in items if item['slug'] in taken]
+        if clashing:
+            reserved = {item['slug'] for item in items}
+            for item, slug in zip(clashing, unique_slugs(Item, [item['title'] for item in clashing], reserved=reserved)):
+                item['slug'] = slug
+
+    def clear(self):
+        count = delete_items(Item.objects.filter(source=SEED_SOURCE))
+        categories = Category.objects.filter(slug__startswith=f'{SEED_SLUG_PREFIX}-')
+        # Only the ones nothing else was filed under since
+        deleted, _ = categories.filter(items__isnull=True).delete()
+        self.stdout.write(self.style.WARNING(f'Deleted {count} generated items and {deleted} categories'))
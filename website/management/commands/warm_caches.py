@@ -0,0 +1,96 @@
+import sys
+import time
+from collections import Counter
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from website.models import Item
+from website.snapshot import get_snapshot
+from website.warmup import compile_templates, public_urls, warm_urls
+
+# Fix encoding for Windows console
+if sys.platform == 'win32':
+    sys.stdout.reconfigure(encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Prerender public pages after a deploy to fill the shared page fragment cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=120,
+            help='Stop after this many seconds (0 for no limit)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Concurrent requests',
+        )
+        parser.add_argument(
+            '--host',
+            default=settings.ALLOWED_HOSTS[0],
+            help='Host header to render pages for',
+        )
+        parser.add_argument(
+            '--url',
+            default=None,
+            help='Address of the running server, e.g. http://127.0.0.1:8000; '
+                 'without it pages are rendered in this process',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        self.stdout.write(self.style.SUCCESS('Warming caches...'))
+
+        if finders.find('dist/manifest.json') is None:
+            self.stdout.write(self.style.WARNING(
+                '[!] Built assets are missing: run "python manage.py build_assets" for placeholders and bundles'
+            ))
+
+        without_meta = Item.objects.exclude(main_image='').filter(main_image_width__isnull=True).count()
+        if without_meta:
+            self.stdout.write(self.style.WARNING(
+                f'[!] {without_meta} images have no stored size/preview: run "python manage.py backfill_images"'
+            ))
+
+        snapshot = get_snapshot()
+        compile_templates()
+        self.stdout.write(f'[+] Snapshot: {len(snapshot.items_by_slug)} items, templates compiled')
+
+        urls = public_urls(snapshot)
+        stats_before = cache.stats() if hasattr(cache, 'stats') else {}
+        results = warm_urls(urls, options['host'], options['workers'], options['budget'] or None, options['url'])
+
+        warmed = Counter(kind for kind, _, status, _ in results if status == 200)
+        failed = [(url, status) for _, url, status, _ in results if status != 200]
+        for url, status in failed:
+            self.stdout.write(self.style.ERROR(f'[!] {url}: {status}'))
+
+        self.stdout.write('\nWarmed:')
+        for kind in ('index', 'sitemap', 'category', 'product'):
+            total = sum(1 for url_kind, _ in urls if url_kind == kind)
+            self.stdout.write(f'  {kind:<10} {warmed[kind]}/{total}')
+
+        if results:
+            slowest = sorted(results, key=lambda result: result[3], reverse=True)[:5]
+            average = sum(result[3] for result in results) / len(results)
+            self.stdout.write(f'\nAverage {average * 1000:.1f} ms per page, slowest:')
+            for _, url, _, seconds in slowest:
+                self.stdout.write(f'  {seconds * 1000:8.1f} ms  {url}')
+
+        if stats_before and not options['url']:
+            stats = cache.stats()
+            fills = stats.get('l2_misses', 0) - stats_before.get('l2_misses', 0)
+            self.stdout.write(f'Shared cache misses filled: {fills}')
+
+        elapsed = time.perf_counter() - start
+        skipped = len(urls) - len(results)
+        self.stdout.write(self.style.SUCCESS(
+            f'\n[SUCCESS] {sum(warmed.values())} pages warmed in {elapsed:.1f}s'
+        ))
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'{skipped} pages skipped: time budget exhausted'))
@@ -0,0 +1,136 @@
+"""
+Lightweight markup for product descriptions.
+
+Descriptions are plain text with a few optional conventions, rendered
+once on save into ``Item.description_html``:
+
+* paragraphs are separated by blank lines, single line breaks are kept;
+* lines starting with ``-``, ``*`` or ``•`` form a bulleted list,
+  lines starting with ``1.`` / ``1)`` a numbered one;
+* two or more lines with ``|`` form a table (a ``---|---`` line after
+  the first row makes it the header);
+* two or more ``Параметр: значение`` lines form a specification table.
+
+All text is escaped and only the tags above are produced, so the
+output is safe to render without further sanitizing.
+"""
+import re
+from django.utils.html import escape
+from django.utils.text import Truncator
+
+
+EXCERPT_LENGTH = 200
+
+_BULLET_RE = re.compile(r'^[-*•]\s+(.+)$')
+_NUMBER_RE = re.compile(r'^\d{1,3}[.)]\s+(.+)$')
+_SPEC_RE = re.compile(r'^([^:|]{1,60}?)\s*:\s+(\S.*)$')
+_TABLE_SEPARATOR_RE = re.compile(r'^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n')
+
+
+def _classify(line):
+    if _BULLET_RE.match(line):
+        return 'bullet'
+    if _NUMBER_RE.match(line):
+        return 'number'
+    if '|' in line:
+        return 'pipe'
+    if _SPEC_RE.match(line):
+        return 'spec'
+    return 'text'
+
+
+def _cells(line):
+    cells = [cell.strip() for cell in line.split('|')]
+    if cells and not cells[0]:
+        cells = cells[1:]
+    if cells and not cells[-1]:
+        cells = cells[:-1]
+    return cells
+
+
+def _render_list(tag, pattern, lines):
+    items = ''.join(f'<li>{escape(pattern.match(line).group(1))}</li>' for line in lines)
+    return f'<{tag}>{items}</{tag}>'
+
+
+def _render_pipe_table(lines):
+    head = ''
+    if len(lines) > 2 and _TABLE_SEPARATOR_RE.match(lines[1]):
+        head = '<thead><tr>%s</tr></thead>' % ''.join(f'<th>{escape(cell)}</th>' for cell in _cells(lines[0]))
+        lines = lines[2:]
+    rows = ''.join(
+        '<tr>%s</tr>' % ''.join(f'<td>{escape(cell)}</td>' for cell in _cells(line))
+        for line in lines
+        if not _TABLE_SEPARATOR_RE.match(line)
+    )
+    return f'<table class="spec-table">{head}<tbody>{rows}</tbody></table>'
+
+
+def _render_spec_table(lines):
+    rows = []
+    for line in lines:
+        name, value = _SPEC_RE.match(line).groups()
+        rows.append(f'<tr><th>{escape(name)}</th><td>{escape(value)}</td></tr>')
+    return f'<table class="spec-table"><tbody>{"".join(rows)}</tbody></table>'
+
+
+def _render_run(kind, lines):
+    if kind == 'bullet':
+        return _render_list('ul', _BULLET_RE, lines)
+    if kind == 'number':
+        return _render_list('ol', _NUMBER_RE, lines)
+    if kind == 'pipe':
+        return _render_pipe_table(lines)
+    if kind == 'spec':
+        return _render_spec_table(lines)
+    return '<p>%s</p>' % '<br>'.join(escape(line) for line in lines)
+
+
+def _runs(lines):
+    """Group consecutive lines of the same kind; lone table lines are text"""
+    runs = []
+    for line in lines:
+        kind = _classify(line)
+        if runs and runs[-1][0] == kind:
+            runs[-1][1].append(line)
+        else:
+            runs.append((kind, [line]))
+
+    merged = []
+    for kind, group in runs:
+        if kind in ('pipe', 'spec') and len(group) < 2:
+            kind = 'text'
+        if merged and merged[-1][0] == kind == 'text':
+            merged[-1][1].extend(group)
+        else:
+            merged.append((kind, group))
+    return merged
+
+
+def render_description(text):
+    """Render a description to sanitized HTML"""
+    text = (text or '').replace('\r\n', '\n').replace('\r', '\n').strip()
+    if not text:
+        return ''
+
+    output = []
+    for block in _BLANK_LINES_RE.split(text):
+        lines = [line.strip() for line in block.split('\n') if line.strip()]
+        output.extend(_render_run(kind, group) for kind, group in _runs(lines))
+    return '\n'.join(output)
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Plain-text start of a description for product cards"""
+    words = []
+    for line in (text or '').splitlines():
+        line = line.strip()
+        match = _BULLET_RE.match(line) or _NUMBER_RE.match(line)
+        if match:
+            line = match.group(1)
+        if _TABLE_SEPARATOR_RE.match(line):
+            continue
+        words.append(' '.join(_cells(line)) if '|' in line else line)
+    plain = re.sub(r'\s+', ' ', ' '.join(words)).strip()
+    return Truncator(plain).chars(length)
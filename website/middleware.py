@@ -0,0 +1,75 @@
+import re
+import threading
+import time
+from django.conf import settings
+from django.http import HttpResponsePermanentRedirect
+from django.urls import reverse
+from .models import SlugRedirect
+
+
+PRODUCT_PATH_RE = re.compile(r'^/product/(?P<slug>[\w-]+)/$')
+
+# Longest old -> new chain that is followed when building the map
+MAX_REDIRECT_HOPS = 10
+
+_redirect_map = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+def _build_redirect_map():
+    """Load item redirects and collapse chains (a -> b -> c becomes a -> c)"""
+    pairs = dict(SlugRedirect.objects.filter(kind='item').values_list('old_slug', 'new_slug'))
+    resolved = {}
+    for old_slug, new_slug in pairs.items():
+        hops = 0
+        while new_slug in pairs and hops < MAX_REDIRECT_HOPS:
+            new_slug = pairs[new_slug]
+            hops += 1
+        if new_slug != old_slug:
+            resolved[old_slug] = new_slug
+    return resolved
+
+
+def get_redirect_map():
+    """Return the in-memory redirect map, reloading it when it gets stale"""
+    global _redirect_map, _loaded_at
+
+    refresh = getattr(settings, 'SLUG_REDIRECT_REFRESH', 60)
+    if _redirect_map is None or time.monotonic() - _loaded_at > refresh:
+        with _lock:
+            if _redirect_map is None or time.monotonic() - _loaded_at > refresh:
+                _redirect_map = _build_redirect_map()
+                _loaded_at = time.monotonic()
+    return _redirect_map
+
+
+def clear_redirect_map():
+    """Force the next lookup in this process to reload from the database"""
+    global _redirect_map
+    _redirect_map = None
+
+
+class SlugRedirectMiddleware:
+    """Answer 404s on old product URLs with a 301 to the current slug"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.status_code != 404:
+            return response
+
+        match = PRODUCT_PATH_RE.match(request.path_info)
+        if not match:
+            return response
+
+        new_slug = get_redirect_map().get(match.group('slug'))
+        if new_slug is None:
+            return response
+
+        url = reverse('product_detail', args=[new_slug])
+        if request.META.get('QUERY_STRING'):
+            url = f"{url}?{request.META['QUERY_STRING']}"
+        return HttpResponsePermanentRedirect(url)
@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0003_remove_category_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugRedirect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('item', 'Товар/Услуга'), ('category', 'Категория')], max_length=20, verbose_name='Тип')),
+                ('old_slug', models.SlugField(max_length=200, verbose_name='Старый URL-адрес')),
+                ('new_slug', models.SlugField(max_length=200, verbose_name='Новый URL-адрес')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Перенаправление',
+                'verbose_name_plural': 'Перенаправления',
+                'ordering': ['-created_at'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'old_slug'), name='unique_slug_redirect')],
+            },
+        ),
+    ]
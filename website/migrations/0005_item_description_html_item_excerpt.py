@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-19 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0004_slugredirect'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='description_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Описание (HTML)'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Отрывок описания'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1 on 2026-10-19 00:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0005_item_description_html_item_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='main_image_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота изображения'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='main_image_lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью изображения'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='main_image_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина изображения'),
+        ),
+        migrations.AddField(
+            model_name='itemimage',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота'),
+        ),
+        migrations.AddField(
+            model_name='itemimage',
+            name='lqip',
+            field=models.TextField(blank=True, editable=False, verbose_name='Превью'),
+        ),
+        migrations.AddField(
+            model_name='itemimage',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина'),
+        ),
+    ]
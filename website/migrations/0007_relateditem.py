@@ -0,0 +1,31 @@
+# Generated by Django 5.1 on 2026-10-19 00:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0006_item_main_image_height_item_main_image_lqip_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name='Позиция')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('computed_at', models.DateTimeField(verbose_name='Дата расчёта')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='website.item', verbose_name='Товар/Услуга')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='website.item', verbose_name='Похожий товар')),
+            ],
+            options={
+                'verbose_name': 'Похожий товар',
+                'verbose_name_plural': 'Похожие товары',
+                'ordering': ['item', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('item', 'rank'), name='unique_related_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+def seed_changes(apps, schema_editor):
+    """Log every existing row once so that since=0 returns the whole catalog"""
+    Change = apps.get_model('website', 'Change')
+    for kind, model_name in (('category', 'Category'), ('item', 'Item'), ('image', 'ItemImage')):
+        model = apps.get_model('website', model_name)
+        ids = model.objects.order_by('pk').values_list('pk', flat=True)
+        Change.objects.bulk_create(
+            (Change(kind=kind, object_id=pk) for pk in ids.iterator()),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0007_relateditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False, verbose_name='Номер изменения')),
+                ('kind', models.CharField(choices=[('category', 'Категория'), ('item', 'Товар/Услуга'), ('image', 'Изображение товара')], max_length=20, verbose_name='Тип')),
+                ('object_id', models.BigIntegerField(verbose_name='ID объекта')),
+                ('changed_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата изменения')),
+            ],
+            options={
+                'verbose_name': 'Изменение каталога',
+                'verbose_name_plural': 'Изменения каталога',
+                'ordering': ['seq'],
+                'indexes': [models.Index(fields=['kind', 'object_id'], name='change_object_idx')],
+            },
+        ),
+        migrations.RunPython(seed_changes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-19 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0008_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlURL',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crawl', models.CharField(max_length=50, verbose_name='Обход')),
+                ('url', models.TextField(verbose_name='URL')),
+                ('url_hash', models.CharField(max_length=40, verbose_name='Хэш URL')),
+                ('host', models.CharField(max_length=255, verbose_name='Хост')),
+                ('depth', models.PositiveIntegerField(default=0, verbose_name='Глубина')),
+                ('priority', models.IntegerField(default=0, verbose_name='Приоритет')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('done', 'Загружена'), ('failed', 'Ошибка'), ('skipped', 'Пропущена')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('http_status', models.PositiveIntegerField(blank=True, null=True, verbose_name='HTTP-статус')),
+                ('content_hash', models.CharField(blank=True, max_length=64, verbose_name='Хэш содержимого')),
+                ('last_fetched', models.DateTimeField(blank=True, null=True, verbose_name='Последняя загрузка')),
+                ('discovered_at', models.DateTimeField(auto_now_add=True, verbose_name='Обнаружена')),
+            ],
+            options={
+                'verbose_name': 'Страница обхода',
+                'verbose_name_plural': 'Страницы обхода',
+                'indexes': [models.Index(fields=['crawl', 'status', '-priority', 'depth', 'id'], name='crawl_queue_idx')],
+                'constraints': [models.UniqueConstraint(fields=('crawl', 'url_hash'), name='unique_crawl_url')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-19 01:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0009_crawlurl'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Отпечаток источника'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='source',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=50, verbose_name='Источник'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='source_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='Отпечаток источника'),
+        ),
+    ]
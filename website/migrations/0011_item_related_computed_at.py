@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 01:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('website', '0010_source_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='related_computed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата расчёта похожих'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.db.models import Count
 from django.utils import timezone
+from .images import field_image_meta
+from .markup import make_excerpt, render_description
 
 
 class CategoryManager(models.Manager):
@@ -15,6 +17,8 @@ class Category(models.Model):
     name = models.CharField(max_length=100, verbose_name="Название категории")
     slug = models.SlugField(max_length=100, unique=True, verbose_name="URL-адрес")
     description = models.TextField(blank=True, verbose_name="Описание")
+    # Fingerprint of the imported fields (see website/sync.py)
+    source_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Отпечаток источника")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
 
     class Meta:
@@ -45,6 +49,9 @@ class Item(models.Model):
         verbose_name="Категория"
     )
     description = models.TextField(verbose_name="Описание")
+    # Rendered from description on save (see website/markup.py)
+    description_html = models.TextField(blank=True, editable=False, verbose_name="Описание (HTML)")
+    excerpt = models.CharField(max_length=300, blank=True, editable=False, verbose_name="Отрывок описания")
     short_description = models.CharField(
         max_length=300,
         blank=True,
@@ -62,6 +69,10 @@ class Item(models.Model):
         blank=True,
         verbose_name="Главное изображение"
     )
+    # Filled on save from main_image (see website/images.py)
+    main_image_width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина изображения")
+    main_image_height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота изображения")
+    main_image_lqip = models.TextField(blank=True, editable=False, verbose_name="Превью изображения")
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -70,6 +81,13 @@ class Item(models.Model):
     )
     featured = models.BooleanField(default=False, verbose_name="Избранное")
     order = models.IntegerField(default=0, verbose_name="Порядок сортировки")
+    # Import that owns the item and a fingerprint of the fields it
+    # supplied (see website/sync.py)
+    source = models.CharField(max_length=50, blank=True, db_index=True, editable=False, verbose_name="Источник")
+    source_hash = models.CharField(max_length=64, blank=True, editable=False, verbose_name="Отпечаток источника")
+    # When compute_related last computed the item's neighbours, even if
+    # it found none
+    related_computed_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Дата расчёта похожих")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
 
@@ -81,6 +99,34 @@ class Item(models.Model):
     def __str__(self):
         return self.title
 
+    def render_description(self):
+        """Fill description_html and excerpt from description"""
+        self.description_html = render_description(self.description)
+        self.excerpt = make_excerpt(self.description)
+
+    def update_image_meta(self):
+        """Fill main image dimensions and preview; True if they changed"""
+        if not self.main_image:
+            meta = (None, None, '')
+        elif self.main_image._committed and self.main_image_width is not None:
+            return False
+        else:
+            meta = field_image_meta(self.main_image) or (None, None, '')
+        self.main_image_width, self.main_image_height, self.main_image_lqip = meta
+        return True
+
+    def save(self, *args, **kwargs):
+        self.render_description()
+        self.update_image_meta()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            if 'description' in update_fields:
+                update_fields = {*update_fields, 'description_html', 'excerpt'}
+            if 'main_image' in update_fields:
+                update_fields = {*update_fields, 'main_image_width', 'main_image_height', 'main_image_lqip'}
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
 
 class ItemImage(models.Model):
     """Additional images for items"""
@@ -91,6 +137,9 @@ class ItemImage(models.Model):
         verbose_name="Товар/Услуга"
     )
     image = models.ImageField(upload_to='items/%Y/%m/', verbose_name="Изображение")
+    width = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Ширина")
+    height = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name="Высота")
+    lqip = models.TextField(blank=True, editable=False, verbose_name="Превью")
     caption = models.CharField(max_length=200, blank=True, verbose_name="Подпись")
     order = models.IntegerField(default=0, verbose_name="Порядок")
     uploaded_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата загрузки")
@@ -102,3 +151,128 @@ class ItemImage(models.Model):
 
     def __str__(self):
         return f"{self.item.title} - Изображение {self.order}"
+
+    def save(self, *args, **kwargs):
+        if self.image and (not self.image._committed or self.width is None):
+            self.width, self.height, self.lqip = field_image_meta(self.image) or (None, None, '')
+        super().save(*args, **kwargs)
+
+
+class RelatedItem(models.Model):
+    """Precomputed similar item, written by the compute_related command"""
+    item = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='related_links',
+        verbose_name="Товар/Услуга"
+    )
+    related = models.ForeignKey(
+        Item,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Похожий товар"
+    )
+    rank = models.PositiveSmallIntegerField(verbose_name="Позиция")
+    score = models.FloatField(verbose_name="Сходство")
+    computed_at = models.DateTimeField(verbose_name="Дата расчёта")
+
+    class Meta:
+        verbose_name = "Похожий товар"
+        verbose_name_plural = "Похожие товары"
+        ordering = ['item', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'rank'], name='unique_related_rank'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} -> {self.related_id} ({self.score:.2f})"
+
+
+class SlugRedirect(models.Model):
+    """Old slug -> new slug pair, served as a 301 by SlugRedirectMiddleware"""
+    KIND_CHOICES = [
+        ('item', 'Товар/Услуга'),
+        ('category', 'Категория'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Тип")
+    old_slug = models.SlugField(max_length=200, verbose_name="Старый URL-адрес")
+    new_slug = models.SlugField(max_length=200, verbose_name="Новый URL-адрес")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
+
+    class Meta:
+        verbose_name = "Перенаправление"
+        verbose_name_plural = "Перенаправления"
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'old_slug'], name='unique_slug_redirect'),
+        ]
+
+    def __str__(self):
+        return f"{self.old_slug} -> {self.new_slug}"
+
+
+class Change(models.Model):
+    """
+    One row per catalog write, numbered by ``seq``, for the /api/changes/
+    feed. A row says only *what* changed; the feed reads the current state,
+    so a row whose object is gone (or unpublished) is a tombstone.
+    """
+    KIND_CHOICES = [
+        ('category', 'Категория'),
+        ('item', 'Товар/Услуга'),
+        ('image', 'Изображение товара'),
+    ]
+
+    seq = models.BigAutoField(primary_key=True, verbose_name="Номер изменения")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Тип")
+    object_id = models.BigIntegerField(verbose_name="ID объекта")
+    changed_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата изменения")
+
+    class Meta:
+        verbose_name = "Изменение каталога"
+        verbose_name_plural = "Изменения каталога"
+        ordering = ['seq']
+        indexes = [
+            models.Index(fields=['kind', 'object_id'], name='change_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.seq} {self.kind} {self.object_id}"
+
+
+class CrawlURL(models.Model):
+    """A page in a scraper's crawl frontier (see website/scraping/frontier.py)"""
+    STATUS_CHOICES = [
+        ('pending', 'В очереди'),
+        ('done', 'Загружена'),
+        ('failed', 'Ошибка'),
+        ('skipped', 'Пропущена'),
+    ]
+
+    crawl = models.CharField(max_length=50, verbose_name="Обход")
+    url = models.TextField(verbose_name="URL")
+    url_hash = models.CharField(max_length=40, verbose_name="Хэш URL")
+    host = models.CharField(max_length=255, verbose_name="Хост")
+    depth = models.PositiveIntegerField(default=0, verbose_name="Глубина")
+    priority = models.IntegerField(default=0, verbose_name="Приоритет")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    http_status = models.PositiveIntegerField(null=True, blank=True, verbose_name="HTTP-статус")
+    content_hash = models.CharField(max_length=64, blank=True, verbose_name="Хэш содержимого")
+    last_fetched = models.DateTimeField(null=True, blank=True, verbose_name="Последняя загрузка")
+    discovered_at = models.DateTimeField(auto_now_add=True, verbose_name="Обнаружена")
+
+    class Meta:
+        verbose_name = "Страница обхода"
+        verbose_name_plural = "Страницы обхода"
+        constraints = [
+            models.UniqueConstraint(fields=['crawl', 'url_hash'], name='unique_crawl_url'),
+        ]
+        indexes = [
+            # The frontier's "next pages to fetch" query
+            models.Index(fields=['crawl', 'status', '-priority', 'depth', 'id'], name='crawl_queue_idx'),
+        ]
+
+    def __str__(self):
+        return self.url
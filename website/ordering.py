@@ -0,0 +1,105 @@
+"""
+Sparse sort keys for items within a category and images within an item.
+
+``order`` values are spaced ``ORDER_STEP`` apart, so moving a row between
+two neighbours only writes that row, with a key halfway between theirs.
+When two neighbours have no gap left (or share a key, as rows created
+before sparse keys did) the whole list is renumbered with one bulk
+update.
+"""
+from django.db import transaction
+from django.db.models import Max
+from . import changes
+from .bulk import catalog_changed
+from .models import Item, ItemImage
+from .purge import category_key, item_key
+
+
+ORDER_STEP = 1024
+
+
+class StaleNeighbours(Exception):
+    """A posted neighbour is not (or no longer) in the list being ordered"""
+
+
+def order_key(position):
+    """Key of the ``position``-th row of a freshly numbered list"""
+    return position * ORDER_STEP
+
+
+def next_order(siblings):
+    """Key that puts a new row after every row in ``siblings``"""
+    last = siblings.aggregate(last=Max('order'))['last']
+    return ORDER_STEP if last is None else last + ORDER_STEP
+
+
+def key_between(previous, following):
+    """
+    Integer key strictly between two neighbour keys (either may be None
+    at the ends of the list), or None when there is no room.
+    """
+    if previous is None and following is None:
+        return ORDER_STEP
+    if previous is None:
+        return following - ORDER_STEP
+    if following is None:
+        return previous + ORDER_STEP
+    if following - previous < 2:
+        return None
+    return (previous + following) // 2
+
+
+def rebalance(siblings, moved, previous_id):
+    """
+    Renumber ``siblings`` with ``moved`` placed right after ``previous_id``
+    (first when None), writing every key in a single bulk update.
+    """
+    rows = [row for row in siblings.only('id', 'order').order_by('order', 'id') if row.pk != moved.pk]
+    position = 0
+    if previous_id is not None:
+        position = next((n + 1 for n, row in enumerate(rows) if row.pk == previous_id), len(rows))
+    rows.insert(position, moved)
+    for n, row in enumerate(rows, 1):
+        row.order = order_key(n)
+    siblings.model.objects.bulk_update(rows, ['order'])
+    changes.record(siblings.model, [row.pk for row in rows])
+    return moved.order
+
+
+def move(obj, siblings, previous_id=None, next_id=None):
+    """
+    Place ``obj`` between the rows ``previous_id`` and ``next_id`` of
+    ``siblings``; returns ``(new key, rebalanced)``. Raises
+    ``StaleNeighbours`` if either is not one of the other ``siblings``
+    (deleted, moved away, from another list), rather than guessing a
+    position.
+    """
+    neighbour_ids = [pk for pk in (previous_id, next_id) if pk is not None]
+    with transaction.atomic():
+        keys = dict(
+            siblings.filter(pk__in=neighbour_ids)
+            .exclude(pk=obj.pk)
+            .values_list('pk', 'order')
+        )
+        if len(keys) != len(set(neighbour_ids)):
+            raise StaleNeighbours(sorted(set(neighbour_ids) - set(keys)))
+        key = key_between(keys.get(previous_id), keys.get(next_id))
+        if key is None:
+            return rebalance(siblings, obj, previous_id), True
+        siblings.filter(pk=obj.pk).update(order=key)
+        changes.record(siblings.model, [obj.pk])
+        return key, False
+
+
+def move_item(item, previous_id=None, next_id=None):
+    """Reorder an item within its category"""
+    result = move(item, Item.objects.filter(category_id=item.category_id), previous_id, next_id)
+    catalog_changed({item_key(item.pk), *([category_key(item.category_id)] if item.category_id else [])})
+    return result
+
+
+def move_image(image, previous_id=None, next_id=None):
+    """Reorder an image within its item's gallery"""
+    result = move(image, ItemImage.objects.filter(item_id=image.item_id), previous_id, next_id)
+    catalog_changed({item_key(image.item_id)})
+    return result
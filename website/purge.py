@@ -0,0 +1,112 @@
+"""
+Surrogate-key tagging and targeted purges for a reverse proxy / CDN.
+
+Public responses carry a ``Surrogate-Key`` header such as
+``catalog category-3 item-42``. When catalog rows change, the affected
+keys are queued, de-duplicated and sent in batches to
+``settings.CACHE_PURGE_URL`` from a background thread, with retries.
+"""
+import atexit
+import logging
+import threading
+import time
+import requests
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+CATALOG_KEY = 'catalog'
+
+
+def category_key(category_id):
+    return f'category-{category_id}'
+
+
+def item_key(item_id):
+    return f'item-{item_id}'
+
+
+def tag_response(response, keys):
+    """Add surrogate keys to a response, keeping any already present"""
+    header = settings.SURROGATE_KEY_HEADER
+    existing = response.get(header, '').split()
+    merged = list(dict.fromkeys([*existing, *keys]))
+    response[header] = ' '.join(merged)
+    return response
+
+
+class PurgeQueue:
+    """Collects keys and sends them to the proxy in de-duplicated batches"""
+
+    def __init__(self):
+        self.pending = set()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    def add(self, keys):
+        with self.condition:
+            self.pending.update(keys)
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='cache-purge', daemon=True)
+                self.thread.start()
+            if len(self.pending) >= settings.CACHE_PURGE_BATCH_SIZE:
+                self.condition.notify()
+
+    def take(self):
+        """Remove and return up to one batch of pending keys"""
+        with self.condition:
+            batch = sorted(self.pending)[:settings.CACHE_PURGE_BATCH_SIZE]
+            self.pending.difference_update(batch)
+            return batch
+
+    def run(self):
+        while True:
+            with self.condition:
+                # Give related writes (e.g. an import) a moment to pile up
+                self.condition.wait(timeout=settings.CACHE_PURGE_DELAY)
+            batch = self.take()
+            if batch:
+                self.send(batch)
+
+    def flush(self):
+        """Send everything still pending, synchronously"""
+        while True:
+            batch = self.take()
+            if not batch:
+                return
+            self.send(batch)
+
+    def send(self, keys):
+        """POST one batch, retrying with exponential backoff"""
+        headers = {**settings.CACHE_PURGE_HEADERS, settings.SURROGATE_KEY_HEADER: ' '.join(keys)}
+        for attempt in range(settings.CACHE_PURGE_RETRIES):
+            try:
+                response = requests.post(settings.CACHE_PURGE_URL, headers=headers, timeout=10)
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return True
+                logger.warning('Cache purge got HTTP %s (attempt %s)', response.status_code, attempt + 1)
+            except requests.RequestException as e:
+                if isinstance(e, requests.HTTPError):
+                    logger.error('Cache purge rejected: %s', e)
+                    return False
+                logger.warning('Cache purge failed (attempt %s): %s', attempt + 1, e)
+            time.sleep(min(2 ** attempt * 0.5, 30))
+
+        logger.error('Giving up purging %s keys: %s', len(keys), ' '.join(keys))
+        return False
+
+
+purge_queue = PurgeQueue()
+atexit.register(purge_queue.flush)
+
+
+def purge(keys):
+    """Queue surrogate keys for purging once the current transaction commits"""
+    if not settings.CACHE_PURGE_URL:
+        return
+    keys = set(keys)
+    if keys:
+        transaction.on_commit(lambda: purge_queue.add(keys))
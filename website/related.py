@@ -0,0 +1,130 @@
+"""
+Content-based related products for the ``compute_related`` command.
+
+Titles and descriptions are turned into TF-IDF vectors (titles count
+twice) and every item's nearest neighbours by cosine similarity are
+found in batches of matrix products, so memory stays at
+``batch_size x items`` similarities at a time. The TF-IDF matrix itself
+is sparse: a description uses a few dozen of the thousands of terms.
+"""
+import math
+import re
+from collections import Counter
+import numpy as np
+from scipy import sparse
+from .search import normalize
+
+
+# Russian words are cut to this many characters: a crude stemmer that
+# maps "компрессор", "компрессоры" and "компрессорные" to one term
+STEM_LENGTH = 7
+MIN_SCORE = 0.05
+
+STOP_WORDS = frozenset('''
+    и в во на с со для по от до из к ко о об а но или не без при под над
+    это как что так же все всех его ее их мм тг шт
+'''.split())
+
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def tokenize(text):
+    """Normalized, stop-word free, stemmed terms of ``text``"""
+    terms = []
+    for word in normalize(_TAG_RE.sub(' ', text or '')).split():
+        if len(word) < 2 or word in STOP_WORDS:
+            continue
+        terms.append(word[:STEM_LENGTH] if word.isalpha() else word)
+    return terms
+
+
+def document_terms(title, description):
+    """Terms of one item; the title is weighted twice"""
+    title_terms = tokenize(title)
+    return title_terms + title_terms + tokenize(description)
+
+
+def tfidf_matrix(documents, max_features=4096):
+    """
+    Build an L2-normalized float32 TF-IDF CSR matrix (one row per
+    document) over the ``max_features`` terms that occur in most documents.
+    """
+    counts = [Counter(terms) for terms in documents]
+    document_frequency = Counter()
+    for counter in counts:
+        document_frequency.update(counter.keys())
+
+    vocabulary = [
+        term for term, frequency in document_frequency.most_common(max_features)
+        # A term found in one document can't relate it to another
+        if frequency > 1
+    ]
+    columns = {term: column for column, term in enumerate(vocabulary)}
+
+    total = len(documents)
+    idf = np.array(
+        [math.log((1 + total) / (1 + document_frequency[term])) + 1 for term in vocabulary],
+        dtype=np.float32,
+    )
+
+    indptr, indices, data = [0], [], []
+    for counter in counts:
+        for term, count in counter.items():
+            column = columns.get(term)
+            if column is not None:
+                indices.append(column)
+                data.append((1 + math.log(count)) * idf[column])
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.array(data, dtype=np.float32), np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+        shape=(total, len(vocabulary)),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    matrix.data /= np.repeat(norms, np.diff(matrix.indptr)).astype(np.float32)
+    return matrix
+
+
+def nearest_neighbours(matrix, rows, top, batch_size=256):
+    """
+    Yield ``(row, [(other_row, score), ...])`` with the ``top`` most similar
+    other rows for each of ``rows``, best first.
+    """
+    rows = list(rows)
+    top = min(top, matrix.shape[0] - 1)
+    if top <= 0:
+        for row in rows:
+            yield row, []
+        return
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        scores = (matrix[batch] @ matrix.T).toarray()
+        scores[np.arange(len(batch)), batch] = -1  # never relate an item to itself
+
+        candidates = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+        for position, row in enumerate(batch):
+            picked = candidates[position]
+            picked = picked[np.argsort(-scores[position, picked])]
+            yield row, [
+                (int(other), float(scores[position, other]))
+                for other in picked
+                if scores[position, other] >= MIN_SCORE
+            ]
+
+
+def affected_rows(matrix, changed_rows, thresholds, batch_size=256):
+    """
+    Rows whose neighbour list may now include one of ``changed_rows``:
+    those more similar to a changed row than to their current last
+    neighbour (``thresholds[row]``).
+    """
+    affected = set()
+    changed_rows = list(changed_rows)
+    for start in range(0, len(changed_rows), batch_size):
+        batch = changed_rows[start:start + batch_size]
+        scores = (matrix[batch] @ matrix.T).toarray()
+        hits = np.nonzero((scores > thresholds[np.newaxis, :]) & (scores >= MIN_SCORE))[1]
+        affected.update(int(row) for row in hits)
+    return affected
@@ -0,0 +1,6 @@
+"""
+Crawling infrastructure for the product scrapers: URL normalization,
+the persistent frontier (``frontier.Frontier``), the per-site seeds and
+extractors, and the fetch/parse/write pipeline the ``crawl`` command
+runs them in.
+"""
@@ -0,0 +1,44 @@
+"""
+A fixed-size Bloom filter for the crawler's seen-URL set.
+
+Membership tests never touch the database. A false positive (rate
+``error_rate`` at ``capacity`` entries) makes the crawler skip a URL it
+has not seen; a negative is always right.
+"""
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Set of strings with no false negatives, sized for ``capacity`` entries"""
+
+    def __init__(self, capacity=100_000, error_rate=0.001):
+        capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + n * second) % self.size for n in range(self.hashes)]
+
+    def add(self, value):
+        """Add ``value``; returns False if it was (probably) there already"""
+        new = False
+        for position in self._positions(value):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                new = True
+        self.count += new
+        return new
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(value))
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,162 @@
+"""
+Declarative page extractors.
+
+A site describes its pages as XPath rules; each rule is compiled once,
+when the site is defined, and every page is parsed once with lxml. The
+result is a plain dict, so the crawl and the import commands share one
+definition of what a product, a price or a gallery looks like on a site
+instead of each guessing with its own ``find_all`` calls.
+
+``has_class`` keeps the rules readable: ``f'//div[{has_class("price")}]'``
+matches ``class="price"`` and ``class="item price big"`` but not
+``class="old-price"``.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+import lxml.html
+from bs4.dammit import EncodingDetector
+from lxml import etree
+
+_SPACE_RE = re.compile(r'\s+')
+_PRICE_RE = re.compile(r'\d[\d\s ]*(?:[.,]\d{1,2})?')
+
+
+def has_class(*names):
+    """XPath predicate: the element has any of the CSS classes ``names``"""
+    return ' or '.join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names
+    )
+
+
+@lru_cache(maxsize=None)
+def html_parser(encoding):
+    """
+    One parser per charset, reused for every page; comments and processing
+    instructions are dropped while parsing instead of being built into the tree
+    """
+    return lxml.html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True, collect_ids=False)
+
+
+def parse(content, encoding=None):
+    """
+    lxml tree of an HTML page. ``encoding`` is the charset from the HTTP
+    headers, if any; otherwise the page's own declaration, or UTF-8.
+    """
+    if not content or not content.strip():
+        return None
+    encoding = encoding or EncodingDetector.find_declared_encoding(content, is_html=True) or 'utf-8'
+    try:
+        return lxml.html.document_fromstring(content, parser=html_parser(encoding.lower()))
+    except (etree.ParserError, LookupError, ValueError):
+        return None
+
+
+def response_encoding(response):
+    """Charset a ``requests`` response declares in its headers, or None"""
+    if 'charset' in response.headers.get('content-type', '').lower():
+        return response.encoding
+    return None
+
+
+def text(value):
+    """Whitespace-collapsed text of an element, or an attribute/text result"""
+    if isinstance(value, etree._Element):
+        value = value.text_content()
+    return _SPACE_RE.sub(' ', str(value)).strip()
+
+
+def price(value):
+    """``'1 250 000,50 ₸'`` -> Decimal('1250000.50'); None if there is no number"""
+    match = _PRICE_RE.search(text(value))
+    if not match:
+        return None
+    try:
+        return Decimal(re.sub(r'[\s ]', '', match.group()).replace(',', '.'))
+    except InvalidOperation:
+        return None
+
+
+def image_source(element):
+    """URL of an ``<img>`` (lazy-loading attributes included) or a ``<source>``"""
+    if element.tag == 'source':
+        srcset = element.get('srcset') or ''
+        return srcset.split(',')[0].strip().split(' ')[0]
+    src = element.get('src') or element.get('data-src') or element.get('data-lazy-src') or ''
+    return '' if 'picture.loading' in src else src
+
+
+class Field:
+    """
+    The first value of ``xpath`` in a node, or with ``many`` every value
+    (``many=3``: at most three), each passed through ``clean``; empty
+    values are skipped. ``fallbacks`` are tried in order when ``xpath``
+    finds nothing, and ``join`` glues multiple values into one string.
+    """
+
+    def __init__(self, xpath, *fallbacks, many=False, clean=text, join=None):
+        self.xpaths = [etree.XPath(path) for path in (xpath, *fallbacks)]
+        self.many = many
+        self.limit = many if many is not True else None
+        self.clean = clean
+        self.join = join
+
+    def __call__(self, node):
+        for xpath in self.xpaths:
+            values = []
+            for result in xpath(node):
+                value = self.clean(result)
+                if not value:
+                    continue
+                if not self.many:
+                    return value
+                values.append(value)
+                if len(values) == self.limit:
+                    break
+            if values:
+                return self.join.join(values) if self.join is not None else values
+        return None if not self.many or self.join is not None else []
+
+
+class Listing:
+    """
+    Product cards on a catalog page: ``section`` elements, each named by
+    ``name``, holding ``card`` elements whose ``fields`` are relative to
+    the card. Without ``section`` the whole page is one unnamed section.
+    """
+
+    def __init__(self, card, fields, section=None, name=None):
+        self.section = etree.XPath(section) if section else None
+        self.name = name
+        self.card = etree.XPath(card)
+        self.fields = fields
+
+    def __call__(self, doc):
+        sections = self.section(doc) if self.section is not None else [doc]
+        result = []
+        for section in sections:
+            name = self.name(section) if self.name else None
+            cards = []
+            for card in self.card(section):
+                values = {key: field(card) for key, field in self.fields.items()}
+                if values.get('title'):
+                    cards.append(values)
+            result.append((name, cards))
+        return result
+
+
+class Extractor:
+    """
+    Rules for one site: ``links`` to follow, ``product`` fields of a
+    product page (``title`` is required for a page to count as one), and
+    optionally a ``listing`` of product cards on catalog pages.
+    """
+
+    def __init__(self, links, product, listing=None):
+        self.links = links
+        self.product_fields = product
+        self.listing = listing
+
+    def product(self, doc):
+        values = {key: field(doc) for key, field in self.product_fields.items()}
+        return values if values.get('title') else None
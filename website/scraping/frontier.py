@@ -0,0 +1,187 @@
+"""
+Persistent crawl frontier.
+
+Every discovered URL is a ``CrawlURL`` row, unique per crawl by the hash
+of its normalized form, so a crawl can be stopped at any point and
+resumed by running it again. In memory the frontier keeps:
+
+* a Bloom filter of every URL already in the table, so the links found
+  on each page are deduplicated without a query per link;
+* one queue per host, filled in batches of pending rows by priority and
+  depth, and served round-robin with a per-host delay, so one slow or
+  large site doesn't starve the others and no host is hit back to back.
+
+Fetch results are written back in batches (checkpoints). Pages fetched
+after the last checkpoint are fetched again on resume.
+"""
+import time
+from collections import deque
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+from website.models import CrawlURL
+from .bloom import BloomFilter
+from .urls import normalize_url, url_hash, url_host
+
+
+RESULT_FIELDS = ['status', 'attempts', 'http_status', 'content_hash', 'last_fetched']
+
+
+class Frontier:
+    """Queue of pages to fetch for one named crawl"""
+
+    def __init__(self, crawl, max_depth=3, delay=1.0, batch_size=500, checkpoint_every=50,
+                 max_attempts=3, bloom_capacity=200_000):
+        self.crawl = crawl
+        self.max_depth = max_depth
+        self.delay = delay
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+        self.max_attempts = max_attempts
+
+        self.seen = BloomFilter(bloom_capacity)
+        self.queues = {}
+        self.ready_at = {}
+        self.queued = set()
+        self.results = []
+        self.exhausted = False
+
+    def rows(self):
+        return CrawlURL.objects.filter(crawl=self.crawl)
+
+    def open(self, recrawl_after=None):
+        """
+        Load the seen set from the table. With ``recrawl_after`` (a
+        timedelta), pages fetched longer ago than that are queued again.
+        """
+        if recrawl_after is not None:
+            self.rows().filter(
+                status__in=['done', 'failed'],
+                last_fetched__lt=timezone.now() - recrawl_after,
+            ).update(status='pending', attempts=0)
+
+        for value in self.rows().values_list('url_hash', flat=True).iterator():
+            self.seen.add(value)
+        return self
+
+    def add(self, urls, depth=0, priority=0, base=None, follow=None, normalized=False):
+        """
+        Queue new URLs, normalized against ``base`` (unless ``normalized``
+        already) and kept if ``follow`` accepts them. ``priority`` is a
+        number or a function of the URL. Returns how many were new.
+        """
+        if depth > self.max_depth:
+            return 0
+
+        rows = {}
+        for url in urls:
+            if not normalized:
+                url = normalize_url(url, base)
+            if url is None or (follow is not None and not follow(url)):
+                continue
+            key = url_hash(url)
+            if key in rows or not self.seen.add(key):
+                continue
+            rows[key] = CrawlURL(
+                crawl=self.crawl, url=url, url_hash=key, host=url_host(url),
+                depth=depth, priority=priority(url) if callable(priority) else priority,
+            )
+        if rows:
+            # Another run may have found some of them: the unique
+            # constraint decides
+            CrawlURL.objects.bulk_create(rows.values(), ignore_conflicts=True)
+            self.exhausted = False
+        return len(rows)
+
+    def refill(self):
+        """Load the next batch of pending rows into the host queues"""
+        batch = list(
+            self.rows().filter(status='pending')
+            .exclude(id__in=self.queued)
+            .order_by('-priority', 'depth', 'id')
+            .only('id', 'url', 'host', 'depth', 'priority', 'attempts', 'content_hash')[:self.batch_size]
+        )
+        for row in batch:
+            self.queued.add(row.id)
+            self.queues.setdefault(row.host, deque()).append(row)
+        self.exhausted = not batch
+        return len(batch)
+
+    def next(self, block=True):
+        """
+        Return the next ``CrawlURL`` to fetch, waiting for a host's delay
+        if every host with work was hit too recently; None when done. With
+        ``block=False``, None also means no host is ready yet.
+        """
+        if not any(self.queues.values()):
+            if self.exhausted or not self.refill():
+                return None
+
+        hosts = [host for host, queue in self.queues.items() if queue]
+        host = min(hosts, key=lambda host: self.ready_at.get(host, 0))
+        wait = self.ready_at.get(host, 0) - time.monotonic()
+        if wait > 0:
+            if not block:
+                return None
+            time.sleep(wait)
+
+        self.ready_at[host] = time.monotonic() + self.delay
+        return self.queues[host].popleft()
+
+    def done(self):
+        """Nothing queued and nothing pending in the table"""
+        if any(self.queues.values()):
+            return False
+        return self.exhausted or not self.refill()
+
+    def complete(self, row, status, http_status=None, content_hash=None, retry=True):
+        """
+        Record a fetch result. A failed fetch goes back to pending until
+        it has been tried ``max_attempts`` times, unless ``retry`` is off.
+        """
+        row.attempts += 1
+        if status == 'failed' and retry and row.attempts < self.max_attempts:
+            status = 'pending'
+        row.status = status
+        row.http_status = http_status
+        if content_hash is not None:
+            row.content_hash = content_hash
+        row.last_fetched = timezone.now()
+        self.results.append(row)
+        if self.checkpoint_every and len(self.results) >= self.checkpoint_every:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write buffered fetch results"""
+        if not self.results:
+            return 0
+        # One prepared UPDATE run for every row: bulk_update() would build
+        # a CASE expression per field and row
+        fields = [CrawlURL._meta.get_field(name) for name in RESULT_FIELDS]
+        connection = connections[self.rows().db]
+        sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+            connection.ops.quote_name(CrawlURL._meta.db_table),
+            ', '.join(f'{connection.ops.quote_name(field.column)} = %s' for field in fields),
+            connection.ops.quote_name(CrawlURL._meta.pk.column),
+        )
+        params = [
+            [field.get_db_prep_save(getattr(row, field.attname), connection) for field in fields] + [row.pk]
+            for row in self.results
+        ]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.executemany(sql, params)
+        # Until written, their rows still read as pending: keep them out
+        # of refill() until now
+        self.queued.difference_update(row.id for row in self.results)
+        if any(row.status == 'pending' for row in self.results):
+            # Failed pages to retry
+            self.exhausted = False
+        written = len(self.results)
+        self.results = []
+        return written
+
+    def stats(self):
+        """``{status: count}`` for this crawl"""
+        counts = {status: 0 for status, _ in CrawlURL.STATUS_CHOICES}
+        counts.update(self.rows().order_by().values_list('status').annotate(Count('id')))
+        return counts
@@ -0,0 +1,299 @@
+"""
+Three-stage scraping pipeline over a crawl frontier.
+
+* fetch: a few threads download pages (I/O bound);
+* parse: a process pool hashes and parses them and extracts links and
+  products (CPU bound), see ``worker.parse_page``;
+* write: the calling thread, the only one touching the database, adds
+  links to the frontier, stores products and records fetch results in
+  one transaction per batch of pages.
+
+The stages are joined by bounded queues, and at most ``2 * workers``
+pages are being parsed at once, so a slow stage makes the ones before
+it wait instead of piling pages up in memory. The frontier (and its
+per-host delay) decides what is fetched next.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import requests
+from django.db import transaction
+from .extractors import response_encoding
+from .worker import init_worker, parse_page
+
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+FETCH_TIMEOUT = 10
+
+# How long the writer waits for a result before checking the frontier again
+POLL_INTERVAL = 0.05
+
+
+class StageStats:
+    """Items handled by a stage and the time spent on them"""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, elapsed):
+        with self.lock:
+            self.items += 1
+            self.busy += elapsed
+
+
+class StatsQueue(queue.Queue):
+    """Bounded queue that samples its depth on every put"""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.samples = 0
+        self.total_depth = 0
+        self.max_depth = 0
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        depth = self.qsize()
+        with self.mutex:
+            self.samples += 1
+            self.total_depth += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    @property
+    def average_depth(self):
+        return self.total_depth / self.samples if self.samples else 0.0
+
+
+class Pipeline:
+    """
+    Crawl ``site`` from ``frontier``. ``save`` gets each batch of product
+    dicts inside the batch's transaction (None: products are not stored).
+    """
+
+    def __init__(self, site, frontier, save=None, fetchers=4, workers=None, queue_size=32,
+                 batch_size=50, max_pages=None, log=None):
+        self.site = site
+        self.frontier = frontier
+        self.save = save
+        self.fetchers = fetchers
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_pages = max_pages
+        self.log = log or (lambda message: None)
+
+        self.fetch_queue = StatsQueue(queue_size)
+        self.parse_queue = StatsQueue(queue_size)
+        self.write_queue = StatsQueue(queue_size)
+        self.stats = {name: StageStats(name) for name in ('fetch', 'parse', 'write')}
+
+        self.rows = {}
+        self.flushing = False
+        self.stopping = False
+        self.dispatched = 0
+        self.links = []
+        self.products = []
+        self.counts = {'pages': 0, 'products': 0, 'unchanged': 0, 'failed': 0}
+        self.elapsed = 0.0
+
+    # fetch stage (threads)
+
+    def fetch_loop(self):
+        session = requests.Session()
+        session.headers.update(HEADERS)
+        while True:
+            page = self.fetch_queue.get()
+            if page is None:
+                return
+            start = time.perf_counter()
+            try:
+                response = session.get(page['url'], timeout=FETCH_TIMEOUT)
+            except requests.RequestException as e:
+                page.update(status='failed', error=str(e))
+            else:
+                page['http_status'] = response.status_code
+                if response.status_code >= 400:
+                    # Server errors are worth another try, missing pages are not
+                    page.update(status='failed', error=f'HTTP {response.status_code}',
+                                retry=response.status_code >= 500)
+                elif 'html' not in response.headers.get('content-type', 'text/html'):
+                    page['status'] = 'skipped'
+                else:
+                    page.update(content=response.content, final_url=response.url,
+                                encoding=response_encoding(response))
+            self.stats['fetch'].add(time.perf_counter() - start)
+            self.parse_queue.put(page)
+
+    # parse stage (a dispatcher thread feeding the process pool)
+
+    def parse_loop(self, pool, slots):
+        while True:
+            page = self.parse_queue.get()
+            if page is None:
+                return
+            if 'content' not in page:
+                self.write_queue.put(page)
+                continue
+            slots.acquire()
+            future = pool.submit(
+                parse_page, self.site.name, page.pop('content'), page['final_url'],
+                page.pop('encoding'), page['previous_hash'],
+            )
+            future.add_done_callback(lambda future, page=page: self.parsed(page, future, slots))
+
+    def parsed(self, page, future, slots):
+        slots.release()
+        try:
+            result = future.result()
+        except Exception as e:
+            page.update(status='failed', error=f'parse error: {e!r}')
+        else:
+            self.stats['parse'].add(result.pop('elapsed'))
+            page.update(result, status='done')
+        if not self.stopping:
+            self.write_queue.put(page)
+
+    # write stage (the calling thread)
+
+    def feed(self):
+        """Hand ready frontier rows to the fetchers while there is room"""
+        while not self.fetch_queue.full():
+            if self.max_pages is not None and self.dispatched >= self.max_pages:
+                return
+            row = self.frontier.next(block=False)
+            if row is None:
+                return
+            if not self.site.allowed(row.url):
+                self.frontier.complete(row, 'skipped')
+                continue
+            self.rows[row.id] = row
+            self.dispatched += 1
+            self.fetch_queue.put({'id': row.id, 'url': row.url, 'previous_hash': row.content_hash})
+
+    def finished(self):
+        if self.rows:
+            return False
+        if self.max_pages is not None and self.dispatched >= self.max_pages:
+            return True
+        if self.links or self.frontier.results:
+            # The last pages' links may be all that is left to crawl
+            self.flush()
+        return self.frontier.done()
+
+    def write(self, page):
+        start = time.perf_counter()
+        row = self.rows.pop(page['id'])
+        self.counts['pages'] += 1
+
+        if page['status'] == 'failed':
+            self.counts['failed'] += 1
+            self.log(f'  [!] {row.url}: {page["error"]}')
+            self.frontier.complete(row, 'failed', page.get('http_status'), retry=page.get('retry', True))
+        elif page['status'] == 'skipped':
+            self.frontier.complete(row, 'skipped', page.get('http_status'))
+        else:
+            if page['unchanged']:
+                self.counts['unchanged'] += 1
+            if page['links']:
+                self.links.append((page['links'], row.depth + 1))
+            if page['product']:
+                self.counts['products'] += 1
+                self.products.append(page['product'])
+                self.log(f'  [+] {page["product"]["title"]}')
+            # The hash lets the next crawl skip an unchanged page, so a
+            # product page only gets it when its product is being stored
+            stored = not page['product'] or self.save is not None
+            self.frontier.complete(row, 'done', page['http_status'], page['content_hash'] if stored else None)
+
+        self.stats['write'].add(time.perf_counter() - start)
+        if len(self.frontier.results) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write a batch: new links, products and fetch results in one transaction"""
+        start = time.perf_counter()
+        self.flushing = True
+        with transaction.atomic():
+            for links, depth in self.links:
+                # Normalized and filtered by the parse stage
+                self.frontier.add(links, depth=depth, priority=self.site.priority, normalized=True)
+            if self.products and self.save is not None:
+                self.save(self.products)
+            self.frontier.checkpoint()
+        self.flushing = False
+        self.links = []
+        self.products = []
+        self.stats['write'].busy += time.perf_counter() - start
+
+    def run(self):
+        started = time.perf_counter()
+        slots = threading.BoundedSemaphore(2 * (self.workers or 1))
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        threads = [
+            threading.Thread(target=self.fetch_loop, name=f'fetch-{n}', daemon=True)
+            for n in range(self.fetchers)
+        ]
+        threads.append(threading.Thread(target=self.parse_loop, args=(pool, slots), name='parse', daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                self.feed()
+                if self.finished():
+                    break
+                try:
+                    page = self.write_queue.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    # Idle: don't keep finished pages unwritten
+                    if self.frontier.results:
+                        self.flush()
+                    continue
+                self.write(page)
+        finally:
+            # On Ctrl+C pages still in flight stay pending and are
+            # fetched again next time. So do the pages of a batch whose
+            # write was interrupted: it rolled back, but the frontier's
+            # seen set already has their links, so it is not retried.
+            if not self.flushing:
+                self.flush()
+            self.stop(pool)
+            self.elapsed = time.perf_counter() - started
+
+    def stop(self, pool):
+        self.stopping = True
+        for stage_queue, count in ((self.fetch_queue, self.fetchers), (self.parse_queue, 1)):
+            # Unprocessed pages are dropped to make room for the sentinels
+            while True:
+                try:
+                    stage_queue.get_nowait()
+                except queue.Empty:
+                    break
+            for _ in range(count):
+                stage_queue.put_nowait(None)
+        # Unblocks a parse callback waiting for room in the write queue
+        while True:
+            try:
+                self.write_queue.get_nowait()
+            except queue.Empty:
+                break
+        pool.shutdown(wait=not self.rows, cancel_futures=True)
+
+    def report(self):
+        """Lines with per-stage throughput and queue depths"""
+        wall = self.elapsed or 1e-9
+        queues = {'fetch': self.fetch_queue, 'parse': self.parse_queue, 'write': self.write_queue}
+        lines = [f'  {"stage":<8} {"items":>7} {"busy, s":>9} {"items/s":>9}   queue depth (max / avg)']
+        for name, stats in self.stats.items():
+            depth = queues[name]
+            lines.append(
+                f'  {name:<8} {stats.items:>7} {stats.busy:>9.2f} {stats.items / wall:>9.1f}'
+                f'   {depth.max_depth:>3} / {depth.average_depth:.1f}'
+            )
+        lines.append(f'  {"total":<8} {self.counts["pages"]:>7} {wall:>9.2f} {self.counts["pages"] / wall:>9.1f}')
+        return lines
@@ -0,0 +1,198 @@
+"""
+Registry of the sites the scrapers know: where to start, which links to
+follow, and the extractor rules for their catalog and product pages.
+
+``Site.extract(content, url)`` returns ``(links, product)``: the hrefs to
+queue and, on a product page, a dict with ``title``, ``category``,
+``description``, ``price`` and ``images``. ``Site.listing(content)``
+returns the product cards of a catalog page grouped by category.
+"""
+import re
+from urllib.parse import urlsplit
+from .extractors import Extractor, Field, Listing, has_class, image_source, parse, price
+from .urls import normalize_url, url_host
+
+
+# Product pages on chkz.kz that the image scraper has always started from
+CHKZ_PRODUCT_URLS = {
+    'ДЭН "СТАНДАРТ"': '/catalog/vintovye_kompressornye_ustanovki_tipa_den_standart_/',
+    'ДЭН "ОПТИМ"': '/catalog/vintovye_kompressornye_ustanovki_s_chastotnym_regulirovaniem_den_optim/',
+    'ДЭН "ВОЛЬТ"': '/catalog/vintovye_kompressornye_ustanovki_s_vysokovoltnym_dvigatelem_den_volt/',
+    'ДЭН "ШАХТЕР"': '/catalog/den_shm_shakhter/',
+    'КВ (дизельные)': '/catalog/dizelnye_vintovye_kompressornye_ustanovki_tipa_kv/',
+}
+
+# Links that never lead to products
+SKIP_PATH_RE = re.compile(
+    r'\.(jpe?g|png|gif|webp|svg|pdf|docx?|xlsx?|zip|rar)$|/(basket|cart|personal|auth|login|search|bitrix)/',
+    re.IGNORECASE,
+)
+
+NAVIGATION_WORDS = ('главная', 'каталог', 'контакты', 'о компании', 'menu', 'navigation')
+
+# Rules every site shares
+LINKS = Field('//a/@href', many=True)
+BREADCRUMBS = Field(
+    f'//*[{has_class("breadcrumb", "breadcrumbs", "bx-breadcrumb")} or contains(@itemtype, "BreadcrumbList")]//a',
+    many=True,
+)
+PAGE_IMAGES = '//img | //picture/source'
+PARAGRAPHS = '//p[string-length(normalize-space()) > 20]'
+
+
+def is_navigation(title):
+    return len(title) < 3 or title.lower() in NAVIGATION_WORDS
+
+
+class Site:
+    """Crawl settings and extractor rules for one site"""
+
+    def __init__(self, name, seeds, product_path, follow_path, default_category, extractor,
+                 description_prefix='Компрессорное оборудование'):
+        self.name = name
+        self.seeds = seeds
+        self.hosts = {url_host(seed) for seed in seeds}
+        self.product_path = re.compile(product_path)
+        self.follow_path = re.compile(follow_path)
+        self.default_category = default_category
+        self.extractor = extractor
+        self.description_prefix = description_prefix
+
+    def allowed(self, url):
+        path = urlsplit(url).path
+        return (
+            url_host(url) in self.hosts
+            and bool(self.follow_path.search(path))
+            and not SKIP_PATH_RE.search(path)
+        )
+
+    def is_product(self, url):
+        return bool(self.product_path.search(urlsplit(url).path))
+
+    def priority(self, url):
+        """Product pages first, so a limited run still yields products"""
+        return 10 if self.is_product(url) else 0
+
+    def follow_links(self, links, base):
+        """Normalized, deduplicated ``links`` (resolved against ``base``) this crawl follows"""
+        result = {}
+        for link in links:
+            url = normalize_url(link, base)
+            if url is not None and url not in result and self.allowed(url):
+                result[url] = None
+        return list(result)
+
+    def default_description(self, title):
+        return f'{self.description_prefix} {title}'
+
+    def extract(self, content, url, encoding=None):
+        doc = parse(content, encoding)
+        if doc is None:
+            return [], None
+        links = self.extractor.links(doc)
+        if not self.is_product(url):
+            return links, None
+
+        product = self.extractor.product(doc)
+        if product is None or is_navigation(product['title']):
+            return links, None
+        crumbs = [crumb for crumb in product.pop('breadcrumbs', None) or [] if not is_navigation(crumb)]
+        product['category'] = crumbs[-1] if crumbs else self.default_category
+        product['description'] = product.get('description') or self.default_description(product['title'])
+        product.setdefault('price', None)
+        product.setdefault('images', [])
+        return links, product
+
+    def images(self, content, encoding=None):
+        """Image URLs of a product page"""
+        doc = parse(content, encoding)
+        return self.extractor.product_fields['images'](doc) if doc is not None else []
+
+    def listing(self, content, encoding=None):
+        """``[(category name, [card, ...]), ...]`` for a catalog page"""
+        doc = parse(content, encoding)
+        if doc is None or self.extractor.listing is None:
+            return []
+        sections = []
+        for name, cards in self.extractor.listing(doc):
+            cards = [card for card in cards if not is_navigation(card['title'])]
+            for card in cards:
+                card['description'] = card.get('description') or self.default_description(card['title'])
+            sections.append((name or self.default_category, cards))
+        return sections
+
+
+SITES = {}
+
+
+def register(site):
+    SITES[site.name] = site
+    return site
+
+
+register(Site(
+    name='chkz',
+    seeds=['https://chkz.kz/catalog/'] + [f'https://chkz.kz{path}' for path in CHKZ_PRODUCT_URLS.values()],
+    product_path=r'^/catalog/[^/]+/$',
+    follow_path=r'^/catalog/',
+    default_category='Компрессоры',
+    extractor=Extractor(
+        links=LINKS,
+        product={
+            'title': Field('//h1'),
+            'breadcrumbs': BREADCRUMBS,
+            'description': Field(
+                f'//*[{has_class("detail-text", "catalog-detail-text", "product-description", "description")}]',
+                PARAGRAPHS, many=3, join=' ',
+            ),
+            'price': Field(f'//*[{has_class("price", "product-price", "catalog-detail-price")}]', clean=price),
+            'images': Field(
+                f'//*[{has_class("detail-picture", "catalog-detail-pictures", "product-gallery")}]'
+                '//*[self::img or self::source]',
+                PAGE_IMAGES, many=True, clean=image_source,
+            ),
+        },
+        listing=Listing(
+            section=(
+                f'//div[{has_class("catalog-section")}] | //section[{has_class("products")}]'
+                f' | //div[{has_class("product-category")}]'
+            ),
+            name=Field('.//h2 | .//h3 | .//h4'),
+            card=f'.//*[self::div or self::a][{has_class("product-item", "product-card", "catalog-item")}]',
+            fields={
+                'title': Field(f'.//*[{has_class("product-title", "product-name", "title")}]', './/h3 | .//h4 | .//h5'),
+                'description': Field(f'.//*[{has_class("description", "product-description", "excerpt")}]'),
+                'price': Field(f'.//*[{has_class("price", "product-price")}]', clean=price),
+                'url': Field('./@href | .//a/@href'),
+            },
+        ),
+    ),
+))
+
+register(Site(
+    name='ts2006',
+    seeds=['https://ts2006.kz/'],
+    product_path=r'^/(catalog|product|products)/.+',
+    follow_path=r'^/',
+    default_category='Компрессоры',
+    description_prefix='Промышленное оборудование',
+    extractor=Extractor(
+        links=LINKS,
+        product={
+            'title': Field('//h1'),
+            'breadcrumbs': BREADCRUMBS,
+            'description': Field(PARAGRAPHS, many=3, join=' '),
+            'price': Field(f'//*[{has_class("price", "product-price")}]', clean=price),
+            'images': Field(PAGE_IMAGES, many=True, clean=image_source),
+        },
+        listing=Listing(
+            card=f'//*[self::div or self::article or self::section][{has_class("product", "item", "card")}]',
+            fields={
+                'title': Field('.//h1 | .//h2 | .//h3 | .//h4'),
+                'description': Field('.//p[string-length(normalize-space()) > 20]', many=3, join=' '),
+                'price': Field(f'.//*[{has_class("price", "product-price")}]', clean=price),
+                'url': Field('./@href | .//a/@href'),
+            },
+        ),
+    ),
+))
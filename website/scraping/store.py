@@ -0,0 +1,16 @@
+"""
+Writer side of the scrapers: turning extracted product dicts into
+catalog rows, one batch at a time.
+"""
+from website.sync import sync_catalog
+
+
+def save_products(products, source):
+    """
+    Sync a batch of products from ``source`` into the catalog: new titles
+    are created and items whose page changed since the last crawl are
+    updated, with one statement each (see ``website.sync``). A batch is
+    only part of the site, so nothing is reported missing. Returns the
+    ``SyncResult``.
+    """
+    return sync_catalog(products, source, find_missing=False)
@@ -0,0 +1,65 @@
+"""
+URL normalization for the crawl frontier: one spelling per page, so that
+``https://CHKZ.kz:443/catalog/?utm_source=x#top`` and
+``https://chkz.kz/catalog/`` are crawled once.
+"""
+import hashlib
+import posixpath
+import re
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# Query parameters that never change the page content
+IGNORED_PARAMS = frozenset({
+    'fbclid', 'gclid', 'yclid', 'ysclid', '_openstat', 'from', 'ref',
+    'phpsessid', 'sessionid', 'sid',
+})
+
+
+def normalize_url(url, base=None):
+    """
+    Absolute, canonical form of ``url`` (resolved against ``base``), or
+    None for links the crawler can't follow (mailto:, javascript:, ...).
+    """
+    url = (url or '').strip()
+    if base:
+        url = urljoin(base, url)
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f'{host}:{port}'
+
+    path = parts.path or '/'
+    trailing = path.endswith('/')
+    path = posixpath.normpath(re.sub('/{2,}', '/', path))
+    if trailing and not path.endswith('/'):
+        path += '/'
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in IGNORED_PARAMS and not key.lower().startswith('utm_')
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+def url_host(url):
+    return urlsplit(url).netloc
+
+
+def url_hash(url):
+    """Fixed-length key for a normalized URL (unique per crawl)"""
+    return hashlib.sha1(url.encode()).hexdigest()
@@ -0,0 +1,41 @@
+"""
+Parse/extract stage of the scraping pipeline, run in worker processes.
+
+Workers receive the raw bytes of a page and return a plain dict, so
+nothing but bytes and builtins crosses the process boundary. This module
+must not import Django: spawned workers (the default on Windows and
+macOS) import it without settings configured.
+"""
+import hashlib
+import signal
+import time
+from .sites import SITES
+
+
+def init_worker():
+    # Ctrl+C goes to the whole process group; the main process handles it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def parse_page(site_name, content, url, encoding=None, previous_hash=''):
+    """
+    ``{'content_hash', 'unchanged', 'links', 'product', 'elapsed'}`` for a
+    fetched page; links come normalized and filtered. A page whose hash
+    matches ``previous_hash`` is not parsed: its links are in the
+    frontier already.
+    """
+    start = time.perf_counter()
+    content_hash = hashlib.sha256(content).hexdigest()
+    links, product = [], None
+    unchanged = content_hash == previous_hash
+    if not unchanged:
+        site = SITES[site_name]
+        links, product = site.extract(content, url, encoding)
+        links = site.follow_links(links, url)
+    return {
+        'content_hash': content_hash,
+        'unchanged': unchanged,
+        'links': links,
+        'product': product,
+        'elapsed': time.perf_counter() - start,
+    }
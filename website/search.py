@@ -0,0 +1,118 @@
+"""
+In-memory prefix index for typeahead suggestions.
+
+Every product title and category name is normalized (lowercase, ``ё`` ->
+``е``, punctuation -> spaces) and indexed from the start of each word,
+both as written and transliterated to Latin, so "дэн", "оптим" and "den"
+all find «ДЭН "ОПТИМ"». Keys live in one sorted list; a query is a
+bisect plus a short scan over the keys that start with it.
+
+The index is built from the catalog snapshot and rebuilt with it when
+the catalog version changes.
+"""
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from .slugs import transliterate
+from .snapshot import get_snapshot
+
+
+# Matches are scanned in key order; stop after this many to bound the
+# cost of one-letter queries
+SCAN_LIMIT = 500
+# Keys (and queries) are cut to this length to bound memory; longer
+# queries are matched on their first characters
+MAX_KEY_LENGTH = 32
+
+_NON_WORD_RE = re.compile(r'[^\w]+')
+
+
+def normalize(text):
+    """Lowercase, fold ё and compatibility forms, turn punctuation into spaces"""
+    text = unicodedata.normalize('NFKC', text or '').lower().replace('ё', 'е')
+    return ' '.join(_NON_WORD_RE.sub(' ', text).replace('_', ' ').split())
+
+
+def _word_suffixes(text):
+    """``'a b c'`` -> ``['a b c', 'b c', 'c']``"""
+    words = text.split()
+    return [' '.join(words[n:]) for n in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted ``(key, position, entry)`` triples over titles and their transliterations"""
+    __slots__ = ('version', 'keys', 'refs', 'entries')
+
+    def __init__(self, version, entries):
+        self.version = version
+        self.entries = tuple(entries)
+
+        pairs = set()
+        for number, (_, record, text) in enumerate(self.entries):
+            normalized = normalize(text)
+            for form in {normalized, normalize(transliterate(normalized))}:
+                for position, suffix in enumerate(_word_suffixes(form)):
+                    pairs.add((suffix[:MAX_KEY_LENGTH], position, number))
+
+        pairs = sorted(pairs)
+        self.keys = [key for key, _, _ in pairs]
+        self.refs = [(position, number) for _, position, number in pairs]
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        entries = [('category', category, category.name) for category in snapshot.categories]
+        entries += [('item', item, item.title) for item in snapshot.items_by_slug.values()]
+        return cls(snapshot.version, entries)
+
+    def search(self, query, limit):
+        """
+        Return ``(items, categories)`` whose title has a word starting with
+        ``query``. Titles that start with it rank first, then featured
+        items, then catalog order.
+        """
+        query = normalize(query)[:MAX_KEY_LENGTH]
+        if not query:
+            return [], []
+
+        best = {}
+        start = bisect_left(self.keys, query)
+        for index in range(start, min(start + SCAN_LIMIT, len(self.keys))):
+            if not self.keys[index].startswith(query):
+                break
+            position, number = self.refs[index]
+            if position < best.get(number, position + 1):
+                best[number] = position
+
+        ranked = []
+        for number, position in best.items():
+            kind, record, _ = self.entries[number]
+            # The second element keeps the two kinds' tuples comparable
+            if kind == 'item':
+                rank = (position > 0, 1, not record.featured, record.order, record.id)
+            else:
+                rank = (position > 0, 0, record.name)
+            ranked.append((kind, rank, record))
+        ranked.sort(key=lambda match: match[1])
+
+        items = [record for kind, _, record in ranked if kind == 'item'][:limit]
+        categories = [record for kind, _, record in ranked if kind == 'category'][:limit]
+        return items, categories
+
+
+_index = None
+_lock = threading.Lock()
+
+
+def get_index():
+    """Return the prefix index for the current catalog snapshot"""
+    global _index
+    snapshot = get_snapshot()
+    index = _index
+    if index is not None and index.version == snapshot.version:
+        return index
+
+    with _lock:
+        if _index is None or _index.version != snapshot.version:
+            _index = PrefixIndex.from_snapshot(snapshot)
+        return _index
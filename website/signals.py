@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_migrate, post_save, pre_delete
+from django.dispatch import receiver
+from . import changes, fulltext
+from .catalog import bump_catalog_version, bump_category_version
+from .models import Category, Item, ItemImage
+from .purge import CATALOG_KEY, category_key, item_key, purge
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, using, **kwargs):
+    # After the commit: a snapshot rebuilt before it would read the old
+    # rows and store them under the new version
+    transaction.on_commit(bump_category_version, using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=ItemImage)
+@receiver(post_delete, sender=ItemImage)
+def catalog_changed(sender, using, **kwargs):
+    transaction.on_commit(bump_catalog_version, using=using)
+
+
+@receiver(post_init, sender=Item)
+def remember_item_category(sender, instance, **kwargs):
+    # Lets item_purge also purge the category an item was moved out of.
+    # Read __dict__ directly so a deferred field is not loaded.
+    instance._loaded_category_id = instance.__dict__.get('category_id')
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def item_purge(sender, instance, **kwargs):
+    keys = {item_key(instance.pk)}
+    for category_id in (instance.category_id, getattr(instance, '_loaded_category_id', None)):
+        if category_id:
+            keys.add(category_key(category_id))
+    instance._loaded_category_id = instance.category_id
+    purge(keys)
+
+
+@receiver(post_save, sender=ItemImage)
+@receiver(post_delete, sender=ItemImage)
+def item_image_purge(sender, instance, **kwargs):
+    purge({item_key(instance.item_id)})
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_purge(sender, instance, **kwargs):
+    # Category names appear in the navigation of every page
+    purge({CATALOG_KEY, category_key(instance.pk)})
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=ItemImage)
+@receiver(post_delete, sender=ItemImage)
+def record_change(sender, instance, **kwargs):
+    changes.record(sender, [instance.pk])
+
+
+@receiver(pre_delete, sender=Category)
+def record_category_items(sender, instance, **kwargs):
+    # Its items lose their category through an UPDATE that sends no signals
+    changes.record_queryset(instance.items.all())
+
+
+@receiver(post_migrate)
+def install_fulltext(sender, using, **kwargs):
+    if sender.name == 'website':
+        fulltext.install(using)
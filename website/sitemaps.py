@@ -0,0 +1,36 @@
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+from .models import Item
+
+
+class StaticViewSitemap(Sitemap):
+    """Sitemap for pages without a model"""
+    changefreq = 'daily'
+    priority = 1.0
+
+    def items(self):
+        return ['index']
+
+    def location(self, item):
+        return reverse(item)
+
+
+class ItemSitemap(Sitemap):
+    """Sitemap for published product pages"""
+    changefreq = 'weekly'
+    priority = 0.8
+
+    def items(self):
+        return Item.objects.filter(status='published').only('slug', 'updated_at').order_by('id')
+
+    def lastmod(self, item):
+        return item.updated_at
+
+    def location(self, item):
+        return reverse('product_detail', args=[item.slug])
+
+
+SITEMAPS = {
+    'static': StaticViewSitemap,
+    'items': ItemSitemap,
+}
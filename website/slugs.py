@@ -0,0 +1,123 @@
+"""
+Shared Cyrillic -> Latin transliteration and slug generation.
+
+Every place that builds a URL slug (panel views, import and scrape
+commands, ``fix_slugs``) goes through this module so that the same title
+always produces the same slug.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.db import connections
+from django.db.models import Q
+
+
+# Lowercase Cyrillic (Russian + Kazakh) to Latin. Input is lowercased
+# before translation, so uppercase letters do not need their own entries.
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'sch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'ә': 'a', 'ғ': 'g', 'қ': 'k', 'ң': 'n', 'ө': 'o', 'ұ': 'u', 'ү': 'u',
+    'һ': 'h', 'і': 'i',
+}
+
+_TRANSLIT_TABLE = str.maketrans(CYRILLIC_TO_LATIN)
+_NON_SLUG_RE = re.compile(r'[^a-z0-9]+')
+_COUNTER_RE = re.compile(r'[0-9]+')
+
+# How many base slugs are checked against the database in one query.
+UNIQUE_BATCH_SIZE = 500
+
+
+def transliterate(text):
+    """Transliterate Cyrillic text to lowercase Latin"""
+    return text.lower().translate(_TRANSLIT_TABLE)
+
+
+@lru_cache(maxsize=16384)
+def slugify_title(text, max_length=None):
+    """Build an ASCII slug from a (possibly Cyrillic) title"""
+    text = transliterate(text or '')
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    slug = _NON_SLUG_RE.sub('-', text).strip('-')
+    if max_length:
+        slug = slug[:max_length].rstrip('-')
+    return slug
+
+
+def slugify_many(titles, max_length=None):
+    """Slugify a sequence of titles, returning a list in the same order"""
+    return [slugify_title(title, max_length) for title in titles]
+
+
+def _with_suffix(base, counter, max_length):
+    suffix = f'-{counter}'
+    if max_length and len(base) + len(suffix) > max_length:
+        base = base[:max_length - len(suffix)].rstrip('-')
+    return f'{base}{suffix}'
+
+
+def _taken_slugs(queryset, bases):
+    """Fetch every existing slug equal to one of ``bases`` or ``<base>-<n>``"""
+    # Equality and prefix lookups that use the slug index; the numeric
+    # suffix is checked here instead. SQLite never uses an index for
+    # LIKE, so there the prefix is a range ("." sorts right after "-");
+    # PostgreSQL indexes LIKE 'x%' (Django adds a pattern_ops index) but
+    # its locale collations don't order slugs byte by byte.
+    ranges = connections[queryset.db].vendor == 'sqlite'
+    query = Q(slug__in=bases)
+    for base in bases:
+        if ranges:
+            query |= Q(slug__gte=f'{base}-', slug__lt=f'{base}.')
+        else:
+            query |= Q(slug__startswith=f'{base}-')
+    taken = set()
+    for slug in queryset.filter(query).order_by().values_list('slug', flat=True):
+        base, _, counter = slug.rpartition('-')
+        if slug in bases or (base in bases and _COUNTER_RE.fullmatch(counter)):
+            taken.add(slug)
+    return taken
+
+
+def unique_slugs(model, titles, exclude=None, reserved=None, batch_size=UNIQUE_BATCH_SIZE):
+    """
+    Build unique slugs for ``titles`` against ``model``'s slug column.
+
+    Existing slugs are fetched with one query per ``batch_size`` titles, and
+    slugs handed out earlier in the same call are never repeated.
+    ``exclude`` is a queryset filter (e.g. ``Q(pk=item.pk)``) for rows whose
+    current slug may be reused, ``reserved`` an extra set of slugs to avoid.
+    """
+    max_length = model._meta.get_field('slug').max_length
+    fallback = model._meta.model_name
+    queryset = model._default_manager.all()
+    if exclude is not None:
+        queryset = queryset.exclude(exclude)
+
+    taken = set(reserved or ())
+    result = []
+    titles = list(titles)
+    for start in range(0, len(titles), batch_size):
+        bases = [slugify_title(title, max_length) or fallback for title in titles[start:start + batch_size]]
+        taken |= _taken_slugs(queryset, set(bases))
+
+        for base in bases:
+            slug = base
+            counter = 1
+            while slug in taken:
+                slug = _with_suffix(base, counter, max_length)
+                counter += 1
+            taken.add(slug)
+            result.append(slug)
+    return result
+
+
+def unique_slug(model, title, instance=None):
+    """Build a single unique slug for ``title``, ignoring ``instance`` itself"""
+    exclude = Q(pk=instance.pk) if instance is not None and instance.pk else None
+    return unique_slugs(model, [title], exclude=exclude)[0]
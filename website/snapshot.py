@@ -0,0 +1,222 @@
+"""
+In-process, immutable snapshot of the published catalog.
+
+Public views read categories and items from the snapshot instead of the
+database. Each worker keeps one snapshot and compares its version with
+the catalog version (one cache read) on every request; when a write has
+bumped the version, the snapshot is rebuilt with four queries and
+swapped in with a single assignment, so readers never see a half-built
+catalog.
+"""
+import threading
+from bisect import bisect_right
+from django.core.files.storage import default_storage
+from .catalog import catalog_version, decode_cursor, encode_cursor
+from .models import Category, Item, ItemImage, RelatedItem
+
+
+class MediaFile:
+    """Stored image reference; mirrors ``.url``/``.width``/``.height`` of an ImageFieldFile"""
+    __slots__ = ('name', 'url', 'width', 'height', 'lqip')
+
+    def __init__(self, name, width=None, height=None, lqip=''):
+        self.name = name
+        self.url = default_storage.url(name)
+        self.width = width
+        self.height = height
+        self.lqip = lqip
+
+    def __str__(self):
+        return self.name
+
+
+class CategoryRecord:
+    __slots__ = ('id', 'name', 'slug', 'description')
+
+    def __init__(self, id, name, slug, description):
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.description = description
+
+    def __str__(self):
+        return self.name
+
+
+class ImageRecord:
+    __slots__ = ('id', 'image', 'caption')
+
+    def __init__(self, id, image, caption):
+        self.id = id
+        self.image = image
+        self.caption = caption
+
+
+class ItemRecord:
+    __slots__ = (
+        'id', 'title', 'slug', 'category_id', 'category', 'description_html', 'excerpt', 'short_description',
+        'price', 'main_image', 'images', 'featured', 'order', 'updated_at',
+    )
+
+    def __init__(self, id, title, slug, category_id, category, description_html, excerpt, short_description,
+                 price, main_image, images, featured, order, updated_at):
+        self.id = id
+        self.title = title
+        self.slug = slug
+        self.category_id = category_id
+        self.category = category
+        self.description_html = description_html
+        self.excerpt = excerpt
+        self.short_description = short_description
+        self.price = price
+        self.main_image = main_image
+        self.images = images
+        self.featured = featured
+        self.order = order
+        self.updated_at = updated_at
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return self.title
+
+
+ITEM_FIELDS = (
+    'id', 'title', 'slug', 'category_id', 'description_html', 'excerpt', 'short_description',
+    'price', 'main_image', 'featured', 'order', 'updated_at',
+)
+IMAGE_FIELDS = ('main_image_width', 'main_image_height', 'main_image_lqip')
+
+
+class CatalogSnapshot:
+    """
+    Published categories and items with lookup tables. Items of a
+    category are kept in (order, id) order, the same order as
+    ``category_page`` and the related-items list.
+    """
+    __slots__ = (
+        'version', 'categories', 'category_by_slug', 'items_by_slug', 'items_by_id',
+        'items_by_category', 'related_ids', '_keys',
+    )
+
+    def __init__(self, version, categories, items, related_ids=None):
+        self.version = version
+        self.categories = tuple(categories)
+        self.category_by_slug = {category.slug: category for category in self.categories}
+        self.items_by_slug = {item.slug: item for item in items}
+        self.items_by_id = {item.id: item for item in items}
+        # Precomputed by compute_related, best first
+        self.related_ids = related_ids or {}
+
+        grouped = {}
+        for item in items:
+            grouped.setdefault(item.category_id, []).append(item)
+        self.items_by_category = {category_id: tuple(group) for category_id, group in grouped.items()}
+        # Sort keys for bisecting a cursor into a category
+        self._keys = {
+            category_id: tuple((item.order, item.id) for item in group)
+            for category_id, group in self.items_by_category.items()
+        }
+
+    @classmethod
+    def build(cls, version):
+        """Load the published catalog with one query per model"""
+        categories = {
+            row[0]: CategoryRecord(*row)
+            for row in Category.objects.values_list('id', 'name', 'slug', 'description')
+        }
+
+        images = {}
+        for item_id, image_id, name, caption, width, height, lqip in (
+            ItemImage.objects.filter(item__status='published')
+            .order_by('order', 'id')
+            .values_list('item_id', 'id', 'image', 'caption', 'width', 'height', 'lqip')
+        ):
+            images.setdefault(item_id, []).append(
+                ImageRecord(image_id, MediaFile(name, width, height, lqip), caption)
+            )
+
+        items = []
+        for row in (
+            Item.objects.filter(status='published')
+            .order_by('order', 'id')
+            .values_list(*ITEM_FIELDS, *IMAGE_FIELDS)
+        ):
+            values = dict(zip(ITEM_FIELDS, row))
+            values['category'] = categories.get(values['category_id'])
+            if values['main_image']:
+                values['main_image'] = MediaFile(values['main_image'], *row[len(ITEM_FIELDS):])
+            else:
+                values['main_image'] = None
+            values['images'] = tuple(images.get(values['id'], ()))
+            items.append(ItemRecord(**values))
+
+        related_ids = {}
+        for item_id, related_id in RelatedItem.objects.order_by('item_id', 'rank').values_list('item_id', 'related_id'):
+            related_ids.setdefault(item_id, []).append(related_id)
+        related_ids = {item_id: tuple(group) for item_id, group in related_ids.items()}
+
+        # Category.Meta.ordering is by name
+        ordered = sorted(categories.values(), key=lambda category: category.name)
+        return cls(version, ordered, items, related_ids)
+
+    def category_items(self, category_id):
+        return self.items_by_category.get(category_id, ())
+
+    def page(self, category_id, cursor, limit):
+        """Return ``(items, next_cursor)``, like ``category_page`` but in memory"""
+        items = self.category_items(category_id)
+        start = bisect_right(self._keys.get(category_id, ()), decode_cursor(cursor)) if cursor else 0
+        page = items[start:start + limit + 1]
+        if len(page) > limit:
+            return page[:limit], encode_cursor(page[limit - 1])
+        return page, None
+
+    def related(self, item, limit=3):
+        """
+        Items most similar to ``item`` (see compute_related), topped up
+        with other items of its category
+        """
+        related = [
+            self.items_by_id[related_id]
+            for related_id in self.related_ids.get(item.id, ())
+            if related_id in self.items_by_id
+        ][:limit]
+        if len(related) == limit:
+            return related
+
+        seen = {item.id, *(other.id for other in related)}
+        for other in self.category_items(item.category_id):
+            if other.id not in seen:
+                related.append(other)
+                if len(related) == limit:
+                    break
+        return related
+
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    """Return the current snapshot, rebuilding it if the catalog changed"""
+    global _snapshot
+    version = catalog_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.version != version:
+            # Built from the version read before the queries: a write
+            # during the build bumps it again and triggers another rebuild.
+            _snapshot = CatalogSnapshot.build(version)
+        return _snapshot
+
+
+def clear_snapshot():
+    """Drop the snapshot so the next request rebuilds it"""
+    global _snapshot
+    _snapshot = None
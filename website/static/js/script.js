@@ -36,7 +36,7 @@ document.querySelectorAll('a[href^="#"]').forEach(anchor => {
 
 // Form Submission
 const contactForm = document.getElementById('contactForm');
-contactForm.addEventListener('submit', (e) => {
+contactForm && contactForm.addEventListener('submit', (e) => {
     e.preventDefault();
 
     // Get form data
@@ -88,3 +88,136 @@ window.addEventListener('scroll', () => {
         header.style.boxShadow = '0 2px 10px rgba(0, 0, 0, 0.1)';
     }
 });
+
+// Load the rest of each category when its end scrolls into view
+const loadMoreObserver = new IntersectionObserver((entries) => {
+    entries.forEach(entry => {
+        if (entry.isIntersecting) {
+            loadMoreCards(entry.target);
+        }
+    });
+}, { rootMargin: '400px 0px' });
+
+async function loadMoreCards(sentinel) {
+    if (sentinel.dataset.loading) {
+        return;
+    }
+    sentinel.dataset.loading = '1';
+
+    try {
+        const response = await fetch(sentinel.dataset.url, {
+            headers: { 'Accept': 'application/json' }
+        });
+        if (!response.ok) {
+            throw new Error(response.status);
+        }
+        const data = await response.json();
+
+        const grid = sentinel.parentElement.querySelector('.products-grid');
+        grid.insertAdjacentHTML('beforeend', data.html);
+
+        if (data.next) {
+            sentinel.dataset.url = data.next;
+            delete sentinel.dataset.loading;
+
+            // Re-observe so a sentinel that is still visible fires again
+            loadMoreObserver.unobserve(sentinel);
+            loadMoreObserver.observe(sentinel);
+        } else {
+            loadMoreObserver.unobserve(sentinel);
+            sentinel.remove();
+        }
+    } catch (error) {
+        console.error('Failed to load products:', error);
+        delete sentinel.dataset.loading;
+    }
+}
+
+document.querySelectorAll('.load-more').forEach(sentinel => {
+    loadMoreObserver.observe(sentinel);
+});
+
+// Product search suggestions (debounced, stale responses are aborted)
+const productSearch = document.getElementById('productSearch');
+const productSearchResults = document.getElementById('productSearchResults');
+let suggestTimer = null;
+let suggestController = null;
+
+function renderSuggestions(data) {
+    productSearchResults.innerHTML = '';
+
+    const entries = [
+        ...data.categories.map(category => ({ url: category.url, title: category.name, meta: 'Категория' })),
+        ...data.items.map(item => ({ url: item.url, title: item.title, meta: item.category }))
+    ];
+
+    if (!entries.length) {
+        const empty = document.createElement('li');
+        empty.className = 'product-search-empty';
+        empty.textContent = 'Ничего не найдено';
+        productSearchResults.appendChild(empty);
+    }
+
+    entries.forEach(entry => {
+        const li = document.createElement('li');
+        const link = document.createElement('a');
+        link.href = entry.url;
+        link.textContent = entry.title;
+        if (entry.meta) {
+            const meta = document.createElement('span');
+            meta.textContent = entry.meta;
+            link.appendChild(meta);
+        }
+        li.appendChild(link);
+        productSearchResults.appendChild(li);
+    });
+
+    productSearchResults.hidden = false;
+}
+
+async function fetchSuggestions(query) {
+    if (suggestController) {
+        suggestController.abort();
+    }
+    suggestController = new AbortController();
+
+    try {
+        const url = `${productSearch.dataset.url}?q=${encodeURIComponent(query)}`;
+        const response = await fetch(url, {
+            headers: { 'Accept': 'application/json' },
+            signal: suggestController.signal
+        });
+        if (!response.ok) {
+            throw new Error(response.status);
+        }
+        renderSuggestions(await response.json());
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            console.error('Failed to load suggestions:', error);
+        }
+    }
+}
+
+if (productSearch) {
+    productSearch.addEventListener('input', () => {
+        clearTimeout(suggestTimer);
+        const query = productSearch.value.trim();
+        if (!query) {
+            productSearchResults.hidden = true;
+            return;
+        }
+        suggestTimer = setTimeout(() => fetchSuggestions(query), 150);
+    });
+
+    productSearch.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') {
+            productSearchResults.hidden = true;
+        }
+    });
+
+    document.addEventListener('click', (e) => {
+        if (!e.target.closest('.product-search')) {
+            productSearchResults.hidden = true;
+        }
+    });
+}
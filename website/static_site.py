@@ -0,0 +1,116 @@
+"""
+Helpers for the ``build_static_site`` command: page fingerprints, URL to
+file mapping and the worker that renders pages in a process pool.
+
+Workers render through the normal URLconf with the test client, so a
+static page is byte-for-byte what the live view would return.
+"""
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/xml', 'application/javascript')
+COMPRESSED_SUFFIXES = ('.gz', '.br')
+
+# Set in each worker by init_worker
+_worker = {}
+
+
+def fingerprint(*parts):
+    """Stable hash of everything a page is rendered from"""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def hash_tree(*roots, exclude=()):
+    """Hash the names and contents of every file below ``roots``"""
+    digest = hashlib.sha256()
+    for root in roots:
+        root = Path(root)
+        if not root.exists():
+            continue
+        for path in sorted(p for p in root.rglob('*') if p.is_file()):
+            relative = path.relative_to(root).as_posix()
+            if relative.startswith(exclude):
+                continue
+            digest.update(relative.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def url_to_path(url, content_type=''):
+    """
+    Map a URL to a file below the output directory: ``/`` and ``/x/``
+    become ``index.html`` (``index.json`` for JSON endpoints), URLs with
+    an extension such as ``/sitemap.xml`` are kept as they are.
+    """
+    relative = url.lstrip('/')
+    if relative and not relative.endswith('/'):
+        return relative
+    index = 'index.json' if content_type.startswith('application/json') else 'index.html'
+    return relative + index
+
+
+def write_file(path, content, compress=True):
+    """Write ``content`` atomically, with .gz and .br variants next to it"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    variants = [(path, content)]
+    if compress:
+        variants.append((path.with_name(path.name + '.gz'), gzip.compress(content, 9, mtime=0)))
+        if brotli is not None:
+            variants.append((path.with_name(path.name + '.br'), brotli.compress(content)))
+
+    for target, data in variants:
+        temp = target.with_name(target.name + '.tmp')
+        temp.write_bytes(data)
+        os.replace(temp, target)
+
+
+def remove_file(root, relative):
+    """Delete a page and its compressed variants, then empty parent directories"""
+    root = Path(root)
+    path = root / relative
+    for target in [path] + [path.with_name(path.name + suffix) for suffix in COMPRESSED_SUFFIXES]:
+        target.unlink(missing_ok=True)
+    parent = path.parent
+    while parent != root and parent.exists() and not any(parent.iterdir()):
+        parent.rmdir()
+        parent = parent.parent
+
+
+def init_worker(output, host, secure):
+    """Process pool initializer (also works with the spawn start method)"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    from django.test import Client
+
+    _worker.update(
+        output=Path(output),
+        client=Client(HTTP_HOST=host),
+        secure=secure,
+    )
+
+
+def render_page(url):
+    """Render one URL into the output directory; returns ``(url, path, status)``"""
+    response = _worker['client'].get(url, secure=_worker['secure'])
+    if response.status_code != 200:
+        return url, None, response.status_code
+
+    content_type = response.get('Content-Type', '')
+    relative = url_to_path(url, content_type)
+    write_file(
+        _worker['output'] / relative,
+        response.content,
+        compress=content_type.startswith(COMPRESSIBLE_TYPES),
+    )
+    return url, relative, response.status_code
@@ -0,0 +1,288 @@
+"""
+Change detection for catalog imports.
+
+Every imported item and category stores ``source_hash``, a fingerprint
+of the fields the import supplied, and items also store which import
+(``source``) they came from. On the next run incoming records are
+fingerprinted and compared against the stored hashes, loaded with one
+query, and only rows whose source data really changed are written:
+no ``updated_at`` bump and no cache invalidation for the rest. Because
+the comparison is against what the source said last time, not against
+the row, an edit made in the admin survives until the source itself
+changes. Items that predate fingerprints are adopted as they are on
+their first sync: they get the source's fingerprint, not its data.
+
+An item belongs to the source that created or adopted it. Another
+source listing the same title leaves it alone and reports a conflict,
+unless told to take it over, so two imports sharing titles don't
+rewrite each other's rows on every run.
+
+Items of a source that no longer appear in it are reported as missing
+and, on request, archived. Archiving clears the fingerprint, so an item
+that comes back is published again.
+"""
+import hashlib
+import json
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from . import changes
+from .bulk import catalog_changed, update_items
+from .models import Category, Item
+from .ordering import ORDER_STEP, next_order
+from .purge import CATALOG_KEY, category_key, item_key
+from .slugs import unique_slug, unique_slugs
+
+
+# Item.price is DecimalField(max_digits=10, decimal_places=2)
+MAX_PRICE = Decimal(10 ** 8)
+
+UPDATE_FIELDS = [
+    'category', 'description', 'description_html', 'excerpt', 'short_description', 'price',
+    'status', 'order', 'source', 'source_hash', 'updated_at',
+]
+
+
+def _normalize(value):
+    if value is None:
+        return ''
+    if isinstance(value, Decimal):
+        return str(value.quantize(Decimal('0.01')))
+    return str(value).strip()
+
+
+def fingerprint(*values):
+    """SHA-256 of source field values; 100 and Decimal('100.00') hash alike"""
+    data = json.dumps([_normalize(value) for value in values], ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def category_fingerprint(name, description):
+    return fingerprint(name, description)
+
+
+def item_fingerprint(record):
+    return fingerprint(
+        record['title'], record['category'], record['description'],
+        record['short_description'], record['price'],
+    )
+
+
+def clean_record(record):
+    """Fill the optional fields of an incoming product record"""
+    description = record.get('description') or ''
+    price = record.get('price')
+    if price is not None:
+        price = Decimal(price)
+        if not 0 <= price < MAX_PRICE:
+            price = None
+    return {
+        'title': record['title'].strip(),
+        'category': record['category'].strip(),
+        'description': description,
+        'short_description': record.get('short_description') or description[:200],
+        'price': price,
+    }
+
+
+class SyncResult:
+    """Titles per outcome of a sync"""
+
+    def __init__(self):
+        self.new = []
+        self.changed = []
+        self.unchanged = []
+        self.missing = []
+        self.conflicts = []
+        self.archived = 0
+        self.categories_new = []
+        self.categories_changed = []
+
+    def summary(self):
+        return (
+            f'new: {len(self.new)}, changed: {len(self.changed)}, '
+            f'unchanged: {len(self.unchanged)}, missing: {len(self.missing)}, '
+            f'conflicts: {len(self.conflicts)}'
+        )
+
+    def lines(self):
+        """Per-item diff lines: ``+`` new, ``~`` changed, ``-`` missing, ``!`` conflict"""
+        lines = [f'  [+] категория {name}' for name in self.categories_new]
+        lines += [f'  [~] категория {name}' for name in self.categories_changed]
+        lines += [f'  [+] {title}' for title in self.new]
+        lines += [f'  [~] {title}' for title in self.changed]
+        lines += [f'  [-] {title}' for title in self.missing]
+        lines += [f'  [!] {title} (источник: {owner})' for title, owner in self.conflicts]
+        return lines
+
+
+def sync_categories(names, descriptions, result, dry_run=False):
+    """
+    Return ``{name: Category}`` for ``names``, creating the missing ones
+    and updating those whose description in ``descriptions`` changed.
+    """
+    categories = {category.name: category for category in Category.objects.filter(name__in=names)}
+    changed = []
+    for name in sorted(names):
+        description = descriptions.get(name)
+        category = categories.get(name)
+        if category is None:
+            result.categories_new.append(name)
+            description = f'Категория {name}' if description is None else description
+            category = Category(name=name, description=description,
+                                source_hash=category_fingerprint(name, description))
+            if not dry_run:
+                category.slug = unique_slug(Category, name)
+                category.save()
+            categories[name] = category
+        elif description is not None:
+            source_hash = category_fingerprint(name, description)
+            if source_hash != category.source_hash:
+                result.categories_changed.append(name)
+                category.description = description
+                category.source_hash = source_hash
+                changed.append(category)
+    if changed and not dry_run:
+        # Few rows and rare: save() keeps signals, versions and purges
+        for category in changed:
+            category.save(update_fields=['description', 'source_hash'])
+    return categories
+
+
+def sync_catalog(records, source, category_descriptions=None, archive_missing=False,
+                 find_missing=True, take_over=False, dry_run=False):
+    """
+    Bring the catalog in line with ``records`` (dicts with ``title``,
+    ``category`` and optional ``description``, ``short_description``
+    and ``price``) from ``source``. Items are matched by title.
+
+    ``find_missing`` should be off for partial runs (a crawl batch, a
+    limited scrape): everything of the source not in ``records`` would
+    be reported missing. Items owned by another source are only
+    reported, unless ``take_over`` moves them to this one. Returns a
+    ``SyncResult``.
+    """
+    result = SyncResult()
+    incoming = {}
+    for record in records:
+        record = clean_record(record)
+        incoming.setdefault(record['title'], record)
+
+    with transaction.atomic():
+        existing = {}
+        query = Q(title__in=incoming)
+        if find_missing:
+            query |= Q(source=source)
+        for row in Item.objects.filter(query).values_list(
+            'id', 'title', 'category_id', 'status', 'source', 'source_hash', 'order',
+        ).order_by('id'):
+            existing.setdefault(row[1], row)
+
+        conflicts = set() if take_over else {
+            title for title, row in existing.items()
+            if title in incoming and row[4] and row[4] != source
+        }
+        names = {record['category'] for title, record in incoming.items() if title not in conflicts}
+        categories = sync_categories(names, category_descriptions or {}, result, dry_run)
+
+        now = timezone.now()
+        new, updated, claimed = [], [], []
+        keys = {CATALOG_KEY}
+        orders = {}
+
+        def order_in(category):
+            if category.pk not in orders:
+                orders[category.pk] = next_order(category.items.all()) if category.pk else ORDER_STEP
+            else:
+                orders[category.pk] += ORDER_STEP
+            return orders[category.pk]
+
+        for title, record in incoming.items():
+            row = existing.get(title)
+            if title in conflicts:
+                result.conflicts.append((title, row[4]))
+                continue
+            source_hash = item_fingerprint(record)
+            category = categories[record['category']]
+            if row is None:
+                result.new.append(title)
+                new.append((record, source_hash, category))
+                continue
+
+            item_id, _, category_id, status, item_source, stored_hash, order = row
+            if source_hash == stored_hash or not (stored_hash or item_source):
+                # Unchanged, or never synced: keep the row, take the fingerprint
+                result.unchanged.append(title)
+                if source_hash != stored_hash or item_source != source:
+                    claimed.append(Item(id=item_id, source=source, source_hash=source_hash))
+                continue
+
+            result.changed.append(title)
+            updated.append(Item(
+                id=item_id,
+                category=category,
+                description=record['description'],
+                short_description=record['short_description'],
+                price=record['price'],
+                # Back in the source after being archived as missing
+                status='published' if status == 'archived' and not stored_hash else status,
+                order=order if category.pk == category_id else None,
+                source=source,
+                source_hash=source_hash,
+                updated_at=now,
+            ))
+            keys.add(item_key(item_id))
+            if category_id:
+                keys.add(category_key(category_id))
+
+        missing_ids = []
+        if find_missing:
+            for title, row in existing.items():
+                if row[4] == source and title not in incoming and row[3] != 'archived':
+                    missing_ids.append(row[0])
+                    result.missing.append(title)
+            result.missing.sort()
+
+        if dry_run:
+            transaction.set_rollback(True)
+            return result
+
+        if new:
+            items = []
+            for (record, source_hash, category), slug in zip(new, unique_slugs(Item, [r['title'] for r, _, _ in new])):
+                item = Item(
+                    title=record['title'], slug=slug, category=category,
+                    description=record['description'], short_description=record['short_description'],
+                    price=record['price'], status='published', order=order_in(category),
+                    source=source, source_hash=source_hash,
+                )
+                # bulk_create skips Item.save()
+                item.render_description()
+                items.append(item)
+            Item.objects.bulk_create(items)
+            # bulk_create sends no signals
+            changes.record(Item, [item.pk for item in items])
+            keys |= {category_key(item.category_id) for item in items}
+
+        if updated:
+            for item in updated:
+                item.render_description()
+                if item.order is None:
+                    item.order = order_in(item.category)
+            Item.objects.bulk_update(updated, UPDATE_FIELDS)
+            changes.record(Item, [item.pk for item in updated])
+            keys |= {category_key(item.category_id) for item in updated}
+
+        if claimed:
+            # Bookkeeping only: nothing visible changes, nothing to invalidate
+            Item.objects.bulk_update(claimed, ['source', 'source_hash'])
+
+        if new or updated:
+            catalog_changed(keys)
+
+        if archive_missing and missing_ids:
+            result.archived = update_items(Item.objects.filter(id__in=missing_ids),
+                                           status='archived', source_hash='')
+
+    return result
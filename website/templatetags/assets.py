@@ -0,0 +1,89 @@
+import json
+from functools import lru_cache
+from urllib.parse import quote
+from django import template
+from django.contrib.staticfiles import finders
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from website.assets import placeholder_svg
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _read_static(path):
+    """Read a file from the static sources, or None if it does not exist"""
+    found = finders.find(path)
+    if not found:
+        return None
+    with open(found, encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def _manifest():
+    """The manifest written by build_assets, or an empty one"""
+    content = _read_static('dist/manifest.json')
+    if content is None:
+        return {'bundles': {}, 'critical': None, 'placeholders': {}}
+    return json.loads(content)
+
+
+@register.simple_tag
+def stylesheet(source):
+    """
+    Link ``source``. When assets are built, the critical CSS is inlined and
+    the minified bundle is loaded without blocking the first paint.
+    """
+    manifest = _manifest()
+    bundle = manifest['bundles'].get(source)
+    if not bundle:
+        return format_html('<link rel="stylesheet" href="{}">', static(source))
+
+    critical = _read_static(manifest['critical']) if manifest['critical'] else None
+    href = static(bundle)
+    if not critical:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+
+    return format_html(
+        '<style>{}</style>\n'
+        '    <link rel="preload" href="{}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '    <noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(critical), href, href,
+    )
+
+
+@register.simple_tag
+def script_url(source):
+    """URL of the minified bundle containing ``source``, if built"""
+    return static(_manifest()['bundles'].get(source, source))
+
+
+@lru_cache(maxsize=None)
+def _svg_data_uri(width, height):
+    return 'data:image/svg+xml,' + quote(placeholder_svg(width, height))
+
+
+@register.simple_tag
+def placeholder_url(width, height):
+    """Local placeholder image; never points to a third-party host"""
+    path = _manifest()['placeholders'].get(f'{width}x{height}')
+    if path:
+        return static(path)
+    return _svg_data_uri(int(width), int(height))
+
+
+@register.simple_tag
+def image_attrs(image):
+    """
+    ``width``/``height`` and a blurred LQIP background for a stored image,
+    so the browser reserves its box and shows a preview while it loads.
+    """
+    attrs = []
+    if getattr(image, 'width', None) and getattr(image, 'height', None):
+        attrs.append(format_html(' width="{}" height="{}"', image.width, image.height))
+    lqip = getattr(image, 'lqip', '')
+    if lqip:
+        attrs.append(format_html(' style="background: url(\'{}\') center / cover no-repeat"', lqip))
+    return mark_safe(''.join(attrs))
@@ -1,3 +1,15 @@
-from django.test import TestCase
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from .search import PrefixIndex
 
-# Create your tests here.
+
+class PrefixIndexTests(SimpleTestCase):
+    def test_category_and_item_matching_the_same_query(self):
+        category = SimpleNamespace(name='Компрессоры')
+        item = SimpleNamespace(id=1, title='Компрессор ДЭН', featured=False, order=1024)
+        index = PrefixIndex(1, [('category', category, category.name), ('item', item, item.title)])
+
+        items, categories = index.search('ком', limit=5)
+
+        self.assertEqual(items, [item])
+        self.assertEqual(categories, [category])
@@ -0,0 +1,238 @@
+"""
+Chunked, resumable gallery uploads for the panel.
+
+An upload is started with the file name and size, then the file is sent
+in chunks, each tagged with the byte offset it starts at. Chunks are
+streamed from the request onto ``<id>.part`` in ``UPLOAD_TEMP_DIR`` one
+buffer at a time, and the size of that file is where a dropped upload
+resumes. When every file of a batch is complete, the batch is processed
+on a background thread: each image is validated, rotated according to
+its EXIF orientation, scaled down to ``UPLOAD_MAX_DIMENSION`` and
+stored, and the gallery rows are added with one ``bulk_create``.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+from . import changes
+from .bulk import catalog_changed
+from .images import image_meta
+from .models import ItemImage
+from .ordering import ORDER_STEP, next_order
+from .purge import item_key
+
+logger = logging.getLogger(__name__)
+
+
+READ_SIZE = 64 * 1024
+JPEG_QUALITY = 85
+BATCH_STATUS_TIMEOUT = 60 * 60
+
+_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(ValueError):
+    """Rejected upload request; ``offset`` is where the upload stands"""
+
+    def __init__(self, message, offset=None):
+        super().__init__(message)
+        self.offset = offset
+
+
+def temp_dir():
+    path = Path(settings.UPLOAD_TEMP_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _paths(upload_id):
+    if not _ID_RE.match(upload_id or ''):
+        raise UploadError('Неизвестная загрузка')
+    root = temp_dir()
+    return root / f'{upload_id}.json', root / f'{upload_id}.part'
+
+
+def remove_expired():
+    """Delete unfinished uploads older than UPLOAD_EXPIRY"""
+    deadline = time.time() - settings.UPLOAD_EXPIRY
+    for path in temp_dir().iterdir():
+        try:
+            if path.stat().st_mtime < deadline:
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def start_upload(item_id, filename, size):
+    """Register an upload of ``size`` bytes; returns its id"""
+    if not 0 < size <= settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f'Файл больше {settings.UPLOAD_MAX_SIZE // (1024 * 1024)} МБ или пустой')
+    remove_expired()
+
+    upload_id = uuid.uuid4().hex
+    meta_path, part_path = _paths(upload_id)
+    part_path.touch()
+    meta_path.write_text(json.dumps({
+        'item_id': item_id,
+        'filename': os.path.basename(filename)[:200],
+        'size': size,
+    }))
+    return upload_id
+
+
+def upload_state(upload_id):
+    """Return ``(meta, offset)`` of an upload"""
+    meta_path, part_path = _paths(upload_id)
+    try:
+        meta = json.loads(meta_path.read_text())
+        offset = part_path.stat().st_size
+    except (FileNotFoundError, ValueError):
+        raise UploadError('Неизвестная загрузка')
+    return meta, offset
+
+
+def append_chunk(upload_id, offset, stream, length):
+    """
+    Append ``length`` bytes read from ``stream`` at ``offset``, which must
+    be the current end of the upload. Returns the new offset.
+    """
+    meta, current = upload_state(upload_id)
+    if offset != current:
+        raise UploadError('Неверное смещение', current)
+    if not 0 < length <= settings.UPLOAD_CHUNK_SIZE or current + length > meta['size']:
+        raise UploadError('Неверный размер части', current)
+
+    _, part_path = _paths(upload_id)
+    remaining = length
+    with open(part_path, 'ab') as part:
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            part.write(data)
+            remaining -= len(data)
+        if remaining:
+            # Connection dropped mid-chunk: keep the upload at a chunk
+            # boundary the client knows about
+            part.truncate(current)
+            raise UploadError('Часть получена не полностью', current)
+    return current + length
+
+
+def discard(upload_id):
+    for path in _paths(upload_id):
+        path.unlink(missing_ok=True)
+
+
+def prepare_image(path):
+    """
+    Validate and normalize an uploaded image. Returns ``(jpeg_bytes,
+    width, height, lqip)``; raises OSError/ValueError for bad files.
+    """
+    with Image.open(path) as image:
+        image.verify()
+
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((settings.UPLOAD_MAX_DIMENSION, settings.UPLOAD_MAX_DIMENSION))
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        buffer = BytesIO()
+        image.save(buffer, format='JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+
+    data = buffer.getvalue()
+    width, height, lqip = image_meta(BytesIO(data))
+    return data, width, height, lqip
+
+
+def process_batch(batch_id, item_id, upload_ids):
+    """Turn completed uploads into gallery images (runs on the upload thread)"""
+    field = ItemImage._meta.get_field('image')
+    images = []
+    errors = []
+    try:
+        for upload_id in upload_ids:
+            meta, _ = upload_state(upload_id)
+            _, part_path = _paths(upload_id)
+            try:
+                data, width, height, lqip = prepare_image(part_path)
+            except (OSError, ValueError, Image.DecompressionBombError):
+                errors.append(meta['filename'])
+                continue
+            finally:
+                discard(upload_id)
+
+            name = field.generate_filename(None, f'{Path(meta["filename"]).stem or "image"}.jpg')
+            name = default_storage.save(name, ContentFile(data))
+            images.append(ItemImage(item_id=item_id, image=name, width=width, height=height, lqip=lqip))
+
+        if images:
+            with transaction.atomic():
+                start = next_order(ItemImage.objects.filter(item_id=item_id))
+                for n, image in enumerate(images):
+                    image.order = start + n * ORDER_STEP
+                ItemImage.objects.bulk_create(images)
+                # bulk_create sends no signals
+                changes.record(ItemImage, [image.pk for image in images])
+                catalog_changed({item_key(item_id)})
+
+        status = {'status': 'done', 'created': len(images), 'errors': errors}
+    except Exception:
+        logger.exception('Gallery upload batch %s failed', batch_id)
+        status = {'status': 'failed', 'created': 0, 'errors': errors}
+    finally:
+        # This thread's connections are not closed by request_finished
+        connections.close_all()
+    cache.set(f'upload-batch:{batch_id}', status, BATCH_STATUS_TIMEOUT)
+
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gallery-upload')
+        return _executor
+
+
+def complete_batch(item_id, upload_ids):
+    """Queue finished uploads of an item for processing; returns the batch id"""
+    if not upload_ids:
+        raise UploadError('Нет файлов')
+    for upload_id in upload_ids:
+        meta, offset = upload_state(upload_id)
+        if meta['item_id'] != item_id:
+            raise UploadError('Загрузка относится к другому товару')
+        if offset != meta['size']:
+            raise UploadError(f'Файл «{meta["filename"]}» загружен не полностью', offset)
+
+    batch_id = uuid.uuid4().hex
+    cache.set(f'upload-batch:{batch_id}', {'status': 'processing'}, BATCH_STATUS_TIMEOUT)
+    _get_executor().submit(process_batch, batch_id, item_id, list(upload_ids))
+    return batch_id
+
+
+def batch_status(batch_id):
+    """``{'status': 'processing' | 'done' | 'failed', ...}`` or None"""
+    return cache.get(f'upload-batch:{batch_id}')
@@ -4,6 +4,11 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('contact/', views.contact, name='contact'),
+    path('category/<str:slug>/items/', views.category_items, name='category_items'),
+    path('category/<str:slug>/items/<str:cursor>/', views.category_items, name='category_items'),
+    path('suggest/', views.suggest, name='suggest'),
+    path('api/changes/', views.api_changes, name='api_changes'),
+    path('sitemap.xml', views.sitemap_xml, name='sitemap'),
     re_path(r'^product/(?P<slug>[\w-]+)/$', views.product_detail, name='product_detail'),
 
     # Admin Panel URLs
@@ -11,8 +16,16 @@ urlpatterns = [
     path('panel/login/', views.panel_login, name='panel_login'),
     path('panel/logout/', views.panel_logout, name='panel_logout'),
     path('panel/items/', views.panel_items, name='panel_items'),
+    path('panel/items/bulk/', views.panel_items_bulk, name='panel_items_bulk'),
     path('panel/items/add/', views.panel_item_add, name='panel_item_add'),
     path('panel/items/<int:item_id>/edit/', views.panel_item_edit, name='panel_item_edit'),
     path('panel/items/<int:item_id>/delete/', views.panel_item_delete, name='panel_item_delete'),
+    path('panel/items/<int:item_id>/move/', views.panel_item_move, name='panel_item_move'),
+    path('panel/items/<int:item_id>/uploads/', views.panel_upload_start, name='panel_upload_start'),
+    path('panel/items/<int:item_id>/uploads/complete/', views.panel_upload_complete, name='panel_upload_complete'),
+    path('panel/uploads/batches/<str:batch_id>/', views.panel_upload_status, name='panel_upload_status'),
+    path('panel/uploads/<str:upload_id>/', views.panel_upload_chunk, name='panel_upload_chunk'),
+    path('panel/images/<int:image_id>/move/', views.panel_image_move, name='panel_image_move'),
     path('panel/categories/', views.panel_categories, name='panel_categories'),
+    path('panel/categories/<int:category_id>/order/', views.panel_category_order, name='panel_category_order'),
 ]
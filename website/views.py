@@ -1,74 +1,207 @@
+from decimal import Decimal, InvalidOperation
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import authenticate, login, logout
+from django.contrib.sitemaps.views import sitemap
 from django.core.mail import send_mail
 from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
 from django.core.paginator import Paginator
-from django.utils.text import slugify
+from django.http import Http404, HttpResponseBadRequest, HttpResponseNotAllowed, JsonResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.http import urlencode
+from . import fulltext
+from .bulk import ACTIONS, run_action
+from .catalog import encode_cursor
+from .changes import changes_since
+from .decorators import public_cache
 from .models import Category, Item, ItemImage
-import re
+from .ordering import StaleNeighbours, move_image, move_item, next_order
+from .purge import CATALOG_KEY, category_key, item_key, tag_response
+from .slugs import unique_slug
+from .uploads import UploadError, append_chunk, batch_status, complete_batch, start_upload, upload_state
+from .search import get_index
+from .sitemaps import SITEMAPS
+from .snapshot import get_snapshot
 
 
-def transliterate(text):
-    """Convert Cyrillic to Latin for URL slugs"""
-    cyrillic = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
-    latin = ['a','b','v','g','d','e','yo','zh','z','i','y','k','l','m','n','o','p','r','s','t','u','f','h','ts','ch','sh','sch','','y','','e','yu','ya']
+def is_staff(user):
+    return user.is_staff
 
-    text = text.lower()
-    result = ''
-    for char in text:
-        if char in cyrillic:
-            result += latin[cyrillic.index(char)]
-        elif char.isalnum():
-            result += char
-        else:
-            result += '-'
 
-    result = re.sub(r'-+', '-', result).strip('-')
-    return result
+staff_required = user_passes_test(is_staff, login_url='panel_login')
 
 
-def is_staff(user):
-    return user.is_staff
+# Notices shown after a redirect, selected by a signed ?notice= value so
+# that public pages never need the session or the messages framework
+NOTICES = {
+    'contact_sent': 'Спасибо за вашу заявку! Мы свяжемся с вами в ближайшее время.',
+}
+NOTICE_SALT = 'website.notice'
+NOTICE_MAX_AGE = 60 * 10
+
+
+def notice_url(viewname, notice, anchor=''):
+    """URL of ``viewname`` carrying a signed notice"""
+    token = signing.dumps(notice, salt=NOTICE_SALT)
+    return f'{reverse(viewname)}?{urlencode({"notice": token})}{anchor}'
+
+
+def read_notice(request):
+    """Return the notice text from a valid ?notice= value, or None"""
+    token = request.GET.get('notice')
+    if not token:
+        return None
+    try:
+        return NOTICES.get(signing.loads(token, salt=NOTICE_SALT, max_age=NOTICE_MAX_AGE))
+    except signing.BadSignature:
+        return None
 
 
+@public_cache
 def index(request):
     """Render the home page"""
-    # Get all categories with their published items
-    categories = Category.objects.prefetch_related(
-        'items'
-    ).all()
-
-    # Get all published items ordered by category and order
-    items = Item.objects.filter(
-        status='published'
-    ).select_related('category').order_by('category__name', 'order')
+    snapshot = get_snapshot()
+
+    # First page of published items for every category; the rest is
+    # loaded by script.js from category_items
+    per_category = settings.HOME_ITEMS_PER_CATEGORY
+
+    sections = []
+    for category in snapshot.categories:
+        items = snapshot.category_items(category.id)[:per_category + 1]
+        if not items:
+            continue
+        next_cursor = encode_cursor(items[per_category - 1]) if len(items) > per_category else None
+        sections.append({
+            'category': category,
+            'items': items[:per_category],
+            'next_cursor': next_cursor,
+        })
+
+    notice = read_notice(request)
 
     context = {
-        'categories': categories,
-        'items': items,
+        'categories': snapshot.categories,
+        'sections': sections,
+        'notice': notice,
     }
 
-    return render(request, 'index.html', context)
+    response = render(request, 'index.html', context)
+    tag_response(response, [CATALOG_KEY] + [
+        key
+        for section in sections
+        for key in [category_key(section['category'].id)] + [item_key(item.id) for item in section['items']]
+    ])
+    if notice:
+        # Visitor-specific, keep it out of shared caches
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@public_cache
+def category_items(request, slug, cursor=''):
+    """
+    Return a page of a category's product cards as JSON. The cursor is
+    part of the path so every page is a distinct, statically servable URL.
+    """
+    snapshot = get_snapshot()
+    category = snapshot.category_by_slug.get(slug)
+    if category is None:
+        raise Http404('Category not found')
+
+    def render_page():
+        items, next_cursor = snapshot.page(category.id, cursor, settings.CATEGORY_PAGE_SIZE)
+        payload = {
+            'html': render_to_string('includes/product_card_list.html', {'items': items}, request),
+            'next': reverse('category_items', args=[slug, next_cursor]) if next_cursor else None,
+        }
+        keys = [category_key(category.id)] + [item_key(item.id) for item in items]
+        return payload, keys
+
+    # Only one worker renders a missing page, the others wait for it
+    cache_key = f'category_items:{snapshot.version}:{slug}:{cursor}'
+    try:
+        cached = cache.get_or_set(cache_key, render_page, settings.CATEGORY_PAGE_TIMEOUT)
+    except ValueError:
+        return HttpResponseBadRequest('Invalid cursor')
+
+    payload, keys = cached
+    return tag_response(JsonResponse(payload), keys)
+
+
+@public_cache
+def suggest(request):
+    """Typeahead suggestions for the product search box as JSON"""
+    query = request.GET.get('q', '').strip()[:100]
+    items, categories = get_index().search(query, settings.SUGGEST_LIMIT)
+
+    index_url = reverse('index')
+    payload = {
+        'query': query,
+        'items': [
+            {
+                'title': item.title,
+                'url': reverse('product_detail', args=[item.slug]),
+                'category': item.category.name if item.category else '',
+            }
+            for item in items
+        ],
+        'categories': [
+            {'name': category.name, 'url': f'{index_url}#category-{category.slug}'}
+            for category in categories
+        ],
+    }
+    response = JsonResponse(payload)
+    return tag_response(response, [CATALOG_KEY])
 
 
+@public_cache
 def product_detail(request, slug):
     """Render product detail page"""
-    item = get_object_or_404(Item, slug=slug, status='published')
+    snapshot = get_snapshot()
+    item = snapshot.items_by_slug.get(slug)
+    if item is None:
+        raise Http404('Item not found')
 
     # Get related items from the same category
-    related_items = Item.objects.filter(
-        category=item.category,
-        status='published'
-    ).exclude(id=item.id).order_by('order')[:3]
+    related_items = snapshot.related(item, 3)
 
     context = {
         'item': item,
         'related_items': related_items,
     }
 
-    return render(request, 'product_detail.html', context)
+    response = render(request, 'product_detail.html', context)
+    keys = [item_key(item.id)] + [item_key(related.id) for related in related_items]
+    if item.category_id:
+        keys.append(category_key(item.category_id))
+    return tag_response(response, keys)
+
+
+@public_cache
+def sitemap_xml(request):
+    """sitemap.xml; lists every published item, so any catalog change purges it"""
+    return tag_response(sitemap(request, SITEMAPS), [CATALOG_KEY])
+
+
+def api_changes(request):
+    """Catalog deltas after the ``since`` cursor, for partners mirroring the catalog"""
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = int(request.GET.get('limit', settings.CHANGES_PAGE_SIZE))
+    except ValueError:
+        return HttpResponseBadRequest('since and limit must be integers')
+    if since < 0 or limit < 1:
+        return HttpResponseBadRequest('since and limit must be positive')
+
+    response = JsonResponse(changes_since(since, min(limit, settings.CHANGES_PAGE_SIZE)))
+    patch_cache_control(response, no_cache=True)
+    return response
 
 
 def contact(request):
@@ -92,11 +225,11 @@ def contact(request):
         #         fail_silently=False,
         #     )
         # except Exception as e:
-        #     messages.error(request, 'Произошла ошибка при отправке сообщения.')
         #     return redirect('index')
 
-        messages.success(request, 'Спасибо за вашу заявку! Мы свяжемся с вами в ближайшее время.')
-        return redirect('index')
+        # No messages framework here: it would store the notice in the
+        # session/cookies and make the home page uncacheable
+        return redirect(notice_url('index', 'contact_sent', '#contact'))
 
     return redirect('index')
 
@@ -141,23 +274,32 @@ def panel_dashboard(request):
         'categories_count': categories_count,
         'published_count': published_count,
         'recent_items': recent_items,
+        # Counters of the worker that served this page
+        'cache_stats': cache.stats() if hasattr(cache, 'stats') else None,
     }
     return render(request, 'panel/dashboard.html', context)
 
 
-def panel_items(request):
-    """List all items"""
-    items = Item.objects.select_related('category').order_by('-created_at')
+def filtered_items(params):
+    """Items matching the panel list filters in ``params``"""
+    items = Item.objects.all()
 
     # Filter by category
-    category_id = request.GET.get('category')
+    category_id = params.get('category')
     if category_id:
         items = items.filter(category_id=category_id)
 
     # Search
-    search = request.GET.get('search')
+    search = params.get('search')
     if search:
-        items = items.filter(title__icontains=search)
+        items = fulltext.filter_items(items, search)
+
+    return items
+
+
+def panel_items(request):
+    """List all items"""
+    items = filtered_items(request.GET).select_related('category').order_by('-created_at')
 
     paginator = Paginator(items, 10)
     page = request.GET.get('page')
@@ -168,10 +310,54 @@ def panel_items(request):
     context = {
         'items': items,
         'categories': categories,
+        'bulk_actions': ACTIONS,
     }
     return render(request, 'panel/items.html', context)
 
 
+@staff_required
+def panel_items_bulk(request):
+    """Apply a bulk action to the checked items or to everything matching the filters"""
+    if request.method != 'POST':
+        return redirect('panel_items')
+
+    back = reverse('panel_items')
+    filters = {key: request.POST[key] for key in ('category', 'search') if request.POST.get(key)}
+    if filters:
+        back = f'{back}?{urlencode(filters)}'
+
+    action = request.POST.get('action')
+    if action not in ACTIONS:
+        messages.error(request, 'Выберите действие.')
+        return redirect(back)
+
+    if request.POST.get('select_all') == '1':
+        items = filtered_items(request.POST)
+    else:
+        ids = [value for value in request.POST.getlist('ids') if value.isdigit()]
+        if not ids:
+            messages.error(request, 'Не выбрано ни одного товара.')
+            return redirect(back)
+        items = Item.objects.filter(id__in=ids)
+
+    category = None
+    percent = None
+    if action == 'move':
+        category = get_object_or_404(Category, id=request.POST.get('target_category') or 0)
+    elif action == 'price':
+        try:
+            percent = Decimal(request.POST.get('percent', '').replace(',', '.'))
+        except InvalidOperation:
+            percent = None
+        if percent is None or not percent.is_finite() or percent <= -100:
+            messages.error(request, 'Укажите изменение цены в процентах, например 10 или -5.')
+            return redirect(back)
+
+    count = run_action(action, items, category=category, percent=percent)
+    messages.success(request, f'{ACTIONS[action]}: обработано товаров — {count}.')
+    return redirect(back)
+
+
 def panel_item_add(request):
     """Add new item"""
     if request.method == 'POST':
@@ -183,15 +369,10 @@ def panel_item_add(request):
         status = request.POST.get('status', 'draft')
         featured = request.POST.get('featured') == 'on'
 
-        # Generate slug
-        slug = transliterate(title)
-
-        # Check slug uniqueness
-        base_slug = slug
-        counter = 1
-        while Item.objects.filter(slug=slug).exists():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
+        # Generate a unique slug in a single query
+        slug = unique_slug(Item, title)
+        # New items go to the end of their category
+        order = next_order(Item.objects.filter(category_id=category_id or None))
 
         item = Item.objects.create(
             title=title,
@@ -202,6 +383,7 @@ def panel_item_add(request):
             price=price,
             status=status,
             featured=featured,
+            order=order,
         )
 
         # Handle image upload
@@ -242,10 +424,132 @@ def panel_item_edit(request, item_id):
     context = {
         'item': item,
         'categories': categories,
+        'images': item.images.order_by('order', 'id'),
     }
     return render(request, 'panel/item_form.html', context)
 
 
+def neighbour_ids(params):
+    """``previous``/``next`` row ids posted by the drag-and-drop lists"""
+    return [int(value) if value.isdigit() else None for value in (params.get('previous', ''), params.get('next', ''))]
+
+
+def stale_list():
+    # The drag-and-drop script reloads the page on any error
+    return JsonResponse({'error': 'Список изменился, обновите страницу'}, status=409)
+
+
+@staff_required
+def panel_item_move(request, item_id):
+    """Move an item between two neighbours in its category; writes one row"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    item = get_object_or_404(Item.objects.only('id', 'category_id', 'order'), id=item_id)
+    try:
+        order, rebalanced = move_item(item, *neighbour_ids(request.POST))
+    except StaleNeighbours:
+        return stale_list()
+    return JsonResponse({'order': order, 'rebalanced': rebalanced})
+
+
+@staff_required
+def panel_image_move(request, image_id):
+    """Move a gallery image between two neighbours"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    image = get_object_or_404(ItemImage.objects.only('id', 'item_id', 'order'), id=image_id)
+    try:
+        order, rebalanced = move_image(image, *neighbour_ids(request.POST))
+    except StaleNeighbours:
+        return stale_list()
+    return JsonResponse({'order': order, 'rebalanced': rebalanced})
+
+
+def upload_error(error, status=400):
+    return JsonResponse({'error': str(error), 'offset': error.offset}, status=status)
+
+
+@staff_required
+def panel_upload_start(request, item_id):
+    """Start a chunked gallery upload for an item"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    item = get_object_or_404(Item.objects.only('id'), id=item_id)
+    try:
+        size = int(request.POST.get('size', ''))
+        upload_id = start_upload(item.id, request.POST.get('filename', ''), size)
+    except ValueError as e:
+        return upload_error(e if isinstance(e, UploadError) else UploadError('Неверный размер файла'))
+    return JsonResponse({
+        'id': upload_id,
+        'offset': 0,
+        'chunk_size': settings.UPLOAD_CHUNK_SIZE,
+        'url': reverse('panel_upload_chunk', args=[upload_id]),
+    }, status=201)
+
+
+@staff_required
+def panel_upload_chunk(request, upload_id):
+    """
+    GET: how much of the upload the server has (to resume).
+    PUT: append the request body, sent with its offset in X-Upload-Offset.
+    The body is streamed to disk, never read into memory as a whole.
+    """
+    try:
+        if request.method == 'GET':
+            meta, offset = upload_state(upload_id)
+            return JsonResponse({'offset': offset, 'size': meta['size']})
+        if request.method != 'PUT':
+            return HttpResponseNotAllowed(['GET', 'PUT'])
+
+        try:
+            offset = int(request.headers.get('X-Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            raise UploadError('Нет смещения или размера части')
+        offset = append_chunk(upload_id, offset, request, length)
+    except UploadError as e:
+        return upload_error(e, status=409 if e.offset is not None else 404)
+    return JsonResponse({'offset': offset})
+
+
+@staff_required
+def panel_upload_complete(request, item_id):
+    """Queue the item's finished uploads for processing into gallery images"""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    item = get_object_or_404(Item.objects.only('id'), id=item_id)
+    try:
+        batch_id = complete_batch(item.id, request.POST.getlist('ids'))
+    except UploadError as e:
+        return upload_error(e, status=409 if e.offset is not None else 400)
+    return JsonResponse({
+        'batch': batch_id,
+        'status_url': reverse('panel_upload_status', args=[batch_id]),
+    }, status=202)
+
+
+@staff_required
+def panel_upload_status(request, batch_id):
+    """Processing state of an upload batch"""
+    status = batch_status(batch_id)
+    if status is None:
+        raise Http404('Unknown upload batch')
+    return JsonResponse(status)
+
+
+@staff_required
+def panel_category_order(request, category_id):
+    """Drag-and-drop ordering of a category's items"""
+    category = get_object_or_404(Category, id=category_id)
+    items = category.items.only('id', 'title', 'status', 'main_image', 'order').order_by('order', 'id')
+    context = {
+        'category': category,
+        'items': items,
+    }
+    return render(request, 'panel/category_order.html', context)
+
+
 def panel_item_delete(request, item_id):
     """Delete item"""
     item = get_object_or_404(Item, id=item_id)
@@ -264,7 +568,7 @@ def panel_categories(request):
 
         if action == 'add':
             name = request.POST.get('name')
-            slug = transliterate(name)
+            slug = unique_slug(Category, name)
             description = request.POST.get('description', '')
             category = Category.objects.create(name=name, slug=slug, description=description)
             if 'image' in request.FILES:
@@ -0,0 +1,110 @@
+"""
+Cache warming after a deploy or restart.
+
+``warm_urls`` requests public pages from a thread pool. Given the
+address of the running server (gunicorn passes it to ``warm_caches``
+once it is listening), the requests are real HTTP requests; the
+workers that happen to answer them also load their catalog snapshots
+and templates.
+Without one, pages are rendered in the calling process through the
+normal URLconf. Either way rendering fills the shared cache tier
+(fragments and category card pages) for every worker.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from django.conf import settings
+from django.template.loader import get_template
+from django.urls import reverse
+from .catalog import encode_cursor
+
+
+PUBLIC_TEMPLATES = [
+    'index.html',
+    'product_detail.html',
+    'includes/product_card_list.html',
+]
+
+# Seconds to wait for one page; a cold worker may still be booting
+FETCH_TIMEOUT = 30
+
+_local = threading.local()
+
+
+def public_urls(snapshot):
+    """
+    Return ``[(kind, url)]`` for every public page, most visited first:
+    the home page, the sitemap, category card pages, then products with
+    featured ones first.
+    """
+    per_category = settings.HOME_ITEMS_PER_CATEGORY
+    urls = [('index', reverse('index')), ('sitemap', reverse('sitemap'))]
+
+    for category in snapshot.categories:
+        items = snapshot.category_items(category.id)
+        cursor = encode_cursor(items[per_category - 1]) if len(items) > per_category else None
+        while cursor:
+            urls.append(('category', reverse('category_items', args=[category.slug, cursor])))
+            _, cursor = snapshot.page(category.id, cursor, settings.CATEGORY_PAGE_SIZE)
+
+    items = sorted(snapshot.items_by_slug.values(), key=lambda item: (not item.featured, item.order, item.id))
+    urls += [('product', reverse('product_detail', args=[item.slug])) for item in items]
+    return urls
+
+
+def compile_templates():
+    """Load the public templates into the cached template loader"""
+    for name in PUBLIC_TEMPLATES:
+        get_template(name)
+
+
+def _client(host):
+    from django.test import Client
+
+    if getattr(_local, 'client', None) is None:
+        _local.client = Client(HTTP_HOST=host)
+    return _local.client
+
+
+def _session():
+    if getattr(_local, 'session', None) is None:
+        _local.session = requests.Session()
+    return _local.session
+
+
+def fetch(url, host, base_url=None):
+    """Request one URL, over HTTP if ``base_url`` is given; returns ``(status, seconds)``"""
+    start = time.perf_counter()
+    if base_url:
+        response = _session().get(
+            base_url.rstrip('/') + url, headers={'Host': host}, timeout=FETCH_TIMEOUT, allow_redirects=False,
+        )
+    else:
+        response = _client(host).get(url)
+    return response.status_code, time.perf_counter() - start
+
+
+def warm_urls(urls, host, workers=8, budget=None, base_url=None):
+    """
+    Request ``urls`` concurrently until done or ``budget`` seconds have
+    passed. Returns ``[(kind, url, status, seconds)]`` for requested URLs;
+    URLs skipped for lack of time are not included.
+    """
+    deadline = time.monotonic() + budget if budget else None
+    results = []
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='warm')
+    try:
+        futures = {executor.submit(fetch, url, host, base_url): (kind, url) for kind, url in urls}
+        for future in as_completed(futures):
+            kind, url = futures[future]
+            try:
+                status, seconds = future.result()
+            except Exception as e:
+                status, seconds = repr(e), 0.0
+            results.append((kind, url, status, seconds))
+            if deadline and time.monotonic() >= deadline:
+                break
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    return results